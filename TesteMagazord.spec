@@ -5,7 +5,7 @@ a = Analysis(
     ['app\\main.py'],
     pathex=[],
     binaries=[],
-    datas=[('app\\static', 'static'), ('app\\data', 'data')],
+    datas=[('app\\static', 'static'), ('app\\data', 'data'), ('app\\robot_worker.py', '.'), ('app\\suite_order.py', '.')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from log_index import INDEX_NAME, LogIndex, build_index, subtree
+
+# Benchmark do "tempo até a primeira renderização" do log de execuções grandes (REGRESSION_ALL):
+#
+#   python bench_log_render.py
+#   python bench_log_render.py --runs-dir ../dist/TesteMagazord/_internal/static/runs --repeat 7 --json bench.json
+#
+# Compara, para cada output.xml:
+#   - monolítico: log.html atual, cujos dados embutidos (window.output / sPart) são todos lidos antes de desenhar;
+#   - splitlog:   log.html gerado com rebot --splitlog (só a árvore de suítes/testes; keywords em log-N.js sob demanda);
+#   - explorador: /api/log_node (índice pré-processado; a primeira tela é a suíte raiz + testes com falha).
+# A estimativa = bytes até a primeira tela / banda (--mbps) + tempo de interpretação dos dados (JSON, proxy do
+# parse JS do navegador) + tempo do servidor. Não mede pintura real do navegador.
+
+_STMT_RE = re.compile(r"^(window\.[\w\[\]\"]+) = (.*);\s*$", re.S)
+_CONCAT_RE = re.compile(r"^window\.output\[\"strings\"\]\.concat\((.*)\)$", re.S)
+_REF_RE = re.compile(r"\bwindow\.\w+")
+_SCRIPT_RE = re.compile(r"<script type=\"text/javascript\">\n(window\.(?:output|sPart\d+|settings)\b.*?)</script>", re.S)
+
+
+def _data_statements(html_text: str) -> List[str]:
+    """Lado direito das atribuições de dados embutidas no log.html (sem o JS da aplicação)."""
+    out: List[str] = []
+    for block in _SCRIPT_RE.findall(html_text):
+        m = _STMT_RE.match(block.strip())
+        if not m:
+            continue
+        rhs = m.group(2).strip()
+        c = _CONCAT_RE.match(rhs)
+        if c:
+            rhs = c.group(1)
+        out.append(_REF_RE.sub("null", rhs))
+    return out
+
+
+def _parse_ms(statements: List[str]) -> float:
+    t0 = time.perf_counter()
+    for rhs in statements:
+        try:
+            json.loads(rhs)
+        except ValueError:
+            pass  # expressões que não são JSON puro (raras) entram só nos bytes
+    return (time.perf_counter() - t0) * 1000
+
+
+def _median_ms(fn: Callable[[], float], repeat: int) -> float:
+    return round(statistics.median(fn() for _ in range(repeat)), 2)
+
+
+def _timed(fn: Callable[[], Any]) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t0) * 1000
+
+
+def _ttfr(first_bytes: int, cpu_ms: float, mbps: float) -> float:
+    return round(first_bytes * 8 / (mbps * 1_000_000) * 1000 + cpu_ms, 1)
+
+
+def _log_mode(log_html: Path, repeat: int, mbps: float) -> Dict[str, Any]:
+    text = log_html.read_text(encoding="utf-8")
+    stmts = _data_statements(text)
+    parse = _median_ms(lambda: _parse_ms(stmts), repeat)
+    first = log_html.stat().st_size
+    parts = sorted(log_html.parent.glob(log_html.stem + "-*.js"))
+    return {
+        "first_render_bytes": first,
+        "data_bytes": sum(len(s) for s in stmts),
+        "parse_ms": parse,
+        "lazy_parts": len(parts),
+        "lazy_bytes": sum(p.stat().st_size for p in parts),
+        "ttfr_ms": _ttfr(first, parse, mbps),
+    }
+
+
+def _split_log(output_xml: Path, dest: Path, python: str) -> Optional[Path]:
+    cmd = [python, "-m", "robot.rebot", "--splitlog", "-d", str(dest), "--log", "log.html", "--report", "NONE",
+           "--output", "NONE", str(output_xml)]
+    try:
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=600, check=False)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    log = dest / "log.html"
+    return log if log.exists() else None
+
+
+def _explorer_mode(run_dir: Path, project: str, repeat: int, mbps: float) -> Dict[str, Any]:
+    xml = run_dir / "output.xml"
+    cold = _median_ms(lambda: _timed(lambda: build_index(xml, project)), repeat)
+    index = LogIndex(project).load(run_dir)   # grava o índice ao lado do output.xml
+    warm = _median_ms(lambda: _timed(lambda: LogIndex(project).load(run_dir)), repeat)
+
+    def first_payload() -> str:
+        return json.dumps({"node": subtree(index, index["root"], 1), "failed_tests": index["failed_tests"]},
+                          ensure_ascii=False)
+
+    payload = first_payload()
+    server = _median_ms(lambda: _timed(first_payload), repeat)
+    parse = _median_ms(lambda: _timed(lambda: json.loads(payload)), repeat)
+    result: Dict[str, Any] = {
+        "index_build_ms": cold,
+        "index_load_ms": warm,
+        "index_bytes": (run_dir / INDEX_NAME).stat().st_size if (run_dir / INDEX_NAME).exists() else None,
+        "first_render_bytes": len(payload.encode("utf-8")),
+        "server_ms": server,
+        "parse_ms": parse,
+        # índice já pré-processado após a execução (LogIndex.warm): servidor + transferência + parse
+        "ttfr_ms": _ttfr(len(payload.encode("utf-8")), server + parse, mbps),
+    }
+    if index["failed_tests"]:
+        fid = index["failed_tests"][0]["id"]
+        expand = json.dumps(subtree(index, fid, 0, expand_fail=True), ensure_ascii=False)
+        result["expand_failure_bytes"] = len(expand.encode("utf-8"))
+        result["expand_failure_ms"] = _median_ms(
+            lambda: _timed(lambda: json.dumps(subtree(index, fid, 0, expand_fail=True), ensure_ascii=False)), repeat)
+    return result
+
+
+def bench_run(run_dir: Path, project: str, repeat: int, mbps: float, python: str, keep_index: bool) -> Dict[str, Any]:
+    out: Dict[str, Any] = {"run_id": run_dir.name, "output_xml_bytes": (run_dir / "output.xml").stat().st_size}
+    had_index = (run_dir / INDEX_NAME).exists()
+    if (run_dir / "log.html").exists():
+        out["monolithic"] = _log_mode(run_dir / "log.html", repeat, mbps)
+    with tempfile.TemporaryDirectory(prefix="bench_splitlog_") as tmp:
+        split = _split_log(run_dir / "output.xml", Path(tmp), python)
+        out["splitlog"] = _log_mode(split, repeat, mbps) if split else {"error": "robot.rebot indisponível"}
+    try:
+        out["explorer"] = _explorer_mode(run_dir, project, repeat, mbps)
+    finally:
+        if not keep_index and not had_index:
+            (run_dir / INDEX_NAME).unlink(missing_ok=True)
+    return out
+
+
+def _print_table(results: List[Dict[str, Any]]) -> None:
+    print(f"{'execução':<32} {'modo':<11} {'1ª tela (KB)':>12} {'parse ms':>9} {'TTFR ms':>8}  detalhes")
+    for r in results:
+        for mode in ("monolithic", "splitlog", "explorer"):
+            m = r.get(mode)
+            if not m:
+                continue
+            if "error" in m:
+                print(f"{r['run_id']:<32} {mode:<11} {m['error']}")
+                continue
+            if mode == "explorer":
+                extra = (f"índice {m['index_build_ms']} ms (frio) / {m['index_load_ms']} ms (cache); "
+                         f"expandir falha {m.get('expand_failure_bytes', 0) / 1024:.1f} KB")
+            else:
+                extra = f"dados {m['data_bytes'] / 1024:.1f} KB; {m['lazy_parts']} partes sob demanda"
+            print(f"{r['run_id']:<32} {mode:<11} {m['first_render_bytes'] / 1024:>12.1f} {m['parse_ms']:>9} "
+                  f"{m['ttfr_ms']:>8}  {extra}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Tempo até a primeira renderização do log (REGRESSION_ALL)")
+    parser.add_argument("--runs-dir", default=str(Path(__file__).resolve().parent / "static" / "runs"))
+    parser.add_argument("--project", default="TesteMagazord", help="pasta do projeto nos caminhos do output.xml")
+    parser.add_argument("--match", default="REGRESSION_ALL", help="trecho do run_id a incluir")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--mbps", type=float, default=50.0, help="banda assumida para a transferência")
+    parser.add_argument("--python", default=sys.executable, help="interpretador com robotframework (para o rebot)")
+    parser.add_argument("--keep-index", action="store_true", help="mantém o _log_index.json gerado")
+    parser.add_argument("--json", help="grava os resultados neste arquivo")
+    args = parser.parse_args(argv)
+
+    runs = [p for p in sorted(Path(args.runs_dir).iterdir())
+            if p.is_dir() and args.match in p.name and (p / "output.xml").exists()]
+    if not runs:
+        print(f"nenhuma execução com '{args.match}' e output.xml em {args.runs_dir}", file=sys.stderr)
+        return 2
+    results = [bench_run(p, args.project, max(1, args.repeat), args.mbps, args.python, args.keep_index) for p in runs]
+    _print_table(results)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
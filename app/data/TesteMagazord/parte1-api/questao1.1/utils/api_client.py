@@ -0,0 +1,256 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+# Cliente HTTP compartilhado pelas suítes de API (estado no módulo = vale para o processo inteiro):
+#
+# - uma requests.Session por host, com pool de conexões keep-alive (sem handshake TCP/TLS a cada teste);
+# - um token bucket por base_url (API/prefixo do proxy, não só o host: no modo offline GitHub e Reqres
+#   dividem o mesmo 127.0.0.1:porta) alimentado pelos headers X-RateLimit-*: cada requisição consome uma
+#   ficha localmente e só espera quando a cota realmente acabou (em vez de dormir após cada resposta);
+# - GET condicional (If-None-Match / If-Modified-Since) com cache local: um 304 devolve o corpo guardado
+#   e, no GitHub, não consome cota.
+
+_POOL_SIZE = 16
+_CACHE_MAX = 256
+
+_LOCK = threading.Lock()
+_SESSIONS = {}
+_BUCKETS = {}
+_CACHE = OrderedDict()
+_STATS = {"requests": 0, "not_modified": 0, "cache_hits": 0, "rate_limited": 0, "quota_exhausted": 0,
+          "waited_sec": 0.0}
+_CONFIG = {"reserve": 0, "safety_ms": 500, "max_wait_sec": 120.0}
+
+
+class _Bucket:
+    """Cota de um host: fichas = remaining informado pelo servidor menos o que já foi gasto localmente."""
+
+    def __init__(self) -> None:
+        self.cond = threading.Condition()
+        self.limit = None
+        self.remaining = None
+        self.reset = 0.0
+
+    def update(self, headers, status: int) -> None:
+        with self.cond:
+            try:
+                if "X-RateLimit-Limit" in headers:
+                    self.limit = int(headers["X-RateLimit-Limit"])
+                if "X-RateLimit-Remaining" in headers:
+                    self.remaining = int(headers["X-RateLimit-Remaining"])
+                if "X-RateLimit-Reset" in headers:
+                    self.reset = float(headers["X-RateLimit-Reset"])
+            except ValueError:
+                return
+            if status in (403, 429) and (self.remaining == 0 or "Retry-After" in headers):
+                # recusado por cota: espera o Retry-After ou, se o reset informado já passou
+                # (relógios/arredondamento), pelo menos 1s antes de tentar de novo
+                retry_after = headers.get("Retry-After", "")
+                self.remaining = 0
+                self.reset = max(self.reset, time.time() + (int(retry_after) if retry_after.isdigit() else 1))
+            self.cond.notify_all()
+
+    def acquire(self, reserve: int, safety: float, max_wait: float):
+        """Consome uma ficha; espera o reset só se a cota acabou. Retorna (segundos esperados, esgotada).
+
+        Se o reset está além de `max_wait`, não espera nem consome: devolve esgotada=True e quem chamou decide
+        (enviar mesmo assim e ver o 403/429 do servidor, ou falhar).
+        """
+        waited = 0.0
+        with self.cond:
+            while True:
+                now = time.time()
+                if self.remaining is not None and self.reset and now >= self.reset:
+                    # janela renovada (ou cassette antigo): assume a cota cheia até a próxima resposta
+                    self.remaining = self.limit
+                    self.reset = 0.0
+                if self.remaining is None or self.remaining > reserve:
+                    if self.remaining is not None:
+                        self.remaining -= 1
+                    return waited, False
+                delay = self.reset + safety - now
+                if delay > max_wait - waited:
+                    return waited, True
+                t0 = time.monotonic()
+                self.cond.wait(timeout=max(0.0, delay))
+                waited += time.monotonic() - t0
+
+
+def _host(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _bucket_key(base_url: str) -> str:
+    return base_url.rstrip("/")
+
+
+def _session(base_url: str) -> requests.Session:
+    # conexões são por host (keep-alive); a cota é por base_url
+    host = _host(base_url)
+    with _LOCK:
+        s = _SESSIONS.get(host)
+        if s is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=_POOL_SIZE)
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            _SESSIONS[host] = s
+        _BUCKETS.setdefault(_bucket_key(base_url), _Bucket())
+        return s
+
+
+def _cache_key(url: str, params, headers) -> str:
+    auth = (headers or {}).get("Authorization", "")
+    raw = f"{url}?{sorted((params or {}).items())}|{hashlib.sha256(auth.encode()).hexdigest()}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _from_cache(entry, resp: requests.Response) -> requests.Response:
+    cached = requests.Response()
+    cached.status_code = entry["status"]
+    cached._content = entry["content"]
+    cached.headers = CaseInsensitiveDict(entry["headers"])
+    # headers da revalidação (rate limit atual, Date...) valem mais que os guardados
+    cached.headers.update(resp.headers)
+    cached.headers["X-Cache"] = "revalidated"
+    cached.url = resp.url
+    cached.encoding = entry["encoding"]
+    cached.request = resp.request
+    cached.elapsed = resp.elapsed
+    return cached
+
+
+def _request(method: str, base_url: str, path: str = "", params=None, headers=None, expected_status=None,
+             timeout: float = 30, on_exhausted: str = "send", **kwargs) -> requests.Response:
+    method = method.upper()
+    url = base_url.rstrip("/") + "/" + str(path).lstrip("/") if path else base_url
+    s = _session(base_url)
+    bucket = _BUCKETS[_bucket_key(base_url)]
+    waited, exhausted = bucket.acquire(int(_CONFIG["reserve"]), _CONFIG["safety_ms"] / 1000.0,
+                                       float(_CONFIG["max_wait_sec"]))
+    if exhausted:
+        with _LOCK:
+            _STATS["quota_exhausted"] += 1
+        if str(on_exhausted).lower() == "fail":
+            raise AssertionError(f"cota de rate limit esgotada para {base_url}; reset em "
+                                 f"{bucket.reset - time.time():.0f}s (acima de max_wait_sec={_CONFIG['max_wait_sec']:.0f})")
+        # "send": a requisição vai assim mesmo e o servidor responde (403/429 de rate limit)
+    headers = dict(headers or {})
+
+    key = None
+    entry = None
+    if method == "GET":
+        key = _cache_key(url, params, headers)
+        with _LOCK:
+            entry = _CACHE.get(key)
+        if entry is not None:
+            if entry.get("etag"):
+                headers.setdefault("If-None-Match", entry["etag"])
+            if entry.get("last_modified"):
+                headers.setdefault("If-Modified-Since", entry["last_modified"])
+
+    resp = s.request(method, url, params=params, headers=headers, timeout=float(timeout), **kwargs)
+    bucket.update(resp.headers, resp.status_code)
+
+    with _LOCK:
+        _STATS["requests"] += 1
+        _STATS["waited_sec"] = round(_STATS["waited_sec"] + waited, 3)
+        if resp.status_code in (403, 429) and bucket.remaining == 0:
+            _STATS["rate_limited"] += 1
+        if resp.status_code == 304 and entry is not None:
+            _STATS["not_modified"] += 1
+            _STATS["cache_hits"] += 1
+            _CACHE.move_to_end(key)
+            resp = _from_cache(entry, resp)
+        elif key is not None and resp.status_code == 200 and (resp.headers.get("ETag") or resp.headers.get("Last-Modified")):
+            _CACHE[key] = {
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+                "status": resp.status_code,
+                "headers": dict(resp.headers),
+                "content": resp.content,
+                "encoding": resp.encoding,
+            }
+            _CACHE.move_to_end(key)
+            while len(_CACHE) > _CACHE_MAX:
+                _CACHE.popitem(last=False)
+
+    if expected_status not in (None, "", "any", "anything"):
+        allowed = [int(x) for x in str(expected_status).replace(" ", "").split(",")]
+        if resp.status_code not in allowed:
+            raise AssertionError(f"{method} {url} retornou {resp.status_code}, esperado {expected_status}: {resp.text[:300]}")
+    return resp
+
+
+def api_get(base_url: str, path: str = "", params=None, headers=None, expected_status=None, timeout: float = 30,
+            on_exhausted: str = "send"):
+    """Keyword: GET pela conexão compartilhada, respeitando a cota e revalidando com ETag.
+
+    Devolve um requests.Response (como GET On Session). Um 304 vira o 200 guardado, com header X-Cache: revalidated.
+    `expected_status`: lista separada por vírgula (ex.: "200,403"); vazio = não verifica.
+    `on_exhausted`: cota esgotada com reset além de max_wait_sec -> "send" envia mesmo assim (o teste vê o 403),
+    "fail" falha sem enviar.
+    """
+    return _request("GET", base_url, path, params=params, headers=headers, expected_status=expected_status,
+                    timeout=timeout, on_exhausted=on_exhausted)
+
+
+def api_post(base_url: str, path: str = "", json=None, data=None, headers=None, expected_status=None,
+             timeout: float = 30, on_exhausted: str = "send"):
+    """Keyword: POST pela conexão compartilhada (sem cache), respeitando a cota da API (ver `on_exhausted` no Api Get)."""
+    return _request("POST", base_url, path, headers=headers, expected_status=expected_status, timeout=timeout,
+                    on_exhausted=on_exhausted, json=json, data=data)
+
+
+def configure_api_client(reserve=None, safety_ms=None, max_wait_sec=None):
+    """Keyword: `reserve` fichas nunca gastas (margem), `safety_ms` após o reset, `max_wait_sec` de espera máxima."""
+    for name, value in (("reserve", reserve), ("safety_ms", safety_ms), ("max_wait_sec", max_wait_sec)):
+        if value is not None and str(value) != "":
+            _CONFIG[name] = float(value) if name == "max_wait_sec" else int(value)
+    return dict(_CONFIG)
+
+
+def rate_limit_state(base_url: str):
+    """Keyword: cota conhecida da API {limit, remaining, reset, reset_in_sec, exhausted}."""
+    _session(base_url)
+    b = _BUCKETS[_bucket_key(base_url)]
+    with b.cond:
+        reset_in = round(max(0.0, b.reset - time.time()), 1) if b.reset else 0.0
+        exhausted = (b.remaining is not None and b.remaining <= int(_CONFIG["reserve"])
+                     and reset_in + _CONFIG["safety_ms"] / 1000.0 > float(_CONFIG["max_wait_sec"]))
+        return {"limit": b.limit, "remaining": b.remaining, "reset": b.reset, "reset_in_sec": reset_in,
+                "exhausted": exhausted}
+
+
+def api_client_stats():
+    """Keyword: contadores do processo (requisições, 304 reaproveitados, esperas) e conexões abertas por host."""
+    with _LOCK:
+        stats = dict(_STATS, cached_entries=len(_CACHE))
+        sessions = dict(_SESSIONS)
+    connections = {}
+    for host, s in sessions.items():
+        adapter = s.get_adapter(host)
+        pools = adapter.poolmanager.pools
+        opened = sum(getattr(pools[k], "num_connections", 0) for k in pools.keys())
+        sent = sum(getattr(pools[k], "num_requests", 0) for k in pools.keys())
+        connections[host] = {"opened": opened, "requests": sent}
+    stats["connections"] = connections
+    return stats
+
+
+def reset_api_client():
+    """Keyword: fecha as conexões e limpa cota e cache (ex.: entre cenários que não devem compartilhar estado)."""
+    with _LOCK:
+        for s in _SESSIONS.values():
+            s.close()
+        _SESSIONS.clear()
+        _BUCKETS.clear()
+        _CACHE.clear()
+        _STATS.update(requests=0, not_modified=0, cache_hits=0, rate_limited=0, quota_exhausted=0, waited_sec=0.0)
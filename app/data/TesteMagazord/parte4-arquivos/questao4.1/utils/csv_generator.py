@@ -1,8 +1,75 @@
 import csv
+import gzip
+import time
 import random
 from pathlib import Path
+from robot.api import logger
 
-def generate(path: str, rows: int = 10):
+HEADER = ["nome", "email", "idade", "cidade"]
+CIDADES = ["São Paulo", "Rio de Janeiro", "Fortaleza"]
+# versão do formato gerado: mudar HEADER/CIDADES/_rows_block exige subir a versão (invalida o cache)
+SCHEMA_ID = "usuarios/v1"
+_IDADES = [str(i) for i in range(18, 71)]
+
+# Linhas são geradas em blocos fixos, cada um com o seu Random(seed:bloco): a saída depende só de
+# (rows, seed) e o arquivo de N linhas é prefixo do de M > N linhas com a mesma seed.
+_BLOCO = 65536
+
+
+def _rows_block(seed, block: int, start: int, n: int) -> str:
+    rnd = random.Random(f"{seed}:{block}")
+    # sorteia sempre o bloco inteiro (um bloco parcial é prefixo do bloco completo)
+    idades = rnd.choices(_IDADES, k=_BLOCO)
+    cidades = rnd.choices(CIDADES, k=_BLOCO)
+    # mesmo formato do csv.writer (delimiter=";", terminador \r\n); os valores não precisam de aspas
+    return "".join([
+        f"User {i};user{i}@email.com;{idade};{cidade}\r\n"
+        for i, idade, cidade in zip(range(start, start + n), idades, cidades)
+    ])
+
+
+def generate_fixture(path: str, rows: int = 1000, seed: int = 0, gzip_output: bool = False,
+                     buffer_mb: int = 8, compresslevel: int = 6):
+    """Gera um CSV grande de forma determinística (mesma seed = mesmo arquivo) e rápida.
+
+    Escreve em blocos por um writer com buffer grande; `gzip_output` grava .csv.gz (mtime fixo,
+    então o .gz também é reprodutível). Retorna {path, rows, bytes, seconds, rows_per_sec}.
+    """
+    rows_i = int(rows)
+    seed = str(seed)
+    p = Path(path)
+    gz = str(gzip_output).lower() in ("1", "true", "yes")
+    if gz and p.suffix != ".gz":
+        p = p.with_name(p.name + ".gz")
+    p.parent.mkdir(parents=True, exist_ok=True)
+
+    t0 = time.perf_counter()
+    with open(p, "wb", buffering=int(buffer_mb) * 1024 * 1024) as raw:
+        out = gzip.GzipFile(filename="", mode="wb", fileobj=raw, mtime=0,
+                            compresslevel=int(compresslevel)) if gz else raw
+        try:
+            out.write((";".join(HEADER) + "\r\n").encode("utf-8"))
+            for block, start in enumerate(range(0, rows_i, _BLOCO)):
+                n = min(_BLOCO, rows_i - start)
+                out.write(_rows_block(seed, block, start, n).encode("utf-8"))
+        finally:
+            if gz:
+                out.close()
+    seconds = time.perf_counter() - t0
+
+    result = {
+        "path": str(p.resolve()),
+        "rows": rows_i,
+        "bytes": p.stat().st_size,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": int(rows_i / seconds) if seconds > 0 else rows_i,
+    }
+    logger.info(f"CSV gerado: {result['rows']} linhas, {result['bytes']} bytes em {result['seconds']}s "
+                f"({result['rows_per_sec']} linhas/s) -> {result['path']}")
+    return result
+
+
+def generate(path: str, rows: int = 10, seed=None):
     # Robot pode passar rows como string, então força int aqui:
     rows_i = int(rows)
 
@@ -13,15 +80,18 @@ def generate(path: str, rows: int = 10):
     meta = p.with_suffix(".meta.txt")
     meta.write_text(f"requested_rows={rows_i}\n", encoding="utf-8")
 
+    if seed is not None and str(seed) != "":
+        return generate_fixture(str(p), rows_i, seed=seed)["path"]
+
     with p.open("w", newline="", encoding="utf-8") as f:
         w = csv.writer(f, delimiter=";")  # ; ajuda no Excel PT-BR
-        w.writerow(["nome", "email", "idade", "cidade"])
+        w.writerow(HEADER)
         for i in range(rows_i):
             w.writerow([
                 f"User {i}",
                 f"user{i}@email.com",
                 random.randint(18, 70),
-                random.choice(["São Paulo", "Rio de Janeiro", "Fortaleza"])
+                random.choice(CIDADES)
             ])
 
-    return str(p.resolve())
\ No newline at end of file
+    return str(p.resolve())
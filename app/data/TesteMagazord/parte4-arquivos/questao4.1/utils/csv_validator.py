@@ -0,0 +1,188 @@
+import os
+import re
+import sys
+import csv
+import gzip
+import time
+from concurrent.futures import ProcessPoolExecutor
+from robot.api import logger
+from csv_generator import HEADER
+
+# Validação de fixtures CSV numa única passada em stream (memória constante).
+# Arquivos grandes podem ser divididos em faixas de bytes processadas em paralelo: cada faixa
+# "possui" as linhas que começam dentro dela, então nenhuma linha é contada duas vezes.
+
+# tipos de coluna aceitos em `types`
+_TYPE_PATTERNS = {
+    "str": r"[^;\r\n]*",
+    "text": r"[^;\r\n]+",
+    "int": r"-?\d+",
+    "float": r"-?\d+(?:[.,]\d+)?",
+    "email": r"[^@;\s]+@[^@;\s]+\.[^@;\s]+",
+}
+DEFAULT_TYPES = "text,email,int,text"
+_PARALLEL_MIN_BYTES = 32 * 1024 * 1024
+
+
+def _split(value):
+    if isinstance(value, (list, tuple)):
+        return [str(v).strip() for v in value]
+    return [v.strip() for v in str(value).split(",")]
+
+
+def _line_regex(types, delimiter):
+    parts = []
+    for t in types:
+        if t not in _TYPE_PATTERNS:
+            raise ValueError(f"tipo de coluna desconhecido: {t} (use {', '.join(_TYPE_PATTERNS)})")
+        parts.append(f"(?:{_TYPE_PATTERNS[t]})".replace(";", re.escape(delimiter)))
+    return re.compile(re.escape(delimiter).join(parts) + r"\r?\n?")
+
+
+def _diagnose(text, types, delimiter):
+    """Motivo detalhado de uma linha que não casou com o padrão rápido."""
+    fields = next(csv.reader([text.rstrip("\r\n")], delimiter=delimiter), [])
+    if len(fields) != len(types):
+        return "colunas", f"esperado {len(types)} colunas, encontrado {len(fields)}"
+    for i, (value, t) in enumerate(zip(fields, types), start=1):
+        if not re.fullmatch(_TYPE_PATTERNS[t], value):
+            return "tipo", f"coluna {i} ({t}) inválida: {value[:60]!r}"
+    return None
+
+
+def _iter_lines(f, pos, end, block_size=4 * 1024 * 1024):
+    """Linhas (bytes) que começam em [pos, end), lidas em blocos grandes a partir da posição atual de f."""
+    carry = b""
+    while pos < end:
+        block = f.read(block_size)
+        if not block:
+            break
+        lines = (carry + block).split(b"\n")
+        carry = lines.pop()
+        for raw in lines:
+            if pos >= end:
+                return
+            yield raw
+            pos += len(raw) + 1
+    if carry and pos < end:
+        yield carry
+
+
+def _scan(f, start, end, types, delimiter, max_violations):
+    """Valida as linhas que começam em [start, end). Retorna (linhas, nº de violações, primeiras violações)."""
+    pattern = _line_regex(types, delimiter)
+    violations = []
+    count = 0
+    lines = 0
+    for raw in _iter_lines(f, start, end):
+        lines += 1
+        try:
+            text = raw.decode("utf-8")
+        except UnicodeDecodeError as e:
+            problem = ("encoding", f"UTF-8 inválido na posição {e.start} da linha")
+        else:
+            problem = None if pattern.fullmatch(text) else _diagnose(text, types, delimiter)
+        if problem:
+            count += 1
+            if len(violations) < max_violations:
+                violations.append({"local_line": lines, "kind": problem[0], "message": problem[1]})
+    return lines, count, violations
+
+
+def _scan_range(path, start, end, types, delimiter, max_violations):
+    # executado nos processos filhos
+    with open(path, "rb") as f:
+        if start > 0:
+            f.seek(start - 1)
+            if f.read(1) != b"\n":
+                # start caiu no meio de uma linha: ela pertence à faixa anterior
+                start += len(f.readline())
+        return _scan(f, start, end, types, delimiter, max_violations)
+
+
+def validate_csv_fixture(path: str, expected_header=None, types=DEFAULT_TYPES, delimiter: str = ";",
+                         workers=1, max_violations: int = 20, fail: bool = True):
+    """Keyword: valida cabeçalho, número de colunas, tipos e encoding (UTF-8) de um CSV em uma passada.
+
+    - `types`: tipos por coluna (str, text, int, float, email), ex.: "text,email,int,text".
+    - `workers`: processos para arquivos grandes (faixas de bytes); "auto" = núcleos da máquina.
+      Arquivos .gz são sempre lidos em stream num único processo.
+    - Retorna {valid, rows, bytes, seconds, rows_per_sec, violation_count, violations (primeiras N)};
+      com `fail` (padrão) a keyword falha listando as primeiras violações.
+    """
+    path = str(path)
+    header = _split(expected_header) if expected_header else list(HEADER)
+    types = _split(types)
+    max_violations = int(max_violations)
+    if len(types) != len(header):
+        raise ValueError(f"`types` tem {len(types)} colunas e o cabeçalho {len(header)}")
+    workers = (os.cpu_count() or 1) if str(workers).lower() == "auto" else max(1, int(workers))
+
+    t0 = time.perf_counter()
+    size = os.path.getsize(path)
+    violations = []
+    count = 0
+    rows = 0
+    gz = path.endswith(".gz")
+
+    opener = gzip.open if gz else open
+    with opener(path, "rb") as f:
+        first = f.readline()
+        header_end = len(first)
+        if not first:
+            violations.append({"line": 1, "kind": "vazio", "message": "arquivo vazio (sem cabeçalho)"})
+            count = 1
+        else:
+            try:
+                got = next(csv.reader([first.decode("utf-8-sig").rstrip("\r\n")], delimiter=delimiter), [])
+            except UnicodeDecodeError:
+                got = None
+            if got != header:
+                count += 1
+                violations.append({"line": 1, "kind": "cabecalho",
+                                   "message": f"esperado {delimiter.join(header)!r}, encontrado {first[:120]!r}"})
+            if gz or workers == 1 or size < _PARALLEL_MIN_BYTES:
+                workers = 1
+                rows, n, found = _scan(f, header_end, float("inf"), types, delimiter, max_violations)
+                count += n
+                for v in found:
+                    v["line"] = v.pop("local_line") + 1
+                violations += found
+
+    if first and not gz and workers > 1:
+        # faixas de bytes após o cabeçalho; o processo filho precisa importar este módulo
+        here = os.path.dirname(os.path.abspath(__file__))
+        if here not in sys.path:
+            sys.path.insert(0, here)
+        step = max(1, (size - header_end) // workers + 1)
+        ranges = [(s, min(size, s + step)) for s in range(header_end, size, step)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_scan_range, path, s, e, types, delimiter, max_violations) for s, e in ranges]
+            line_base = 2
+            for fut in futures:
+                lines, n, found = fut.result()
+                count += n
+                for v in found:
+                    v["line"] = line_base + v.pop("local_line") - 1
+                violations += found[:max_violations - len(violations)]
+                line_base += lines
+                rows += lines
+
+    seconds = time.perf_counter() - t0
+    result = {
+        "path": os.path.abspath(path),
+        "valid": count == 0,
+        "rows": rows,
+        "bytes": size,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": int(rows / seconds) if seconds > 0 else rows,
+        "workers": workers,
+        "violation_count": count,
+        "violations": violations[:max_violations],
+    }
+    logger.info(f"CSV validado: {rows} linhas em {result['seconds']}s ({result['rows_per_sec']} linhas/s, "
+                f"{workers} processo(s)), {count} violação(ões)")
+    if fail and count:
+        lines = [f"linha {v['line']} [{v['kind']}]: {v['message']}" for v in result["violations"]]
+        raise AssertionError(f"{count} violação(ões) em {path}:\n" + "\n".join(lines))
+    return result
@@ -0,0 +1,238 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+from pathlib import Path
+from robot.api import logger
+# módulos, não funções: o Robot expõe como keyword toda função importada no módulo da biblioteca,
+# e Generate Fixture/Validate Csv Fixture ficariam ambíguas com as de csv_generator/csv_validator
+import csv_generator
+import csv_validator
+from csv_generator import SCHEMA_ID
+
+# Cache compartilhado de fixtures CSV, chaveado por (rows, seed, schema[, gzip]).
+#
+# <raiz>/objects/<sha256 do conteúdo>.csv   arquivos gerados uma única vez, somente leitura
+# <raiz>/index.json                          chave -> {object, bytes, last_used, ...} (LRU)
+#
+# Cada execução recebe um hardlink (ou cópia, se o sistema não suportar) num caminho próprio,
+# então execuções paralelas nunca escrevem no mesmo arquivo. Acima do orçamento de tamanho,
+# as entradas menos usadas recentemente são removidas.
+
+DEFAULT_BUDGET_MB = 2048
+_LOCK_STALE_SEC = 120
+
+
+def cache_root() -> Path:
+    env = (os.environ.get("MAGAZORD_FIXTURE_CACHE") or "").strip().strip('"')
+    return Path(env) if env else Path(tempfile.gettempdir()) / "magazord_fixture_cache"
+
+
+def _budget_bytes() -> int:
+    try:
+        return int(float(os.environ.get("MAGAZORD_FIXTURE_CACHE_MB", DEFAULT_BUDGET_MB)) * 1024 * 1024)
+    except ValueError:
+        return DEFAULT_BUDGET_MB * 1024 * 1024
+
+
+class _DirLock:
+    """Lock entre processos via mkdir atômico (funciona em Windows e Linux, sem dependências)."""
+
+    def __init__(self, path: Path, timeout: float = 60.0) -> None:
+        self.path = path
+        self.timeout = timeout
+
+    def __enter__(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                os.mkdir(self.path)
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - os.stat(self.path).st_mtime > _LOCK_STALE_SEC:
+                        os.rmdir(self.path)  # dono morreu segurando o lock
+                        continue
+                except OSError:
+                    pass
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"lock do cache de fixtures ocupado: {self.path}")
+                time.sleep(0.05)
+
+    def __exit__(self, *exc):
+        try:
+            os.rmdir(self.path)
+        except OSError:
+            pass
+
+
+def spec_key(rows, seed=0, schema: str = SCHEMA_ID, gzip_output: bool = False) -> str:
+    spec = {"rows": int(rows), "seed": str(seed), "schema": schema, "gzip": bool(gzip_output)}
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()[:24]
+
+
+def _sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(4 * 1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _read_index(root: Path) -> dict:
+    try:
+        return json.loads((root / "index.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_index(root: Path, index: dict) -> None:
+    tmp = root / "index.json.tmp"
+    tmp.write_text(json.dumps(index, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, root / "index.json")
+
+
+def _remove_object(path: Path) -> None:
+    try:
+        os.chmod(path, 0o644)  # Windows não apaga arquivo somente leitura
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _evict(root: Path, index: dict, budget: int, keep: str) -> None:
+    # tamanho real = objetos distintos (chaves diferentes podem apontar para o mesmo conteúdo)
+    sizes = {e["object"]: e["bytes"] for e in index.values()}
+    total = sum(sizes.values())
+    for key in sorted(index, key=lambda k: index[k]["last_used"]):
+        if total <= budget:
+            break
+        if key == keep:
+            continue
+        obj = index.pop(key)["object"]
+        if all(e["object"] != obj for e in index.values()):
+            _remove_object(root / "objects" / obj)
+            total -= sizes[obj]
+
+
+def _hand_out(obj: Path, dest) -> str:
+    if not dest:
+        return str(obj)
+    d = Path(dest)
+    d.parent.mkdir(parents=True, exist_ok=True)
+    # o link é criado com nome temporário e trocado por cima de `dest`: nunca se mexe no modo do destino,
+    # que, sendo hardlink, é o mesmo inode do objeto (chmod nele deixaria o cache gravável).
+    # `dest` deve ser por execução (ex.: dentro do ${OUTPUT DIR}); no Windows não dá para substituir
+    # um link somente leitura já existente sem mexer no modo do objeto.
+    try:
+        if os.path.samefile(obj, d):
+            return str(d)  # já é link para este objeto (e rename entre links do mesmo arquivo não faz nada)
+    except OSError:
+        pass
+    tmp = d.with_name(f".{d.name}.{os.getpid()}.tmp")
+    if tmp.exists() or tmp.is_symlink():
+        os.remove(tmp)
+    try:
+        os.link(obj, tmp)
+    except OSError:
+        # outro volume / sistema sem hardlink: cópia somente leitura (arquivo próprio, pode ter o modo alterado)
+        shutil.copyfile(obj, tmp)
+        os.chmod(tmp, 0o444)
+    os.replace(tmp, d)
+    return str(d)
+
+
+def _object_ok(obj: Path, entry: dict) -> bool:
+    """Objeto íntegro: tamanho do índice e sha256 igual ao nome (<sha256>.csv[.gz])."""
+    try:
+        if obj.stat().st_size != entry["bytes"]:
+            return False
+        return _sha256_file(obj) == entry["object"].split(".", 1)[0]
+    except OSError:
+        return False
+
+
+def cached_fixture(rows, seed=0, dest=None, schema: str = SCHEMA_ID, gzip_output: bool = False):
+    """Keyword: caminho de um CSV de `rows` linhas (gerado só na primeira vez para essa chave).
+
+    Com `dest`, devolve um hardlink somente leitura nesse caminho (por execução, sem corrida);
+    sem `dest`, devolve o próprio objeto do cache (não modificar). Num acerto, o conteúdo é conferido
+    pelo sha256; se não bater, a entrada é descartada e o CSV é gerado de novo.
+    """
+    rows = int(rows)
+    gz = str(gzip_output).lower() in ("1", "true", "yes")
+    key = spec_key(rows, seed, schema, gz)
+    root = cache_root()
+    objects = root / "objects"
+    objects.mkdir(parents=True, exist_ok=True)
+    lock = _DirLock(root / ".lock")
+
+    with lock:
+        index = _read_index(root)
+        entry = index.get(key)
+        if entry and (objects / entry["object"]).exists() and not _object_ok(objects / entry["object"], entry):
+            # alterado fora do cache (ex.: alguém gravou no link entregue): descarta e gera de novo
+            logger.warn(f"Fixture em cache corrompida, gerando novamente: {entry['object']}")
+            _remove_object(objects / index.pop(key)["object"])
+            _write_index(root, index)
+            entry = None
+        if entry and (objects / entry["object"]).exists():
+            entry["last_used"] = time.time()
+            entry["hits"] = entry.get("hits", 0) + 1
+            _write_index(root, index)
+            logger.info(f"Fixture em cache ({rows} linhas, seed={seed}): {entry['object']}")
+            return _hand_out(objects / entry["object"], dest)
+
+    # gera fora do lock (outras execuções seguem usando o cache); nome temporário exclusivo
+    fd, tmp_name = tempfile.mkstemp(prefix=f"gen-{key}-", suffix=".csv.gz" if gz else ".csv", dir=objects)
+    os.close(fd)
+    tmp = Path(tmp_name)
+    try:
+        info = csv_generator.generate_fixture(str(tmp), rows, seed=seed, gzip_output=gz)
+        csv_validator.validate_csv_fixture(str(tmp))
+        digest = _sha256_file(tmp)
+        obj_name = digest + (".csv.gz" if gz else ".csv")
+        obj = objects / obj_name
+        with lock:
+            if obj.exists():
+                _remove_object(tmp)  # mesmo conteúdo já gerado por outra execução
+            else:
+                os.chmod(tmp, 0o444)
+                os.replace(tmp, obj)
+            index = _read_index(root)
+            index[key] = {
+                "object": obj_name,
+                "bytes": obj.stat().st_size,
+                "rows": rows,
+                "seed": str(seed),
+                "schema": schema,
+                "gzip": gz,
+                "created": time.time(),
+                "last_used": time.time(),
+                "hits": 0,
+                "rows_per_sec": info["rows_per_sec"],
+            }
+            _evict(root, index, _budget_bytes(), keep=key)
+            _write_index(root, index)
+            return _hand_out(obj, dest)
+    finally:
+        if tmp.exists():
+            _remove_object(tmp)
+
+
+def fixture_cache_info():
+    """Keyword: resumo do cache (entradas, bytes ocupados, orçamento)."""
+    root = cache_root()
+    index = _read_index(root)
+    used = sum({e["object"]: e["bytes"] for e in index.values()}.values())
+    return {"root": str(root), "entries": len(index), "bytes": used, "budget_bytes": _budget_bytes()}
+
+
+def clear_fixture_cache():
+    root = cache_root()
+    with _DirLock(root / ".lock"):
+        for obj in (root / "objects").glob("*"):
+            _remove_object(obj)
+        _write_index(root, {})
@@ -1,127 +1,89 @@
 from __future__ import annotations
 
+import argparse
+import socket
+import struct
 import time
-from typing import Any, Dict, List
+from pathlib import Path
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, request
 
-app = Flask(__name__)
-
-# --- In-memory "database" ---
-_products: List[Dict[str, Any]] = [
-    {"id": 1, "title": "Product", "price": 100.0, "description": "Mock item", "category": "mock", "image": "https://example.com/p.png"},
-    {"id": 2, "title": "Another", "price": 50.5, "description": "Mock item 2", "category": "mock", "image": "https://example.com/p2.png"},
-]
-_next_id = 3
-
-# --- Rate limit simulation ---
-_calls = {"GET_/products": 0}
-_RATE_LIMIT_AFTER = 10  # after 10 successful GET /products, return 429
-
-
-def _maybe_timeout():
-    # /products?slow=true -> sleeps 6s
-    if request.args.get("slow", "").lower() == "true":
-        time.sleep(6)
-
-
-def _maybe_500():
-    # /products?error=500 -> returns 500
-    if request.args.get("error") == "500":
-        return jsonify({"error": "internal"}), 500
-    return None
-
-
-@app.get("/__health")
-def health():
-    return jsonify({"ok": True})
-
-
-@app.post("/__reset")
-def reset_state():
-    global _products, _next_id, _calls
-    _products = [
-        {"id": 1, "title": "Product", "price": 100.0, "description": "Mock item", "category": "mock", "image": "https://example.com/p.png"},
-        {"id": 2, "title": "Another", "price": 50.5, "description": "Mock item 2", "category": "mock", "image": "https://example.com/p2.png"},
-    ]
-    _next_id = 3
-    _calls = {"GET_/products": 0}
-    return jsonify({"reset": True})
-
-
-@app.get("/products")
-def list_products():
-    _maybe_timeout()
-    maybe = _maybe_500()
-    if maybe:
-        return maybe
-
-    _calls["GET_/products"] += 1
-    if _calls["GET_/products"] > _RATE_LIMIT_AFTER:
-        return jsonify({"error": "Rate limit exceeded"}), 429
-
-    return jsonify(_products), 200
+from mock_api import MockApi, MockRequest
 
+app = Flask(__name__)
 
-@app.post("/products")
-def create_product():
-    maybe = _maybe_500()
-    if maybe:
-        return maybe
-
-    global _next_id
-    data = request.get_json(silent=True) or {}
-
-    # minimal validation (mock behavior)
-    if "title" not in data or "price" not in data:
-        return jsonify({"error": "Missing required fields: title, price"}), 400
-
-    created = {
-        "id": _next_id,
-        "title": data.get("title"),
-        "price": float(data.get("price")),
-        "description": data.get("description", ""),
-        "category": data.get("category", "mock"),
-        "image": data.get("image", ""),
-    }
-    _next_id += 1
-    _products.append(created)
-    return jsonify(created), 201
-
-
-@app.put("/products/<int:pid>")
-def update_product(pid: int):
-    maybe = _maybe_500()
-    if maybe:
-        return maybe
-
-    data = request.get_json(silent=True) or {}
-
-    for p in _products:
-        if p["id"] == pid:
-            # update fields if present
-            for k in ["title", "price", "description", "category", "image"]:
-                if k in data:
-                    p[k] = float(data[k]) if k == "price" else data[k]
-            return jsonify(p), 200
-
-    return jsonify({"error": "Product not found"}), 404
-
-
-@app.delete("/products/<int:pid>")
-def delete_product(pid: int):
-    maybe = _maybe_500()
-    if maybe:
-        return maybe
-
-    global _products
-    before = len(_products)
-    _products = [p for p in _products if p["id"] != pid]
-    if len(_products) == before:
-        return jsonify({"error": "Product not found"}), 404
-    return jsonify({"deleted": True, "id": pid}), 200
+# --- In-memory "database", fault injection and routes (shared with async_mock_server.py) ---
+_api = MockApi()
+_store = _api.store
+_faults = _api.faults
+
+_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE"]
+
+
+def _drop_connection() -> None:
+    # RST instead of a response (SO_LINGER 0), as a flaky network/load balancer would do
+    sock = request.environ.get("werkzeug.socket")
+    if sock is None:
+        return
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+@app.route("/", defaults={"path": ""}, methods=_METHODS)
+@app.route("/<path:path>", methods=_METHODS)
+def dispatch(path: str):
+    bulk = request.path.endswith("/bulk")
+    req = MockRequest(
+        method=request.method,
+        path=request.path,
+        args=request.args.to_dict(),
+        headers={k.lower(): v for k, v in request.headers.items()},
+        body=b"" if bulk else request.get_data(),
+        client=request.remote_addr or "",
+        stream=request.stream if bulk else None,  # NDJSON read line by line
+    )
+    pending = _api.dispatch(req)
+    if pending.decision.delay:
+        time.sleep(pending.decision.delay)
+    if pending.decision.reset:
+        _drop_connection()
+        return Response(b"", status=502)
+    resp = pending.respond()
+    return Response(resp.body, status=resp.status, content_type=resp.content_type, headers=resp.headers)
+
+
+def main() -> None:
+    global _api
+    parser = argparse.ArgumentParser(description="Mock products API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5050)  # fixed port for tests
+    parser.add_argument("--mode", choices=["threaded", "async"], default="threaded",
+                        help="threaded: Flask dev server; async: asyncio server (non-blocking latency)")
+    parser.add_argument("--replay", metavar="DIR",
+                        help="record-and-replay proxy for --upstream APIs instead of the products mock")
+    parser.add_argument("--upstream", action="append", default=[], metavar="NAME=URL",
+                        help="proxied API, served under /NAME/ (repeatable)")
+    parser.add_argument("--record", choices=["none", "new", "all"], default="none",
+                        help="none: replay only; new: record missing requests; all: re-record everything")
+    args = parser.parse_args()
+    if args.replay:
+        from replay_proxy import ReplayProxy, parse_upstreams
+
+        try:
+            upstreams = parse_upstreams(args.upstream)
+        except ValueError as e:
+            parser.error(str(e))
+        _api = ReplayProxy(Path(args.replay), upstreams, record=args.record)
+    if args.mode == "async":
+        from async_mock_server import serve
+
+        serve(_api, args.host, args.port)
+    else:
+        app.run(host=args.host, port=args.port, threaded=True)
 
 
 if __name__ == "__main__":
-    # fixed port for tests
-    app.run(host="127.0.0.1", port=5050)
\ No newline at end of file
+    main()
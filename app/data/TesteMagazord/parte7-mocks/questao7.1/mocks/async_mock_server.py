@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import socket
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from mock_api import MockApi, MockRequest, MockResponse, reply
+
+# asyncio serving mode of the mock (python api_mock_server.py --mode async).
+# Same routes/state as the Flask server (mock_api.MockApi); injected latency is an asyncio.sleep,
+# so thousands of slow requests wait concurrently on a single thread instead of one thread each.
+# Minimal HTTP/1.1: keep-alive, Content-Length or chunked request bodies, Expect: 100-continue.
+# Handlers never run on the event loop: they take ProductStore's lock, and a seed/bulk call holding it
+# would otherwise stall every connection. Short handlers use the loop's executor; long ones (seed,
+# bulk, snapshot, upstream calls) get their own small pool so they cannot occupy all handler threads.
+
+_MAX_HEAD = 64 * 1024
+_MAX_BODY = 64 * 1024 * 1024
+_HANDLER_THREADS = 32
+_BLOCKING_THREADS = 4
+
+_log = logging.getLogger("mock.async")
+
+
+class _BadRequest(Exception):
+    pass
+
+
+def _parse_head(head: bytes) -> Tuple[str, str, str, Dict[str, str]]:
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = lines[0].split(" ", 2)
+    except ValueError:
+        raise _BadRequest("malformed request line")
+    headers: Dict[str, str] = {}
+    for line in lines[1:]:
+        if ":" in line:
+            k, v = line.split(":", 1)
+            headers[k.strip().lower()] = v.strip()
+    return method.upper(), target, version, headers
+
+
+def _first_args(query: str) -> Dict[str, str]:
+    # first value wins, like Flask's request.args.get()
+    args: Dict[str, str] = {}
+    for k, v in parse_qsl(query, keep_blank_values=True):
+        args.setdefault(k, v)
+    return args
+
+
+async def _read_body(reader: asyncio.StreamReader, headers: Dict[str, str]) -> bytes:
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        chunks = []
+        total = 0
+        while True:
+            size_line = await reader.readuntil(b"\r\n")
+            try:
+                size = int(size_line.split(b";", 1)[0].strip(), 16)
+            except ValueError:
+                raise _BadRequest("malformed chunk size")
+            if size == 0:
+                # trailers (usually none) end with an empty line
+                while (await reader.readuntil(b"\r\n")) != b"\r\n":
+                    pass
+                return b"".join(chunks)
+            total += size
+            if total > _MAX_BODY:
+                raise _BadRequest("body too large")
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise _BadRequest("invalid Content-Length")
+    if length < 0 or length > _MAX_BODY:
+        raise _BadRequest("invalid Content-Length")
+    return await reader.readexactly(length) if length else b""
+
+
+def _encode(resp: MockResponse, keep_alive: bool) -> bytes:
+    try:
+        phrase = HTTPStatus(resp.status).phrase
+    except ValueError:
+        phrase = ""
+    lines = [f"HTTP/1.1 {resp.status} {phrase}", f"Content-Type: {resp.content_type}",
+             f"Content-Length: {len(resp.body)}", f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    lines += [f"{k}: {v}" for k, v in resp.headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + resp.body
+
+
+def _abort(writer: asyncio.StreamWriter) -> None:
+    # RST instead of a response (SO_LINGER 0), as a flaky network/load balancer would do
+    sock = writer.get_extra_info("socket")
+    if sock is not None:
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+        except OSError:
+            pass
+    writer.transport.abort()
+
+
+async def _handle(api: MockApi, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                  blocking_pool: ThreadPoolExecutor) -> None:
+    peer = writer.get_extra_info("peername")
+    client = peer[0] if isinstance(peer, tuple) else ""
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                return
+            resp: Optional[MockResponse] = None
+            keep_alive = False
+            try:
+                method, target, version, headers = _parse_head(head)
+                conn = headers.get("connection", "").lower()
+                keep_alive = conn != "close" if version == "HTTP/1.1" else conn == "keep-alive"
+                if headers.get("expect", "").lower() == "100-continue":
+                    writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+                body = await _read_body(reader, headers)
+            except _BadRequest as e:
+                resp, keep_alive = reply({"error": str(e)}, 400), False
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                return
+
+            if resp is None:
+                url = urlsplit(target)
+                req = MockRequest(method=method, path=url.path or "/", args=_first_args(url.query),
+                                  headers=headers, body=body, client=client)
+                pending = api.dispatch(req)
+                if pending.decision.delay:
+                    await asyncio.sleep(pending.decision.delay)
+                if pending.decision.reset:
+                    _abort(writer)
+                    return
+                try:
+                    resp = await loop.run_in_executor(blocking_pool if pending.blocking else None, pending.respond)
+                except Exception as e:
+                    resp = reply({"error": f"internal: {e}"}, 500)
+
+            writer.write(_encode(resp, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                return
+    except ConnectionError:
+        pass
+    finally:
+        if not writer.transport.is_closing():
+            writer.close()
+
+
+def _raise_fd_limit() -> None:
+    # thousands of concurrent connections need more than the usual 1024 descriptors
+    try:
+        import resource
+    except ImportError:  # Windows: select/proactor limits apply instead
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = hard if hard != resource.RLIM_INFINITY else 65536
+    if soft < target:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+        except (ValueError, OSError):
+            pass
+
+
+async def _serve(api: MockApi, host: str, port: int) -> None:
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(_HANDLER_THREADS, thread_name_prefix="mock-handler"))
+    blocking_pool = ThreadPoolExecutor(_BLOCKING_THREADS, thread_name_prefix="mock-blocking")
+    try:
+        server = await asyncio.start_server(
+            lambda r, w: _handle(api, r, w, blocking_pool), host, port, backlog=4096, limit=_MAX_HEAD,
+            reuse_address=True,
+        )
+        _log.info("serving on http://%s:%s (async mode)", host, port)
+        async with server:
+            await server.serve_forever()
+    finally:
+        blocking_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def serve(api: MockApi, host: str = "127.0.0.1", port: int = 5050) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    _raise_fd_limit()
+    try:
+        asyncio.run(_serve(api, host, port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    serve(MockApi())
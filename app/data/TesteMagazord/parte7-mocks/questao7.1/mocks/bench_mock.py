@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Load generator / benchmark for the mock API (localhost only, stdlib only).
+#
+#   python bench_mock.py --spawn async --concurrency 200 --duration 15
+#   python bench_mock.py --url http://127.0.0.1:5050 --save-baseline baseline.json
+#   python bench_mock.py --spawn threaded --baseline baseline.json --tolerance 0.2   # exit 1 on regression
+#
+# Throughput/latency depend on the machine, so no baseline is committed: the first run with --baseline
+# on a missing file records it there (only the error rate is checked); later runs compare against it.
+# The rate limit of the mock is disabled during the run (PUT /__faults) and restored at the end.
+
+DEFAULT_MIX = "list=70,create=10,update=10,delete=10"
+OPS = ("list", "create", "update", "delete")
+
+
+def parse_mix(text: str) -> List[Tuple[str, int]]:
+    mix: List[Tuple[str, int]] = []
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPS:
+            raise ValueError(f"unknown operation in mix: {name}")
+        mix.append((name, int(weight or 1)))
+    if not any(w > 0 for _, w in mix):
+        raise ValueError("mix needs at least one operation with weight > 0")
+    return mix
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list (q in 0..100)."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(q / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+class _Conn:
+    """One keep-alive HTTP/1.1 connection (reconnects when the server closes it, e.g. Flask/HTTP 1.0)."""
+
+    def __init__(self, host: str, port: int) -> None:
+        self.host, self.port = host, port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, body: Optional[bytes] = None) -> Tuple[int, bytes]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+        if body is not None:
+            head += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+        self.writer.write(head.encode("latin-1") + b"\r\n" + (body or b""))
+        await self.writer.drain()
+
+        assert self.reader is not None
+        raw = await self.reader.readuntil(b"\r\n\r\n")
+        lines = raw.decode("latin-1").split("\r\n")
+        version, status = lines[0].split(" ", 2)[:2]
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                k, v = line.split(":", 1)
+                headers[k.strip().lower()] = v.strip()
+        if "content-length" in headers:
+            data = await self.reader.readexactly(int(headers["content-length"]))
+        else:
+            data = await self.reader.read()
+            headers["connection"] = "close"
+        if version == "HTTP/1.0" or headers.get("connection", "").lower() == "close":
+            await self.close()
+        return int(status), data
+
+    async def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+        self.reader = self.writer = None
+
+
+class _Worker:
+    def __init__(self, host: str, port: int, rnd: random.Random, seeded: int, mix: List[Tuple[str, int]]) -> None:
+        self.conn = _Conn(host, port)
+        self.rnd = rnd
+        self.seeded = seeded
+        self.names = [n for n, _ in mix]
+        self.weights = [w for _, w in mix]
+        self.created: List[int] = []
+
+    def _next(self) -> Tuple[str, str, str, Optional[bytes]]:
+        op = self.rnd.choices(self.names, self.weights)[0]
+        if op == "delete" and not self.created:
+            # delete only what this worker created, so the catalog (and list pages) stay stable;
+            # with nothing to delete yet, create one instead (also for mixes without "create")
+            op = "create"
+        if op == "list":
+            offset = self.rnd.randrange(max(1, self.seeded))
+            return op, "GET", f"/products?limit=20&offset={offset}", None
+        if op == "create":
+            body = {"title": f"bench-{self.rnd.randrange(10**9)}", "price": round(self.rnd.uniform(1, 500), 2)}
+            return op, "POST", "/products", json.dumps(body).encode()
+        if op == "update":
+            pid = self.rnd.choice(self.created) if self.created else self.rnd.randint(1, max(1, self.seeded))
+            return op, "PUT", f"/products/{pid}", json.dumps({"price": round(self.rnd.uniform(1, 500), 2)}).encode()
+        return op, "DELETE", f"/products/{self.created.pop()}", None
+
+    async def run(self, stop_at: float, record_from: float, samples: Dict[str, List[float]],
+                  errors: Dict[str, int]) -> None:
+        while True:
+            t0 = time.perf_counter()
+            if t0 >= stop_at:
+                break
+            op, method, path, body = self._next()
+            try:
+                status, data = await self.conn.request(method, path, body)
+                ok = 200 <= status < 300
+            except (ConnectionError, OSError, asyncio.IncompleteReadError, ValueError):
+                await self.conn.close()
+                ok, status, data = False, 0, b""
+            elapsed = time.perf_counter() - t0
+            if ok and op == "create":
+                try:
+                    self.created.append(int(json.loads(data)["id"]))
+                except (ValueError, KeyError, TypeError):
+                    pass
+            if t0 < record_from:
+                continue  # warm-up
+            if ok:
+                samples[op].append(elapsed)
+            else:
+                errors[op] = errors.get(op, 0) + 1
+        await self.conn.close()
+
+
+def _admin(base: str, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Any:
+    data = json.dumps(payload).encode() if payload is not None else None
+    req = urllib.request.Request(base + path, data=data, method=method,
+                                 headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=60) as r:
+        return json.loads(r.read() or b"null")
+
+
+async def _drive(host: str, port: int, concurrency: int, duration: float, warmup: float, seeded: int,
+                 mix: List[Tuple[str, int]], seed: int) -> Tuple[Dict[str, List[float]], Dict[str, int], float]:
+    samples: Dict[str, List[float]] = {op: [] for op in OPS}
+    errors: Dict[str, int] = {}
+    start = time.perf_counter()
+    record_from = start + warmup
+    stop_at = record_from + duration
+    workers = [_Worker(host, port, random.Random(seed * 100003 + i), seeded, mix) for i in range(concurrency)]
+    await asyncio.gather(*(w.run(stop_at, record_from, samples, errors) for w in workers))
+    return samples, errors, max(1e-9, time.perf_counter() - record_from)
+
+
+def summarize(samples: Dict[str, List[float]], errors: Dict[str, int], wall: float) -> Dict[str, Any]:
+    def stats(values: List[float]) -> Dict[str, float]:
+        v = sorted(values)
+        return {
+            "count": len(v),
+            "p50_ms": round(percentile(v, 50) * 1000, 2),
+            "p95_ms": round(percentile(v, 95) * 1000, 2),
+            "p99_ms": round(percentile(v, 99) * 1000, 2),
+            "max_ms": round((v[-1] if v else 0.0) * 1000, 2),
+        }
+
+    all_values = [x for values in samples.values() for x in values]
+    total_errors = sum(errors.values())
+    done = len(all_values) + total_errors
+    out = {
+        "duration_sec": round(wall, 2),
+        "requests": done,
+        "errors": total_errors,
+        "error_rate": round(total_errors / done, 4) if done else 0.0,
+        "throughput_rps": round(len(all_values) / wall, 1),
+        "latency": stats(all_values),
+        "ops": {op: dict(stats(values), errors=errors.get(op, 0)) for op, values in samples.items() if values or errors.get(op)},
+    }
+    return out
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float, max_error_rate: float) -> List[str]:
+    """Regressions of `result` against `baseline` (empty list = ok)."""
+    problems: List[str] = []
+    base_rps = float(baseline.get("throughput_rps") or 0)
+    if base_rps and result["throughput_rps"] < base_rps * (1 - tolerance):
+        problems.append(f"throughput {result['throughput_rps']} rps < baseline {base_rps} rps (-{tolerance:.0%})")
+    for key in ("p50_ms", "p95_ms", "p99_ms"):
+        base = float((baseline.get("latency") or {}).get(key) or 0)
+        cur = result["latency"][key]
+        if base and cur > base * (1 + tolerance):
+            problems.append(f"{key} {cur} > baseline {base} (+{tolerance:.0%})")
+    if result["error_rate"] > max_error_rate:
+        problems.append(f"error rate {result['error_rate']:.2%} > {max_error_rate:.2%}")
+    return problems
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _spawn(mode: str) -> Tuple[subprocess.Popen, str]:
+    port = _free_port()
+    script = Path(__file__).resolve().parent / "api_mock_server.py"
+    proc = subprocess.Popen([sys.executable, str(script), "--mode", mode, "--port", str(port)],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            _admin(base, "GET", "/__health")
+            return proc, base
+        except OSError:
+            if proc.poll() is not None:
+                break
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"mock server ({mode}) did not start")
+
+
+def _print_report(result: Dict[str, Any]) -> None:
+    lat = result["latency"]
+    print(f"requests={result['requests']} errors={result['errors']} ({result['error_rate']:.2%}) "
+          f"throughput={result['throughput_rps']} rps")
+    print(f"latency p50={lat['p50_ms']}ms p95={lat['p95_ms']}ms p99={lat['p99_ms']}ms max={lat['max_ms']}ms")
+    for op, s in result["ops"].items():
+        print(f"  {op:<7} n={s['count']:<7} err={s['errors']:<5} p50={s['p50_ms']}ms p95={s['p95_ms']}ms p99={s['p99_ms']}ms")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the mock products API")
+    parser.add_argument("--url", default="http://127.0.0.1:5050", help="running mock (ignored with --spawn)")
+    parser.add_argument("--spawn", choices=["threaded", "async"], help="start a private mock on a free port")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds excluded from the results")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"operation weights (default {DEFAULT_MIX})")
+    parser.add_argument("--products", type=int, default=1000, help="catalog size seeded before the run")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="write the result JSON here")
+    parser.add_argument("--baseline", help="compare with this result JSON (recorded on the first run if missing); "
+                                           "exit 1 on regression")
+    parser.add_argument("--save-baseline", help="write the result as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression (0.2 = 20%%)")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    proc = None
+    base = args.url.rstrip("/")
+    if args.spawn:
+        proc, base = _spawn(args.spawn)
+    url = urlsplit(base)
+    try:
+        _admin(base, "POST", "/__seed", {"count": args.products, "seed": args.seed})
+        _admin(base, "PUT", "/__faults", {"rate_limits": {}})
+        samples, errors, wall = asyncio.run(_drive(
+            url.hostname or "127.0.0.1", url.port or 80, args.concurrency, args.duration, args.warmup,
+            args.products, mix, args.seed,
+        ))
+    finally:
+        try:
+            _admin(base, "POST", "/__reset")
+        except OSError:
+            pass
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    result = summarize(samples, errors, wall)
+    result["config"] = {
+        "server": args.spawn or base, "concurrency": args.concurrency, "duration": args.duration,
+        "mix": args.mix, "products": args.products, "seed": args.seed,
+    }
+    _print_report(result)
+    for path in filter(None, [args.out, args.save_baseline]):
+        Path(path).write_text(json.dumps(result, indent=2), encoding="utf-8")
+
+    if args.baseline and os.path.exists(args.baseline):
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        problems = compare(result, baseline, args.tolerance, args.max_error_rate)
+        if problems:
+            print("REGRESSION:")
+            for p in problems:
+                print(f"  - {p}")
+            return 1
+        print("OK: within baseline tolerance")
+        return 0
+    if result["error_rate"] > args.max_error_rate:
+        print(f"FAIL: error rate {result['error_rate']:.2%} > {args.max_error_rate:.2%}")
+        return 1
+    if args.baseline:
+        Path(args.baseline).write_text(json.dumps(result, indent=2), encoding="utf-8")
+        print(f"baseline not found: recorded this run as {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import bisect
+import copy
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+# Legacy behavior of the mock, expressed as engine config:
+# - ?slow=true sleeps 6s, ?error=500 returns 500 (query overrides)
+# - GET /products returns 429 after 10 calls: one global bucket, capacity 10, no refill
+DEFAULT_CONFIG: Dict[str, Any] = {
+    "seed": None,
+    "query_overrides": True,
+    "slow_seconds": 6.0,
+    "latency": {},
+    "errors": {},
+    "resets": {},
+    "rate_limits": {
+        "GET /products": {"capacity": 10, "refill_per_sec": 0.0, "key": "global"},
+    },
+}
+
+LATENCY_TYPES = ("fixed", "uniform", "percentiles")
+RATE_LIMIT_KEYS = ("global", "client", "api_key")
+
+
+@dataclass
+class Decision:
+    """What the server should do with a request; the engine never sleeps or writes itself."""
+
+    delay: float = 0.0
+    status: Optional[int] = None
+    body: Optional[Dict[str, Any]] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+    reset: bool = False
+
+    @property
+    def short_circuit(self) -> bool:
+        return self.reset or self.status is not None
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, refill_per_sec: float, now: float) -> None:
+        self.capacity = float(capacity)
+        self.refill = float(refill_per_sec)
+        self.tokens = float(capacity)
+        self.stamp = now
+
+    def take(self, now: float) -> Tuple[bool, float]:
+        """(allowed, seconds until the next token; inf when the bucket never refills)."""
+        if self.refill > 0:
+            self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.refill)
+        self.stamp = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True, 0.0
+        if self.refill <= 0:
+            return False, math.inf
+        return False, (1.0 - self.tokens) / self.refill
+
+
+def _route_candidates(route: str) -> List[str]:
+    method, _, path = route.partition(" ")
+    return [route, f"{method} *", f"* {path}", "*"]
+
+
+def _match(table: Mapping[str, Any], route: str) -> Optional[Any]:
+    for key in _route_candidates(route):
+        if key in table:
+            return table[key]
+    return None
+
+
+def _check_rate(name: str, value: Any) -> float:
+    try:
+        rate = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name}: rate must be a number")
+    if not 0.0 <= rate <= 1.0:
+        raise ValueError(f"{name}: rate must be between 0 and 1")
+    return rate
+
+
+def _compile_latency(name: str, spec: Mapping[str, Any]) -> Callable[[random.Random], float]:
+    kind = spec.get("type", "fixed")
+    try:
+        if kind == "fixed":
+            ms = float(spec.get("ms", 0))
+            return lambda rnd: ms / 1000.0
+        if kind == "uniform":
+            lo, hi = float(spec.get("min_ms", 0)), float(spec.get("max_ms", 0))
+            if hi < lo:
+                raise ValueError(f"{name}: max_ms < min_ms")
+            return lambda rnd: rnd.uniform(lo, hi) / 1000.0
+        if kind == "percentiles":
+            # piecewise-linear inverse CDF through the given percentiles (long tails: p99 >> p50)
+            points = [(0.0, float(spec.get("min_ms", 0)))]
+            for key in sorted((k for k in spec if k.startswith("p") and k[1:].replace(".", "", 1).isdigit()),
+                              key=lambda k: float(k[1:])):
+                points.append((float(key[1:]) / 100.0, float(spec[key])))
+            top = float(spec.get("max_ms", points[-1][1]))
+            points.append((1.0, top))
+            qs = [q for q, _ in points]
+            vs = [v for _, v in points]
+            if any(b < a for a, b in zip(vs, vs[1:])) or any(b <= a for a, b in zip(qs, qs[1:])):
+                raise ValueError(f"{name}: percentiles must be increasing")
+
+            def sample(rnd: random.Random) -> float:
+                u = rnd.random()
+                i = max(1, bisect.bisect_right(qs, u))
+                q0, q1, v0, v1 = qs[i - 1], qs[i], vs[i - 1], vs[i]
+                return (v0 + (v1 - v0) * (u - q0) / (q1 - q0)) / 1000.0
+
+            return sample
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"{name}: {e}") from None
+    raise ValueError(f"{name}: latency type must be one of {', '.join(LATENCY_TYPES)}")
+
+
+class FaultEngine:
+    """Runtime-configurable latency, error, rate-limit and connection-reset injection.
+
+    Rules are keyed by route ("GET /products", "PUT /products/<int:pid>", "POST *", "* /products", "*");
+    the most specific key wins. `decide()` only returns a `Decision`, so the threaded Flask server
+    and the asyncio server apply the same faults (time.sleep vs asyncio.sleep).
+    """
+
+    def __init__(self, config: Optional[Mapping[str, Any]] = None, clock: Callable[[], float] = time.monotonic) -> None:
+        self._lock = threading.Lock()
+        self._clock = clock
+        self.configure(config or DEFAULT_CONFIG)
+
+    # --- config ---
+    def configure(self, config: Mapping[str, Any], merge: bool = False) -> Dict[str, Any]:
+        """Validate and apply a config (full replace, or `merge` over the current one); buckets and stats restart.
+
+        Raises ValueError on an invalid config (the current one stays active).
+        """
+        with self._lock:
+            base = copy.deepcopy(self._config if merge else DEFAULT_CONFIG)
+        for key, value in config.items():
+            if key not in DEFAULT_CONFIG:
+                raise ValueError(f"unknown config key: {key}")
+            if merge and isinstance(value, dict) and isinstance(base.get(key), dict):
+                base[key].update(value)
+            else:
+                base[key] = copy.deepcopy(value)
+
+        latency = {k: _compile_latency(f"latency[{k}]", v) for k, v in (base["latency"] or {}).items()}
+        errors = {}
+        for k, v in (base["errors"] or {}).items():
+            if not isinstance(v, dict):
+                v = {"rate": v}
+            status = int(v.get("status", 500))
+            if not 400 <= status <= 599:
+                raise ValueError(f"errors[{k}]: status must be 4xx/5xx")
+            errors[k] = (_check_rate(f"errors[{k}]", v.get("rate", 0)), status, v.get("body"))
+        resets = {k: _check_rate(f"resets[{k}]", v.get("rate", 0) if isinstance(v, dict) else v)
+                  for k, v in (base["resets"] or {}).items()}
+        limits = {}
+        for k, v in (base["rate_limits"] or {}).items():
+            scope = v.get("key", "global")
+            if scope not in RATE_LIMIT_KEYS:
+                raise ValueError(f"rate_limits[{k}]: key must be one of {', '.join(RATE_LIMIT_KEYS)}")
+            capacity, refill = float(v.get("capacity", 10)), float(v.get("refill_per_sec", 0))
+            if capacity < 0 or refill < 0:
+                raise ValueError(f"rate_limits[{k}]: capacity/refill_per_sec must be >= 0")
+            limits[k] = (capacity, refill, scope)
+
+        with self._lock:
+            self._config = base
+            self._latency = latency
+            self._errors = errors
+            self._resets = resets
+            self._limits = limits
+            self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+            self._rnd = random.Random(base.get("seed"))
+            self._stats: Dict[str, Dict[str, int]] = {}
+            return copy.deepcopy(base)
+
+    def reset(self) -> None:
+        """Back to the legacy defaults, with full buckets and zeroed stats."""
+        self.configure(DEFAULT_CONFIG)
+
+    def config(self) -> Dict[str, Any]:
+        with self._lock:
+            return copy.deepcopy(self._config)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return copy.deepcopy(self._stats)
+
+    # --- decisions ---
+    def _count(self, route: str, what: str) -> None:
+        s = self._stats.setdefault(route, {})
+        s[what] = s.get(what, 0) + 1
+
+    def _bucket_id(self, rule: str, scope: str, client: str, api_key: Optional[str]) -> Tuple[str, str]:
+        if scope == "client":
+            return rule, client
+        if scope == "api_key":
+            return rule, api_key or f"client:{client}"
+        return rule, ""
+
+    def decide(
+        self,
+        route: str,
+        args: Mapping[str, str],
+        client: str = "",
+        api_key: Optional[str] = None,
+    ) -> Decision:
+        d = Decision()
+        with self._lock:
+            cfg = self._config
+            self._count(route, "requests")
+            overrides = cfg.get("query_overrides", True)
+
+            if overrides and str(args.get("slow", "")).lower() == "true":
+                d.delay = float(cfg.get("slow_seconds", 6.0))
+            else:
+                sampler = _match(self._latency, route)
+                if sampler is not None:
+                    d.delay = max(0.0, sampler(self._rnd))
+
+            reset_rate = _match(self._resets, route)
+            if (overrides and str(args.get("reset", "")).lower() == "true") or (
+                    reset_rate and self._rnd.random() < reset_rate):
+                d.reset = True
+                self._count(route, "resets")
+                return d
+
+            forced = args.get("error") if overrides else None
+            if forced and forced.isdigit() and 400 <= int(forced) <= 599:
+                d.status = int(forced)
+                d.body = {"error": "internal" if d.status == 500 else "injected"}
+                self._count(route, "errors")
+                return d
+            err = _match(self._errors, route)
+            if err and self._rnd.random() < err[0]:
+                d.status = err[1]
+                d.body = err[2] or {"error": "internal" if err[1] == 500 else "injected"}
+                self._count(route, "errors")
+                return d
+
+            for rule in _route_candidates(route):
+                limit = self._limits.get(rule)
+                if limit is None:
+                    continue
+                capacity, refill, scope = limit
+                bid = self._bucket_id(rule, scope, client, api_key)
+                now = self._clock()
+                bucket = self._buckets.get(bid)
+                if bucket is None:
+                    bucket = self._buckets[bid] = TokenBucket(capacity, refill, now)
+                allowed, wait = bucket.take(now)
+                d.headers["X-RateLimit-Limit"] = str(int(capacity))
+                d.headers["X-RateLimit-Remaining"] = str(int(bucket.tokens))
+                if not allowed:
+                    d.status = 429
+                    d.body = {"error": "Rate limit exceeded"}
+                    if math.isfinite(wait):
+                        d.headers["Retry-After"] = str(max(1, math.ceil(wait)))
+                    self._count(route, "rate_limited")
+                break
+        return d
@@ -0,0 +1,433 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from fault_engine import Decision, FaultEngine
+from product_store import ProductStore
+
+# Routes and state of the mock API, independent of the HTTP server: the threaded Flask server
+# (api_mock_server.py) and the asyncio server (async_mock_server.py) both dispatch here.
+
+SEED_PRODUCTS: List[Dict[str, Any]] = [
+    {"id": 1, "title": "Product", "price": 100.0, "description": "Mock item", "category": "mock", "image": "https://example.com/p.png"},
+    {"id": 2, "title": "Another", "price": 50.5, "description": "Mock item 2", "category": "mock", "image": "https://example.com/p2.png"},
+]
+
+SNAPSHOT_DIR = Path(__file__).resolve().parent / "snapshots"
+_SNAPSHOT_NAME_RE = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+_PAGE_CACHE_MAX = 256
+
+
+def dumps(obj: Any) -> bytes:
+    return json.dumps(obj, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+@dataclass
+class MockRequest:
+    method: str
+    path: str
+    args: Dict[str, str] = field(default_factory=dict)
+    headers: Dict[str, str] = field(default_factory=dict)  # lower-case names
+    body: bytes = b""
+    client: str = ""
+    stream: Optional[Iterable[bytes]] = None  # body as lines, when the server can stream it
+
+    def json(self) -> Any:
+        """Parsed JSON body or None (lenient, like Flask's get_json(silent=True))."""
+        if not self.body:
+            return None
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            return None
+
+    def lines(self) -> Iterator[bytes]:
+        return iter(self.stream) if self.stream is not None else iter(self.body.splitlines())
+
+
+@dataclass
+class MockResponse:
+    status: int
+    body: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+    content_type: str = "application/json"
+
+
+def reply(obj: Any, status: int = 200, headers: Optional[Dict[str, str]] = None) -> MockResponse:
+    return MockResponse(status, dumps(obj) + b"\n", dict(headers or {}))
+
+
+@dataclass
+class Pending:
+    """Result of routing + fault decision; the server applies the delay/reset, then calls respond()."""
+
+    decision: Decision
+    respond: Callable[[], MockResponse]
+    blocking: bool = False  # long handler (seed, bulk, snapshot, upstream): async server uses a separate pool
+
+
+@dataclass
+class _Route:
+    rule: str
+    pattern: "re.Pattern[str]"
+    handlers: Dict[str, Tuple[Callable[..., MockResponse], bool]] = field(default_factory=dict)
+
+
+def _compile_rule(rule: str) -> "re.Pattern[str]":
+    regex = re.sub(r"<int:(\w+)>", r"(?P<\1>\\d+)", rule)
+    return re.compile(f"^{regex}$")
+
+
+def _opt_float(args: Dict[str, str], name: str) -> Optional[float]:
+    raw = args.get(name)
+    if raw is None or raw == "":
+        return None
+    try:
+        return float(raw)
+    except ValueError:
+        raise ValueError(f"{name} must be a number")
+
+
+def _opt_int(args: Dict[str, str], name: str, minimum: int = 0) -> Optional[int]:
+    raw = args.get(name)
+    if raw is None or raw == "":
+        return None
+    try:
+        v = int(raw)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer")
+    if v < minimum:
+        raise ValueError(f"{name} must be >= {minimum}")
+    return v
+
+
+def _check_price(v: Dict[str, Any]) -> Optional[str]:
+    if "price" in v:
+        try:
+            float(v["price"])
+        except (TypeError, ValueError):
+            return "price must be a number"
+    return None
+
+
+def _check_create(v: Any) -> Optional[str]:
+    if not isinstance(v, dict) or "title" not in v or "price" not in v:
+        return "Missing required fields: title, price"
+    return _check_price(v)
+
+
+def _check_fields(v: Any) -> Optional[str]:
+    """Body of a single PUT /products/<id> (partial update)."""
+    if not isinstance(v, dict):
+        return "body must be a JSON object"
+    return _check_price(v)
+
+
+def _check_update(v: Any) -> Optional[str]:
+    if not isinstance(v, dict) or not isinstance(v.get("id"), int):
+        return "each line must be an object with an integer id"
+    return _check_price(v)
+
+
+def _check_delete(v: Any) -> Optional[str]:
+    if isinstance(v, int) or (isinstance(v, dict) and isinstance(v.get("id"), int)):
+        return None
+    return "each line must be an id or an object with an integer id"
+
+
+class MockApi:
+    """State (store, faults, page cache) + route table of the mock."""
+
+    def __init__(self, seed_products: Optional[List[Dict[str, Any]]] = None, snapshot_dir: Path = SNAPSHOT_DIR) -> None:
+        self.seed_products = list(seed_products if seed_products is not None else SEED_PRODUCTS)
+        self.snapshot_dir = snapshot_dir
+        self.store = ProductStore(self.seed_products)
+        # defaults reproduce the legacy mock: slow=true sleeps 6s, error=500 returns 500,
+        # 429 after 10 GET /products
+        self.faults = FaultEngine()
+        # serialized page cache (GET /products), invalidated on every write via store.version
+        self._page_cache: "OrderedDict[Tuple[Any, ...], Tuple[bytes, Dict[str, str]]]" = OrderedDict()
+        self._page_cache_version = -1
+        self._page_cache_lock = threading.Lock()
+        self._routes: List[_Route] = []
+
+        self._add("GET", "/__health", self.health)
+        self._add("POST", "/__reset", self.reset_state)
+        self._add("POST", "/__seed", self.seed_state, blocking=True)
+        self._add("POST", "/__snapshot", self.snapshot_state, blocking=True)
+        self._add("POST", "/__restore", self.restore_state, blocking=True)
+        self._add("GET", "/__faults", self.get_faults)
+        self._add("PUT", "/__faults", self.set_faults)
+        self._add("PATCH", "/__faults", self.set_faults)
+        self._add("DELETE", "/__faults", self.clear_faults)
+        self._add("GET", "/products", self.list_products)
+        self._add("POST", "/products", self.create_product)
+        self._add("POST", "/products/bulk", self.bulk_create_products, blocking=True)
+        self._add("PUT", "/products/bulk", self.bulk_update_products, blocking=True)
+        self._add("DELETE", "/products/bulk", self.bulk_delete_products, blocking=True)
+        self._add("PUT", "/products/<int:pid>", self.update_product)
+        self._add("DELETE", "/products/<int:pid>", self.delete_product)
+
+    def _add(self, method: str, rule: str, handler: Callable[..., MockResponse], blocking: bool = False) -> None:
+        for r in self._routes:
+            if r.rule == rule:
+                r.handlers[method] = (handler, blocking)
+                return
+        self._routes.append(_Route(rule, _compile_rule(rule), {method: (handler, blocking)}))
+
+    # --- dispatch ---
+    def dispatch(self, req: MockRequest) -> Pending:
+        for r in self._routes:
+            m = r.pattern.match(req.path)
+            if m is None:
+                continue
+            entry = r.handlers.get(req.method)
+            if entry is None:
+                return Pending(Decision(), lambda: reply({"error": "Method not allowed"}, 405))
+            handler, blocking = entry
+            params = {k: int(v) for k, v in m.groupdict().items()}
+            if r.rule.startswith("/__"):
+                decision = Decision()
+            else:
+                api_key = req.headers.get("x-api-key") or req.args.get("api_key")
+                decision = self.faults.decide(f"{req.method} {r.rule}", req.args, client=req.client, api_key=api_key)
+            return Pending(decision, lambda: self._respond(decision, handler, req, params), blocking)
+        return Pending(Decision(), lambda: reply({"error": "Not found"}, 404))
+
+    @staticmethod
+    def _respond(decision: Decision, handler: Callable[..., MockResponse], req: MockRequest,
+                 params: Dict[str, int]) -> MockResponse:
+        if decision.status is not None:
+            resp = reply(decision.body, decision.status)
+        else:
+            resp = handler(req, **params)
+        for k, v in decision.headers.items():
+            resp.headers.setdefault(k, v)
+        return resp
+
+    # --- admin ---
+    @staticmethod
+    def _admin_params(req: MockRequest) -> Dict[str, Any]:
+        """Admin endpoints accept a JSON body or query string parameters."""
+        params: Dict[str, Any] = dict(req.args)
+        body = req.json()
+        if isinstance(body, dict):
+            params.update(body)
+        return params
+
+    def health(self, req: MockRequest) -> MockResponse:
+        return reply({"ok": True})
+
+    def reset_state(self, req: MockRequest) -> MockResponse:
+        self.store.reset(self.seed_products)
+        self.faults.reset()
+        return reply({"reset": True})
+
+    def seed_state(self, req: MockRequest) -> MockResponse:
+        # deterministic bulk catalog: same count + seed -> same products
+        params = self._admin_params(req)
+        try:
+            count = int(params.get("count", 100))
+            seed = int(params.get("seed", 0))
+        except (TypeError, ValueError):
+            return reply({"error": "count and seed must be integers"}, 400)
+        if count < 0 or count > 1_000_000:
+            return reply({"error": "count must be between 0 and 1000000"}, 400)
+        append = str(params.get("append", "")).lower() in ("1", "true", "yes")
+        cats = params.get("categories")
+        if isinstance(cats, str):
+            cats = [c.strip() for c in cats.split(",") if c.strip()]
+
+        t0 = time.perf_counter()
+        if cats:
+            self.store.seed(count, seed, append=append, categories=cats)
+        else:
+            self.store.seed(count, seed, append=append)
+        elapsed_ms = round((time.perf_counter() - t0) * 1000, 1)
+        return reply({"seeded": count, "seed": seed, "total": len(self.store), "elapsed_ms": elapsed_ms})
+
+    def _snapshot_path(self, params: Dict[str, Any]) -> Path:
+        name = str(params.get("name") or "default")
+        if not _SNAPSHOT_NAME_RE.match(name):
+            raise ValueError("invalid snapshot name")
+        return self.snapshot_dir / f"{name}.json"
+
+    def snapshot_state(self, req: MockRequest) -> MockResponse:
+        try:
+            path = self._snapshot_path(self._admin_params(req))
+        except ValueError as e:
+            return reply({"error": str(e)}, 400)
+        snap = self.store.snapshot()
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(snap, f, separators=(",", ":"))
+        os.replace(tmp, path)
+        return reply({"snapshot": path.stem, "products": len(snap["products"])})
+
+    def restore_state(self, req: MockRequest) -> MockResponse:
+        try:
+            path = self._snapshot_path(self._admin_params(req))
+        except ValueError as e:
+            return reply({"error": str(e)}, 400)
+        if not path.exists():
+            return reply({"error": "Snapshot not found"}, 404)
+        with open(path, "r", encoding="utf-8") as f:
+            snap = json.load(f)
+        self.store.reset(snap.get("products") or [], next_id=snap.get("next_id"))
+        return reply({"restored": path.stem, "products": len(self.store)})
+
+    def get_faults(self, req: MockRequest) -> MockResponse:
+        return reply({"config": self.faults.config(), "stats": self.faults.stats()})
+
+    def set_faults(self, req: MockRequest) -> MockResponse:
+        # PUT replaces the config (unset keys fall back to defaults), PATCH merges into the current one
+        data = req.json()
+        if not isinstance(data, dict):
+            return reply({"error": "JSON object expected"}, 400)
+        try:
+            config = self.faults.configure(data, merge=req.method == "PATCH")
+        except (ValueError, TypeError, AttributeError) as e:
+            return reply({"error": str(e)}, 400)
+        return reply({"config": config})
+
+    def clear_faults(self, req: MockRequest) -> MockResponse:
+        self.faults.reset()
+        return reply({"config": self.faults.config()})
+
+    # --- products ---
+    @staticmethod
+    def _parse_list_query(args: Dict[str, str]) -> Tuple[Any, ...]:
+        """Normalized (hashable) query for GET /products; also the page cache key."""
+        fields = args.get("fields")
+        fields_t = tuple(f.strip() for f in fields.split(",") if f.strip()) if fields else None
+        return (
+            args.get("category") or None,
+            _opt_float(args, "min_price"),
+            _opt_float(args, "max_price"),
+            _opt_int(args, "cursor"),
+            _opt_int(args, "offset") or 0,
+            _opt_int(args, "limit", minimum=1),
+            fields_t,
+        )
+
+    def _render_page(self, req: MockRequest, q: Tuple[Any, ...]) -> Tuple[bytes, Dict[str, str]]:
+        category, min_price, max_price, cursor, offset, limit, fields = q
+        items, total, next_cursor = self.store.query(category, min_price, max_price, cursor, offset, limit)
+        if fields:
+            items = [{k: p[k] for k in fields if k in p} for p in items]
+        body = dumps(items)
+        headers = {"X-Total-Count": str(total)}
+        if next_cursor is not None:
+            headers["X-Next-Cursor"] = str(next_cursor)
+            params = dict(req.args)
+            params.pop("offset", None)
+            params["cursor"] = str(next_cursor)
+            headers["Link"] = f'<{req.path}?{urlencode(params)}>; rel="next"'
+        return body, headers
+
+    def _cached_page(self, req: MockRequest, q: Tuple[Any, ...]) -> Tuple[bytes, Dict[str, str]]:
+        with self._page_cache_lock:
+            if self._page_cache_version != self.store.version:
+                self._page_cache.clear()
+                self._page_cache_version = self.store.version
+            hit = self._page_cache.get(q)
+            if hit is not None:
+                self._page_cache.move_to_end(q)
+                return hit
+            version = self._page_cache_version
+
+        rendered = self._render_page(req, q)
+        with self._page_cache_lock:
+            # only keep it if no write happened while rendering
+            if version == self.store.version == self._page_cache_version:
+                self._page_cache[q] = rendered
+                if len(self._page_cache) > _PAGE_CACHE_MAX:
+                    self._page_cache.popitem(last=False)
+        return rendered
+
+    def list_products(self, req: MockRequest) -> MockResponse:
+        try:
+            q = self._parse_list_query(req.args)
+        except ValueError as e:
+            return reply({"error": str(e)}, 400)
+        body, headers = self._cached_page(req, q)
+        return MockResponse(200, body, dict(headers))
+
+    def create_product(self, req: MockRequest) -> MockResponse:
+        data = req.json() or {}
+        # same validation as the bulk path (a non-numeric price is a 400, not a store error)
+        problem = _check_create(data)
+        if problem:
+            return reply({"error": problem}, 400)
+        return reply(self.store.create(data), 201)
+
+    def update_product(self, req: MockRequest, pid: int) -> MockResponse:
+        data = req.json() or {}
+        problem = _check_fields(data)
+        if problem:
+            return reply({"error": problem}, 400)
+        updated = self.store.update(pid, data)
+        if updated is None:
+            return reply({"error": "Product not found"}, 404)
+        return reply(updated)
+
+    def delete_product(self, req: MockRequest, pid: int) -> MockResponse:
+        if not self.store.delete(pid):
+            return reply({"error": "Product not found"}, 404)
+        return reply({"deleted": True, "id": pid})
+
+    # --- bulk (NDJSON) ---
+    @staticmethod
+    def _read_bulk(req: MockRequest, validate: Callable[[Any], Optional[str]]) -> Tuple[List[Any], List[Dict[str, Any]]]:
+        """Parse + validate the whole batch before touching the store (all-or-nothing)."""
+        items: List[Any] = []
+        errors: List[Dict[str, Any]] = []
+        for n, raw in enumerate(req.lines(), start=1):
+            raw = raw.strip()
+            if not raw:
+                continue
+            try:
+                value = json.loads(raw)
+            except ValueError as e:
+                errors.append({"line": n, "error": f"invalid JSON: {e}"})
+                continue
+            problem = validate(value)
+            if problem:
+                errors.append({"line": n, "error": problem})
+            else:
+                items.append(value)
+        return items, errors
+
+    def bulk_create_products(self, req: MockRequest) -> MockResponse:
+        items, errors = self._read_bulk(req, _check_create)
+        if errors:
+            return reply({"error": "Invalid bulk payload", "lines": errors[:100]}, 400)
+        created = self.store.bulk_create(items)
+        first = created[0]["id"] if created else None
+        last = created[-1]["id"] if created else None
+        return reply({"created": len(created), "first_id": first, "last_id": last}, 201)
+
+    def bulk_update_products(self, req: MockRequest) -> MockResponse:
+        items, errors = self._read_bulk(req, _check_update)
+        if errors:
+            return reply({"error": "Invalid bulk payload", "lines": errors[:100]}, 400)
+        updated, missing = self.store.bulk_update(items)
+        return reply({"updated": updated, "missing": missing})
+
+    def bulk_delete_products(self, req: MockRequest) -> MockResponse:
+        items, errors = self._read_bulk(req, _check_delete)
+        if errors:
+            return reply({"error": "Invalid bulk payload", "lines": errors[:100]}, 400)
+        ids = [v if isinstance(v, int) else v["id"] for v in items]
+        deleted, missing = self.store.bulk_delete(ids)
+        return reply({"deleted": deleted, "missing": missing})
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import bisect
+import random
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+FIELDS = ("title", "price", "description", "category", "image")
+
+DEFAULT_CATEGORIES = ("mock", "electronics", "jewelery", "men's clothing", "women's clothing")
+
+
+def generate_products(
+    count: int,
+    seed: int = 0,
+    start_id: int = 1,
+    categories: Iterable[str] = DEFAULT_CATEGORIES,
+) -> List[Dict[str, Any]]:
+    """Deterministic catalog: the same (count, seed, start_id) always yields the same products."""
+    rnd = random.Random(seed)
+    cats = list(categories) or list(DEFAULT_CATEGORIES)
+    ncat = len(cats)
+    out: List[Dict[str, Any]] = []
+    for pid in range(start_id, start_id + count):
+        out.append({
+            "id": pid,
+            "title": f"Product {pid}",
+            "price": round(rnd.uniform(1.0, 1000.0), 2),
+            "description": f"Seeded item {pid}",
+            "category": cats[rnd.randrange(ncat)],
+            "image": f"https://example.com/p{pid}.png",
+        })
+    return out
+
+
+class ProductStore:
+    """In-memory product "database" indexed by id, safe under a threaded server.
+
+    - `_by_id` gives O(1) lookup/update/delete by id.
+    - `_order` keeps ids sorted (ids are monotonic), so pages are slices of ids, not copies of the catalog.
+    - `_by_category` and `_by_price` (sorted (price, id) pairs) are secondary indexes.
+    - Records are never mutated in place: updates replace the dict, so readers holding a
+      reference from `view()` always see a consistent product.
+    - `version` increases on every write (used to invalidate read caches).
+    """
+
+    def __init__(self, products: Optional[Iterable[Dict[str, Any]]] = None) -> None:
+        self._lock = threading.RLock()
+        self._by_id: Dict[int, Dict[str, Any]] = {}
+        self._order: List[int] = []
+        self._by_category: Dict[str, Set[int]] = {}
+        self._by_price: List[Tuple[float, int]] = []
+        self._next_id = 1
+        self.version = 0
+        if products:
+            self.reset(products)
+
+    # --- internals (call with the lock held) ---
+    def _index(self, p: Dict[str, Any]) -> None:
+        pid = p["id"]
+        self._by_id[pid] = p
+        i = bisect.bisect_left(self._order, pid)
+        if i == len(self._order) or self._order[i] != pid:
+            self._order.insert(i, pid)
+        self._by_category.setdefault(p.get("category") or "", set()).add(pid)
+        bisect.insort(self._by_price, (self._price_key(p), pid))
+
+    @staticmethod
+    def _price_key(p: Dict[str, Any]) -> float:
+        try:
+            return float(p.get("price") or 0.0)
+        except (TypeError, ValueError):
+            return 0.0
+
+    def _unindex(self, pid: int) -> Optional[Dict[str, Any]]:
+        p = self._by_id.pop(pid, None)
+        if p is None:
+            return None
+        i = bisect.bisect_left(self._order, pid)
+        if i < len(self._order) and self._order[i] == pid:
+            del self._order[i]
+        ids = self._by_category.get(p.get("category") or "")
+        if ids is not None:
+            ids.discard(pid)
+            if not ids:
+                del self._by_category[p.get("category") or ""]
+        entry = (self._price_key(p), pid)
+        j = bisect.bisect_left(self._by_price, entry)
+        if j < len(self._by_price) and self._by_price[j] == entry:
+            del self._by_price[j]
+        return p
+
+    def _index_many(self, products: Iterable[Dict[str, Any]]) -> int:
+        """Bulk indexing: one sort per index instead of one insort per product."""
+        n = 0
+        for p in products:
+            pid = p["id"]
+            old = self._by_id.get(pid)
+            if old is not None:
+                self._unindex(pid)
+            self._by_id[pid] = p
+            self._order.append(pid)
+            self._by_category.setdefault(p.get("category") or "", set()).add(pid)
+            self._by_price.append((self._price_key(p), pid))
+            n += 1
+        self._order.sort()
+        self._by_price.sort()
+        return n
+
+    # --- writes ---
+    def reset(self, products: Iterable[Dict[str, Any]], next_id: Optional[int] = None) -> None:
+        with self._lock:
+            self._by_id.clear()
+            self._order.clear()
+            self._by_category.clear()
+            self._by_price.clear()
+            self._index_many(dict(p) for p in products)
+            last = (self._order[-1] + 1) if self._order else 1
+            self._next_id = max(last, next_id or 0)
+            self.version += 1
+
+    def seed(self, count: int, seed: int = 0, append: bool = False,
+             categories: Iterable[str] = DEFAULT_CATEGORIES) -> int:
+        """Generate `count` products deterministically (replacing the catalog unless `append`)."""
+        with self._lock:
+            if not append:
+                self.reset([])
+            products = generate_products(count, seed, start_id=self._next_id, categories=categories)
+            self._index_many(products)
+            self._next_id += count
+            self.version += 1
+            return count
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"next_id": self._next_id, "products": [self._by_id[i] for i in self._order]}
+
+    def bulk_create(self, items: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        with self._lock:
+            created: List[Dict[str, Any]] = []
+            for data in items:
+                created.append({
+                    "id": self._next_id,
+                    "title": data.get("title"),
+                    "price": float(data.get("price")),
+                    "description": data.get("description", ""),
+                    "category": data.get("category", "mock"),
+                    "image": data.get("image", ""),
+                })
+                self._next_id += 1
+            self._index_many(created)
+            self.version += 1
+            return created
+
+    def bulk_update(self, items: Iterable[Dict[str, Any]]) -> Tuple[int, List[int]]:
+        """Apply partial updates ({"id": .., field: ..}); returns (updated, missing ids)."""
+        with self._lock:
+            updated = 0
+            missing: List[int] = []
+            for data in items:
+                if self.update(int(data["id"]), data) is None:
+                    missing.append(int(data["id"]))
+                else:
+                    updated += 1
+            return updated, missing
+
+    def bulk_delete(self, ids: Iterable[int]) -> Tuple[int, List[int]]:
+        with self._lock:
+            deleted = 0
+            missing: List[int] = []
+            for pid in ids:
+                if self._unindex(pid) is None:
+                    missing.append(pid)
+                else:
+                    deleted += 1
+            self.version += 1
+            return deleted, missing
+
+    def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            created = {
+                "id": self._next_id,
+                "title": data.get("title"),
+                "price": float(data.get("price")),
+                "description": data.get("description", ""),
+                "category": data.get("category", "mock"),
+                "image": data.get("image", ""),
+            }
+            self._next_id += 1
+            self._index(created)
+            self.version += 1
+            return created
+
+    def update(self, pid: int, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            cur = self._by_id.get(pid)
+            if cur is None:
+                return None
+            new = dict(cur)
+            # update fields if present
+            for k in FIELDS:
+                if k in data:
+                    new[k] = float(data[k]) if k == "price" else data[k]
+            self._unindex(pid)
+            self._index(new)
+            self.version += 1
+            return new
+
+    def delete(self, pid: int) -> bool:
+        with self._lock:
+            if self._unindex(pid) is None:
+                return False
+            self.version += 1
+            return True
+
+    # --- reads ---
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def get(self, pid: int) -> Optional[Dict[str, Any]]:
+        return self._by_id.get(pid)
+
+    def view(self, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Ordered page of products (by id) without copying the whole catalog."""
+        with self._lock:
+            end = len(self._order) if limit is None else offset + max(0, limit)
+            return [self._by_id[i] for i in self._order[offset:end]]
+
+    def iter_from(self, after_id: int = 0) -> Iterator[Dict[str, Any]]:
+        """Ordered iteration starting after `after_id` (cursor style).
+
+        Walks the id index in small batches, taking the lock per batch, so concurrent writers
+        are not blocked for the whole iteration.
+        """
+        last = after_id
+        while True:
+            with self._lock:
+                i = bisect.bisect_right(self._order, last)
+                batch = [self._by_id[x] for x in self._order[i:i + 256]]
+            if not batch:
+                return
+            for p in batch:
+                yield p
+            last = batch[-1]["id"]
+
+    def query(
+        self,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        after_id: Optional[int] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Tuple[List[Dict[str, Any]], int, Optional[int]]:
+        """Filtered, ordered page: (items, total matching, next cursor or None).
+
+        Filters are answered from the indexes (category set, price range by bisect) and only
+        the ids of the requested page are materialized.
+        """
+        with self._lock:
+            ids: Optional[List[int]] = None
+            if min_price is not None or max_price is not None:
+                lo = bisect.bisect_left(self._by_price, (min_price, -1)) if min_price is not None else 0
+                hi = (bisect.bisect_right(self._by_price, (max_price, float("inf")))
+                      if max_price is not None else len(self._by_price))
+                in_range = {pid for _price, pid in self._by_price[lo:hi]}
+                if category is not None:
+                    in_range &= self._by_category.get(category, set())
+                ids = sorted(in_range)
+            elif category is not None:
+                ids = sorted(self._by_category.get(category, ()))
+            else:
+                ids = self._order
+
+            if after_id is not None:
+                ids = ids[bisect.bisect_right(ids, after_id):]
+            total = len(ids)
+            end = total if limit is None else offset + max(0, limit)
+            page = [self._by_id[i] for i in ids[offset:end]]
+            next_cursor = page[-1]["id"] if page and end < total else None
+            return page, total, next_cursor
+
+    def category_ids(self, category: str) -> List[int]:
+        with self._lock:
+            return sorted(self._by_category.get(category, ()))
+
+    def categories(self) -> Dict[str, int]:
+        with self._lock:
+            return {k: len(v) for k, v in self._by_category.items()}
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from fault_engine import Decision
+from mock_api import MockRequest, MockResponse, Pending, reply
+
+# Record-and-replay proxy (python api_mock_server.py --replay DIR --upstream github=https://api.github.com).
+#
+# Requests to /<upstream>/<path> are matched on (method, path, query, body) against the cassette
+# data/<upstream>.json. The n-th identical request of a session gets the n-th recorded response
+# (the last one repeats), so sequences like a decreasing X-RateLimit-Remaining replay faithfully.
+#
+# Record modes:
+#   none - replay only; a request without a recording gets 599 (no network at all)
+#   new  - replay what exists, forward + record the rest (record once, then run offline)
+#   all  - always forward and re-record (refresh the cassettes)
+
+RECORD_MODES = ("none", "new", "all")
+CASSETTE_VERSION = 1
+
+# hop-by-hop / transport headers: never forwarded nor stored
+_SKIP_REQUEST_HEADERS = {"host", "connection", "content-length", "accept-encoding", "transfer-encoding",
+                         "keep-alive", "proxy-connection", "te", "upgrade"}
+_SKIP_RESPONSE_HEADERS = {"connection", "content-length", "content-encoding", "transfer-encoding",
+                          "keep-alive", "date", "server", "content-type"}
+
+
+def _canonical_body(body: bytes) -> str:
+    if not body:
+        return ""
+    try:
+        return json.dumps(json.loads(body), sort_keys=True, separators=(",", ":"))
+    except ValueError:
+        return "sha256:" + hashlib.sha256(body).hexdigest()
+
+
+def match_key(method: str, path: str, args: Dict[str, str], body: bytes) -> str:
+    """Stable key of a request: method + path + sorted query + canonical body (JSON key order ignored)."""
+    query = urlencode(sorted(args.items()))
+    return f"{method.upper()} {path}?{query} {_canonical_body(body)}"
+
+
+def _encode_body(body: bytes) -> Dict[str, str]:
+    try:
+        return {"text": body.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(body).decode("ascii")}
+
+
+def _decode_body(data: Dict[str, str]) -> bytes:
+    if "base64" in data:
+        return base64.b64decode(data["base64"])
+    return (data.get("text") or "").encode("utf-8")
+
+
+class Cassette:
+    """Recorded interactions of one upstream, persisted as JSON (rewritten atomically on change)."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.entries: Dict[str, List[Dict[str, Any]]] = {}
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for item in data.get("interactions") or []:
+                self.entries.setdefault(item["key"], []).append(item)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        items = [item for key in sorted(self.entries) for item in self.entries[key]]
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": CASSETTE_VERSION, "interactions": items}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.path)
+
+
+class ReplayProxy:
+    """Same dispatch() contract as MockApi, so it runs under the Flask or the asyncio server."""
+
+    def __init__(self, cassette_dir: Path, upstreams: Dict[str, str], record: str = "none", timeout: float = 30.0) -> None:
+        if record not in RECORD_MODES:
+            raise ValueError(f"record must be one of {', '.join(RECORD_MODES)}")
+        self.cassette_dir = cassette_dir
+        self.upstreams = {k: v.rstrip("/") for k, v in upstreams.items()}
+        self.record = record
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._cassettes: Dict[str, Cassette] = {}
+        self._played: Dict[Tuple[str, str], int] = {}
+        self._refreshed: set = set()
+        self.stats = {"hits": 0, "recorded": 0, "misses": 0}
+
+    def _cassette(self, name: str) -> Cassette:
+        with self._lock:
+            c = self._cassettes.get(name)
+            if c is None:
+                c = self._cassettes[name] = Cassette(self.cassette_dir / f"{name}.json")
+            return c
+
+    # --- dispatch ---
+    def dispatch(self, req: MockRequest) -> Pending:
+        if req.path == "/__health":
+            return Pending(Decision(), lambda: reply({"ok": True, "mode": "replay", "record": self.record}))
+        if req.path == "/__reset":
+            return Pending(Decision(), self._reset)
+        if req.path == "/__cassettes":
+            return Pending(Decision(), self._describe)
+
+        name, _, rest = req.path.lstrip("/").partition("/")
+        if name not in self.upstreams:
+            return Pending(Decision(), lambda: reply({"error": f"unknown upstream: {name}"}, 404))
+        path = "/" + rest
+        key = match_key(req.method, path, req.args, req.body)
+        resp = self._replay(name, key)
+        if resp is not None:
+            return Pending(Decision(), lambda: resp)
+        if self.record == "none":
+            with self._lock:
+                self.stats["misses"] += 1
+            return Pending(Decision(), lambda: reply({"error": "no recording for request", "key": key}, 599))
+        # upstream call: blocking I/O (the async server runs it in a thread)
+        return Pending(Decision(), lambda: self._forward(name, path, key, req), blocking=True)
+
+    def _reset(self) -> MockResponse:
+        with self._lock:
+            self._played.clear()
+            self._refreshed.clear()
+            self.stats = {"hits": 0, "recorded": 0, "misses": 0}
+        return reply({"reset": True})
+
+    def _describe(self) -> MockResponse:
+        with self._lock:
+            stats = dict(self.stats)
+            loaded = {n: sum(len(v) for v in c.entries.values()) for n, c in self._cassettes.items()}
+        return reply({"record": self.record, "upstreams": self.upstreams, "stats": stats, "interactions": loaded})
+
+    def _replay(self, name: str, key: str) -> Optional[MockResponse]:
+        if self.record == "all":
+            return None
+        cassette = self._cassette(name)
+        with self._lock:
+            recorded = cassette.entries.get(key) or []
+            n = self._played.get((name, key), 0)
+            if not recorded or (n >= len(recorded) and self.record == "new"):
+                return None
+            self._played[(name, key)] = n + 1
+            self.stats["hits"] += 1
+            item = recorded[min(n, len(recorded) - 1)]
+        r = item["response"]
+        return MockResponse(r["status"], _decode_body(r["body"]), dict(r.get("headers") or {}),
+                            r.get("content_type") or "application/json")
+
+    def _forward(self, name: str, path: str, key: str, req: MockRequest) -> MockResponse:
+        url = self.upstreams[name] + path + (f"?{urlencode(req.args)}" if req.args else "")
+        headers = {k: v for k, v in req.headers.items() if k not in _SKIP_REQUEST_HEADERS}
+        up = urllib.request.Request(url, data=req.body or None, headers=headers, method=req.method)
+        try:
+            with urllib.request.urlopen(up, timeout=self.timeout) as r:
+                status, resp_headers, body = r.status, r.headers, r.read()
+        except urllib.error.HTTPError as e:
+            # 4xx/5xx are valid recordings too (e.g. GitHub 403 rate limit)
+            status, resp_headers, body = e.code, e.headers, e.read()
+        except (urllib.error.URLError, OSError) as e:
+            with self._lock:
+                self.stats["misses"] += 1
+            return reply({"error": f"upstream unavailable: {e}"}, 502)
+
+        content_type = resp_headers.get("Content-Type") or "application/octet-stream"
+        kept = {k: v for k, v in resp_headers.items() if k.lower() not in _SKIP_RESPONSE_HEADERS}
+        item = {
+            "key": key,
+            "request": {"method": req.method, "path": path, "query": dict(sorted(req.args.items())),
+                        "body": _encode_body(req.body) if req.body else None},
+            "response": {"status": status, "headers": kept, "content_type": content_type,
+                         "body": _encode_body(body)},
+        }
+        cassette = self._cassette(name)
+        with self._lock:
+            if self.record == "all" and (name, key) not in self._refreshed:
+                # first call of this key in the session replaces the old recordings
+                self._refreshed.add((name, key))
+                cassette.entries[key] = []
+            cassette.entries.setdefault(key, []).append(item)
+            self._played[(name, key)] = len(cassette.entries[key])
+            self.stats["recorded"] += 1
+            cassette.save()
+        return MockResponse(status, body, kept, content_type)
+
+
+def parse_upstreams(values: List[str]) -> Dict[str, str]:
+    """['github=https://api.github.com', ...] -> {'github': 'https://api.github.com'}"""
+    out: Dict[str, str] = {}
+    for v in values:
+        name, sep, url = v.partition("=")
+        if not sep or not name or not url.startswith(("http://", "https://")):
+            raise ValueError(f"invalid upstream (expected name=http[s]://host): {v}")
+        out[name.strip()] = url.strip()
+    return out
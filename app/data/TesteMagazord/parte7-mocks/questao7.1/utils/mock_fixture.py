@@ -0,0 +1,235 @@
+import os
+import sys
+import time
+import atexit
+import logging
+import socket
+import asyncio
+import threading
+import subprocess
+import urllib.request
+from robot.api import logger
+
+# Fixture do mock compartilhada pelo processo (suítes e testes): sobe uma vez, os testes isolam o
+# estado com POST /__reset. O teardown de suíte só devolve a referência; o servidor para no fim da
+# execução (close do listener da biblioteca, inclusive no worker aquecido) ou na saída do processo. A prontidão é detectada por connect() no socket com backoff exponencial
+# em milissegundos (sem sessões HTTP repetidas nem esperas de 1s).
+#
+# - subprocess (padrão): python api_mock_server.py --port <porta livre> --mode <threaded|async>
+# - in_process: o servidor roda numa thread deste processo (Flask/werkzeug ou asyncio) em porta efêmera.
+# Com port=0 cada execução usa uma porta livre, então suítes paralelas não disputam a 5050.
+
+_MOCKS_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mocks"))
+_LOCK = threading.Lock()
+_FIXTURE = None
+
+
+def _free_port(host: str) -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+
+def _wait_port(host: str, port: int, timeout: float, alive=lambda: True) -> float:
+    """connect() até aceitar, com backoff 5ms -> 200ms. Retorna os segundos até ficar pronto."""
+    t0 = time.perf_counter()
+    delay = 0.005
+    while True:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return time.perf_counter() - t0
+        except OSError:
+            pass
+        if not alive():
+            raise RuntimeError("o processo do mock terminou antes de abrir a porta (veja os logs)")
+        if time.perf_counter() - t0 >= timeout:
+            raise RuntimeError(f"{host}:{port} não abriu em {timeout}s")
+        time.sleep(delay)
+        delay = min(delay * 2, 0.2)
+
+
+def _post(url: str, timeout: float = 5.0) -> int:
+    req = urllib.request.Request(url, data=b"", method="POST")
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return resp.status
+
+
+class _Fixture:
+    def __init__(self, mode: str, in_process: bool, host: str, port: int, log_dir) -> None:
+        self.mode = mode
+        self.in_process = in_process
+        self.host = host
+        self.port = port or _free_port(host)
+        self.url = f"http://{host}:{self.port}"
+        self.users = 0
+        self._proc = None
+        self._logs = []
+        self._server = None
+        self._loop = None
+        self._task = None
+        self._thread = None
+        self.log_dir = log_dir
+
+    def start(self, timeout: float) -> float:
+        if self.in_process:
+            self._start_thread()
+            alive = self._thread.is_alive
+        else:
+            self._start_process()
+            alive = lambda: self._proc.poll() is None
+        return _wait_port(self.host, self.port, timeout, alive)
+
+    def _start_process(self) -> None:
+        cmd = [sys.executable, os.path.join(_MOCKS_DIR, "api_mock_server.py"),
+               "--host", self.host, "--port", str(self.port), "--mode", self.mode]
+        if self.log_dir:
+            os.makedirs(self.log_dir, exist_ok=True)
+            out = open(os.path.join(self.log_dir, f"mock_{self.port}_stdout.txt"), "wb")
+            err = open(os.path.join(self.log_dir, f"mock_{self.port}_stderr.txt"), "wb")
+            self._logs = [out, err]
+        else:
+            out = err = subprocess.DEVNULL
+        flags = getattr(subprocess, "CREATE_NO_WINDOW", 0) if os.name == "nt" else 0
+        self._proc = subprocess.Popen(cmd, cwd=_MOCKS_DIR, stdout=out, stderr=err, creationflags=flags)
+
+    def _start_thread(self) -> None:
+        if _MOCKS_DIR not in sys.path:
+            sys.path.insert(0, _MOCKS_DIR)
+        import api_mock_server
+
+        if self.mode == "async":
+            from async_mock_server import _serve
+
+            self._loop = asyncio.new_event_loop()
+            self._task = self._loop.create_task(_serve(api_mock_server._api, self.host, self.port))
+
+            def run():
+                try:
+                    self._loop.run_until_complete(self._task)
+                except asyncio.CancelledError:
+                    pass
+                finally:
+                    self._loop.close()
+
+            self._thread = threading.Thread(target=run, name="mock-async", daemon=True)
+        else:
+            from werkzeug.serving import make_server
+
+            # sem o log de acesso do werkzeug misturado à saída do Robot
+            logging.getLogger("werkzeug").setLevel(logging.WARNING)
+            self._server = make_server(self.host, self.port, api_mock_server.app, threaded=True)
+            self._thread = threading.Thread(target=self._server.serve_forever, name="mock-flask", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        if self._task is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._task.cancel)
+            except RuntimeError:
+                pass  # loop já encerrado
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self._proc is not None and self._proc.poll() is None:
+            self._proc.terminate()
+            try:
+                self._proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+        for f in self._logs:
+            f.close()
+
+
+def start_mock_fixture(mode: str = "threaded", in_process: bool = False, host: str = "127.0.0.1", port: int = 0,
+                       timeout: float = 10, log_dir=None):
+    """Keyword: URL base do mock, iniciando-o só na primeira chamada do processo.
+
+    Chamadas seguintes (outras suítes) reutilizam o mesmo servidor e apenas fazem /__reset.
+    `in_process`: servidor numa thread deste processo; `port=0`: porta livre escolhida na hora.
+    """
+    global _FIXTURE
+    in_process = str(in_process).lower() in ("1", "true", "yes")
+    with _LOCK:
+        if _FIXTURE is None:
+            fx = _Fixture(str(mode), in_process, host, int(port or 0), log_dir)
+            try:
+                ready = fx.start(float(timeout))
+            except Exception:
+                fx.stop()
+                raise
+            _FIXTURE = fx
+            logger.info(f"Mock pronto em {fx.url} ({'thread' if in_process else 'processo'}, {mode}) "
+                        f"após {ready * 1000:.0f} ms")
+        else:
+            reset_mock_fixture()
+        _FIXTURE.users += 1
+        return _FIXTURE.url
+
+
+def reset_mock_fixture():
+    """Keyword: POST /__reset (produtos, contadores de rate limit e falhas voltam ao estado inicial)."""
+    if _FIXTURE is None:
+        raise RuntimeError("mock não iniciado (use Start Mock Fixture)")
+    status = _post(_FIXTURE.url + "/__reset")
+    if status != 200:
+        raise AssertionError(f"/__reset retornou {status}")
+    return status
+
+
+def stop_mock_fixture(force: bool = False):
+    """Keyword: libera a referência da suíte; o servidor continua para as próximas suítes do processo.
+
+    Ele para no fim da execução (ou na saída do processo); `force` para na hora.
+    """
+    with _LOCK:
+        if _FIXTURE is None:
+            return
+        _FIXTURE.users = max(0, _FIXTURE.users - 1)
+        if str(force).lower() not in ("1", "true", "yes"):
+            return
+    _shutdown()
+
+
+def _shutdown() -> None:
+    global _FIXTURE
+    with _LOCK:
+        fx, _FIXTURE = _FIXTURE, None
+    if fx is not None:
+        fx.stop()
+        logger.info(f"Mock em {fx.url} encerrado")
+
+
+def free_port(host: str = "127.0.0.1") -> int:
+    """Keyword: porta TCP livre no momento (servidores auxiliares de execuções paralelas sem porta fixa)."""
+    return _free_port(host)
+
+
+def wait_for_port(host: str, port, timeout: float = 10):
+    """Keyword: espera `host:port` aceitar conexões (connect() com backoff 5ms -> 200ms); retorna os ms até ficar pronto.
+
+    Para servidores iniciados fora da fixture (ex.: proxy record-and-replay via Start Process).
+    """
+    return round(_wait_port(host, int(port), float(timeout)) * 1000, 1)
+
+
+def mock_fixture_info():
+    """Keyword: {url, mode, in_process, users} da fixture atual (ou None)."""
+    fx = _FIXTURE
+    if fx is None:
+        return None
+    return {"url": fx.url, "mode": fx.mode, "in_process": fx.in_process, "users": fx.users}
+
+
+class _EndOfExecution:
+    """Listener da biblioteca (escopo global): close() roda uma vez, quando a execução inteira termina."""
+
+    ROBOT_LISTENER_API_VERSION = 3
+
+    def close(self) -> None:
+        _shutdown()
+
+
+ROBOT_LIBRARY_LISTENER = _EndOfExecution()
+atexit.register(lambda: _FIXTURE is not None and _FIXTURE.stop())
@@ -1,8 +1,61 @@
+import os
 import json
-from jsonschema import validate
+import threading
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
 
-def validate_product_schema(instance, schema_path: str):
-    with open(schema_path, "r", encoding="utf-8") as f:
+# validador pronto por schema: (caminho absoluto) -> ((mtime_ns, tamanho), instância do validador)
+_VALIDATORS = {}
+_LOCK = threading.Lock()
+
+
+def _validator(schema_path: str):
+    path = os.path.abspath(schema_path)
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _LOCK:
+        hit = _VALIDATORS.get(path)
+        if hit is not None and hit[0] == stamp:
+            return hit[1]
+    with open(path, "r", encoding="utf-8") as f:
         schema = json.load(f)
-    validate(instance=instance, schema=schema)
-    return True
\ No newline at end of file
+    cls = validator_for(schema)
+    cls.check_schema(schema)  # uma vez por versão do arquivo, não a cada validação
+    validator = cls(schema)
+    with _LOCK:
+        _VALIDATORS[path] = (stamp, validator)
+    return validator
+
+
+def _pointer(path) -> str:
+    # JSON Pointer (RFC 6901) do ponto com erro
+    return "".join("/" + str(p).replace("~", "~0").replace("/", "~1") for p in path)
+
+
+def validate_product_schema(instance, schema_path: str):
+    error = best_match(_validator(schema_path).iter_errors(instance))
+    if error is not None:
+        raise error
+    return True
+
+
+def collect_schema_errors(items, schema_path: str, max_errors: int = 0):
+    """Valida todos os itens de um array; devolve [{index, pointer, message}] (vazio = tudo válido)."""
+    validator = _validator(schema_path)
+    max_errors = int(max_errors or 0)
+    errors = []
+    for i, item in enumerate(items):
+        for err in validator.iter_errors(item):
+            errors.append({"index": i, "pointer": f"/{i}{_pointer(err.absolute_path)}", "message": err.message})
+            if max_errors and len(errors) >= max_errors:
+                return errors
+    return errors
+
+
+def validate_products_schema(items, schema_path: str, max_errors: int = 50):
+    """Keyword: valida a resposta inteira de uma vez e falha listando todos os erros encontrados."""
+    errors = collect_schema_errors(items, schema_path, max_errors)
+    if errors:
+        lines = [f"{e['pointer']}: {e['message']}" for e in errors]
+        raise AssertionError(f"{len(errors)} erro(s) de schema em {len(items)} item(ns):\n" + "\n".join(lines))
+    return len(items)
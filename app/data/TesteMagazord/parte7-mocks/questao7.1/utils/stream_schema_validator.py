@@ -0,0 +1,207 @@
+import os
+import re
+import sys
+import json
+import codecs
+import random
+import importlib.util
+import requests
+
+
+def _sibling(name: str):
+    """Módulo irmão em utils/ carregado pelo caminho do arquivo (o Robot importa este como módulo de topo).
+
+    Reaproveita o já importado pelo Robot (mesmo arquivo), para compartilhar o cache de validadores.
+    """
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), name + ".py")
+    mod = sys.modules.get(name)
+    if mod is not None and os.path.normcase(os.path.abspath(getattr(mod, "__file__", "") or "")) == os.path.normcase(path):
+        return mod
+    spec = importlib.util.spec_from_file_location(name, path)
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[name] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+if __package__:
+    from .schema_validator import _pointer, _validator
+else:
+    _pointer = _sibling("schema_validator")._pointer
+    _validator = _sibling("schema_validator")._validator
+
+# Validação de arrays JSON grandes sem materializar a resposta: o corpo é lido em chunks,
+# cada elemento é decodificado e validado assim que fica completo, e só ele fica em memória.
+
+_WS = re.compile(r"[ \t\n\r]*")
+# o que ainda pode continuar um número/literal no próximo chunk ("1." -> "1.5", "1.5e" -> "1.5e3", "tr" -> "true")
+_SCALAR_TAIL = re.compile(r"[0-9.eE+\-a-z]*")
+_DECODER = json.JSONDecoder()
+_CHUNK = 64 * 1024
+
+
+def iter_json_array(chunks):
+    """Gera os elementos de um array JSON a partir de chunks (bytes ou str), incrementalmente.
+
+    Estrito como json.loads: exatamente uma vírgula entre elementos, sem vírgula sobrando e só espaços após o ']'.
+    """
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    pos = 0
+    # open: espera '['; first: elemento ou ']'; value: elemento (após ','); sep: ',' ou ']'
+    state = "open"
+    eof = False
+    chunks = iter(chunks)
+
+    def more():
+        nonlocal buf, pos, eof
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            buf += utf8.decode(b"", final=True)
+            eof = True
+            return
+        text = chunk if isinstance(chunk, str) else utf8.decode(chunk)
+        # compacta o que já foi consumido para manter o buffer limitado
+        buf = buf[pos:] + text
+        pos = 0
+
+    while True:
+        pos = _WS.match(buf, pos).end()
+        if pos >= len(buf):
+            if eof:
+                raise ValueError("JSON truncado: array não foi fechado" if state != "open" else "corpo vazio")
+            more()
+            continue
+        ch = buf[pos]
+        if state == "open":
+            if ch != "[":
+                raise ValueError("a resposta não é um array JSON")
+            state = "first"
+            pos += 1
+            continue
+        if ch == "]" and state in ("first", "sep"):
+            pos += 1
+            break
+        if state == "sep":
+            if ch != ",":
+                raise ValueError(f"JSON inválido na posição {pos} do buffer: esperado ',' ou ']' após o elemento")
+            state = "value"
+            pos += 1
+            continue
+        if ch in ",]":
+            raise ValueError(f"JSON inválido na posição {pos} do buffer: elemento esperado, encontrado '{ch}'")
+        try:
+            value, end = _DECODER.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            more()
+            continue
+        # só aceita o valor com o delimitador seguinte já no buffer (ou no fim do corpo): um número
+        # cortado no chunk ("1." / "1.5e") decodifica só o prefixo válido
+        after = _WS.match(buf, end).end()
+        if after >= len(buf) or buf[after] not in ",]":
+            scalar = not isinstance(value, (dict, list, str))
+            if not eof and (after >= len(buf) or (scalar and _SCALAR_TAIL.fullmatch(buf, end))):
+                more()
+                continue
+            raise ValueError(f"JSON inválido na posição {after} do buffer: esperado ',' ou ']' após o elemento")
+        pos = end
+        state = "sep"
+        yield value
+
+    # depois do ']' só pode haver espaços até o fim do corpo
+    while True:
+        pos = _WS.match(buf, pos).end()
+        if pos < len(buf):
+            raise ValueError(f"JSON inválido: conteúdo após o fim do array (posição {pos} do buffer)")
+        if eof:
+            return
+        more()
+
+
+def _schema_pointer(pointer: str) -> str:
+    # /12/price -> /*/price (agrupa o mesmo problema em itens diferentes)
+    return re.sub(r"^/\d+", "/*", pointer)
+
+
+def _response_chunks(source, timeout):
+    if isinstance(source, str) and source.startswith(("http://", "https://")):
+        resp = requests.get(source, stream=True, timeout=float(timeout))
+        if resp.status_code >= 400:
+            resp.close()
+            raise AssertionError(f"GET {source} retornou {resp.status_code}")
+        return resp.iter_content(chunk_size=_CHUNK), resp
+    if hasattr(source, "iter_content"):
+        return source.iter_content(chunk_size=_CHUNK), None
+    if isinstance(source, (bytes, str)):
+        return [source], None
+    if hasattr(source, "__iter__"):
+        return source, None
+    raise TypeError("source deve ser uma URL, um Response do requests, bytes/str ou um iterável de chunks")
+
+
+def validate_json_array_stream(source, schema_path: str, sample: int = 0, seed: int = 0,
+                               max_examples: int = 5, timeout: float = 60, fail: bool = True):
+    """Keyword: valida cada elemento do array JSON de `source` (URL, Response, texto ou chunks) contra o schema.
+
+    - Memória limitada: um elemento por vez (ou `sample` elementos no modo amostragem).
+    - `sample` > 0: valida só N itens sorteados (reservoir sampling, determinístico por `seed`).
+    - Retorna um resumo {items, checked, invalid_items, errors: {ponteiro: {count, message, examples}}};
+      com `fail` (padrão) a keyword falha listando os problemas agrupados por ponteiro JSON.
+    """
+    validator = _validator(schema_path)
+    sample = int(sample or 0)
+    max_examples = int(max_examples)
+    chunks, resp = _response_chunks(source, timeout)
+    rnd = random.Random(int(seed))
+    reservoir = []
+    summary = {"items": 0, "checked": 0, "invalid_items": 0, "errors": {}}
+
+    def check(index, item):
+        summary["checked"] += 1
+        bad = False
+        for err in validator.iter_errors(item):
+            bad = True
+            pointer = f"/{index}{_pointer(err.absolute_path)}"
+            if err.validator == "required":
+                # um grupo por campo ausente (senão /* (required) juntaria campos diferentes com uma só mensagem)
+                missing = next((p for p in err.validator_value
+                                if isinstance(err.instance, dict) and p not in err.instance and repr(p) in err.message),
+                               None)
+                if missing is not None:
+                    pointer += _pointer([missing])
+            key = f"{_schema_pointer(pointer)} ({err.validator})"
+            group = summary["errors"].setdefault(key, {"count": 0, "message": err.message, "examples": []})
+            group["count"] += 1
+            if len(group["examples"]) < max_examples and pointer not in group["examples"]:
+                group["examples"].append(pointer)
+        if bad:
+            summary["invalid_items"] += 1
+
+    try:
+        for i, item in enumerate(iter_json_array(chunks)):
+            summary["items"] += 1
+            if not sample:
+                check(i, item)
+            elif len(reservoir) < sample:
+                reservoir.append((i, item))
+            else:
+                j = rnd.randrange(i + 1)
+                if j < sample:
+                    reservoir[j] = (i, item)
+    finally:
+        if resp is not None:
+            resp.close()
+    for i, item in sorted(reservoir, key=lambda x: x[0]):
+        check(i, item)
+
+    if fail and summary["errors"]:
+        lines = [f"{p}: {g['count']}x {g['message']} (ex.: {', '.join(g['examples'])})"
+                 for p, g in sorted(summary["errors"].items(), key=lambda kv: -kv[1]["count"])]
+        raise AssertionError(
+            f"{summary['invalid_items']} de {summary['checked']} item(ns) verificados fora do schema "
+            f"({summary['items']} no total):\n" + "\n".join(lines)
+        )
+    return summary
@@ -0,0 +1,293 @@
+import os
+import atexit
+import threading
+from urllib.parse import urlsplit
+from robot.api import logger
+from robot.libraries.BuiltIn import BuiltIn
+from selenium import webdriver
+
+# Pool de navegadores headless "aquecidos", compartilhado entre testes e suítes.
+#
+# O estado fica no módulo (não na instância da biblioteca): o Robot reaproveita o módulo já
+# importado, então no worker aquecido do servidor (robot_worker.py) o pool sobrevive também
+# entre execuções. Entre um empréstimo e outro a sessão é limpa (janelas extras, cookies,
+# storage) e volta para about:blank; depois de N usos ou se o driver não responder, é descartada.
+
+MAX_IDLE = int(os.environ.get("MAGAZORD_BROWSER_POOL", "2"))
+MAX_USES = int(os.environ.get("MAGAZORD_BROWSER_MAX_USES", "25"))
+WINDOW_SIZE = (1920, 1080)  # padrão quando a suíte não define ${WINDOW_WIDTH}/${WINDOW_HEIGHT}
+
+_STORAGE_TYPES = "local_storage,session_storage,indexeddb,websql,service_workers,cache_storage"
+
+
+def _new_driver(browser: str, size):
+    browser = browser.lower().replace(" ", "")
+    headless = browser.startswith("headless")
+    kind = browser[len("headless"):] if headless else browser
+    if kind in ("chrome", "googlechrome", "gc"):
+        opts = webdriver.ChromeOptions()
+        if headless:
+            opts.add_argument("--headless=new")
+        opts.add_argument(f"--window-size={size[0]},{size[1]}")
+        opts.add_argument("--disable-dev-shm-usage")
+        return webdriver.Chrome(options=opts)
+    if kind in ("firefox", "ff"):
+        opts = webdriver.FirefoxOptions()
+        if headless:
+            opts.add_argument("-headless")
+        driver = webdriver.Firefox(options=opts)
+        driver.set_window_size(*size)
+        return driver
+    if kind in ("edge", "msedge"):
+        opts = webdriver.EdgeOptions()
+        if headless:
+            opts.add_argument("--headless=new")
+        opts.add_argument(f"--window-size={size[0]},{size[1]}")
+        return webdriver.Edge(options=opts)
+    raise ValueError(f"navegador não suportado pelo pool: {browser} (use headlesschrome, chrome, headlessfirefox, firefox ou edge)")
+
+
+class _Session:
+    def __init__(self, browser: str, size) -> None:
+        self.browser = browser
+        self.size = size  # tamanho do empréstimo atual: reset() volta a ele
+        self.driver = _new_driver(browser, size)
+        self.uses = 0
+        self.origins = set()
+
+    def alive(self) -> bool:
+        try:
+            self.driver.current_window_handle
+            return True
+        except Exception:
+            return False
+
+    def remember_origin(self, url=None) -> None:
+        try:
+            parts = urlsplit(url if url is not None else self.driver.current_url)
+        except Exception:
+            return
+        if parts.scheme in ("http", "https"):
+            self.origins.add(f"{parts.scheme}://{parts.netloc}")
+
+    def _cookie_origins(self) -> None:
+        # sites visitados por clique/redirect (sem Go To) quase sempre deixam cookie: domínio -> origens
+        try:
+            cookies = self.driver.execute_cdp_cmd("Network.getAllCookies", {}).get("cookies", [])
+        except Exception:
+            return
+        for c in cookies:
+            host = (c.get("domain") or "").lstrip(".")
+            if host:
+                self.origins.update((f"https://{host}", f"http://{host}"))
+
+    def reset(self) -> None:
+        """Deixa a sessão como nova: uma janela, sem cookies/storage/cache, em about:blank.
+
+        Origens limpas = todas as navegações feitas pelo driver emprestado (Go To/Open), a página atual de
+        cada janela e, no Chromium, os domínios de todos os cookies; no Chromium o cache HTTP é limpo inteiro.
+        """
+        d = self.driver
+        chromium = self.browser.endswith(("chrome", "edge"))
+        handles = d.window_handles
+        for h in reversed(handles):
+            d.switch_to.window(h)
+            self.remember_origin()
+            if not chromium:
+                try:
+                    d.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+                except Exception:
+                    pass  # about:blank/data: não tem storage
+            if h != handles[0]:
+                d.close()
+        d.switch_to.window(handles[0])
+        if chromium:  # limpeza via CDP, sem precisar visitar cada origem
+            self._cookie_origins()
+            d.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            d.execute_cdp_cmd("Network.clearBrowserCache", {})
+            for origin in self.origins:
+                d.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": _STORAGE_TYPES})
+        else:
+            d.delete_all_cookies()
+        self.origins.clear()
+        d.get("about:blank")
+        d.set_window_size(*self.size)
+
+    def quit(self) -> None:
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+
+class _PooledDriver:
+    """O que é registrado no SeleniumLibrary: repassa tudo ao driver real, mas quit() devolve ao pool.
+
+    Assim o Close Browser / Close All Browsers públicos devolvem o navegador, e cada empréstimo é um
+    objeto novo no cache do SeleniumLibrary (o mesmo driver não é reaproveitado com estado de "fechado").
+    get() registra a origem de cada navegação para a limpeza do storage na devolução.
+    """
+
+    def __init__(self, session: _Session) -> None:
+        object.__setattr__(self, "_session", session)
+        object.__setattr__(self, "_discard", False)
+
+    def __getattr__(self, name):
+        s = object.__getattribute__(self, "_session")
+        if s is None:
+            raise AttributeError(f"navegador já devolvido ao pool ({name})")
+        return getattr(s.driver, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._session.driver, name, value)
+
+    def get(self, url):
+        self._session.remember_origin(url)
+        return self._session.driver.get(url)
+
+    def quit(self):
+        s = object.__getattribute__(self, "_session")
+        if s is None:
+            return
+        # a entrada fechada que fica no cache do SeleniumLibrary não segura mais o driver
+        object.__setattr__(self, "_session", None)
+        result = _POOL.release(s, discard=self._discard)
+        logger.info(f"Navegador {result}: {_POOL.snapshot()}")
+
+
+class _Pool:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._idle = []
+        self._leased = set()
+        self.stats = {"created": 0, "reused": 0, "recycled": 0, "crashed": 0}
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def lease(self, browser: str, size=WINDOW_SIZE) -> _Session:
+        while True:
+            with self._lock:
+                s = next((s for s in self._idle if s.browser == browser), None)
+                if s is not None:
+                    self._idle.remove(s)
+            if s is None:
+                s = _Session(browser, size)
+                self._count("created")
+                break
+            if s.alive():
+                if s.size != size:
+                    try:
+                        s.driver.set_window_size(*size)
+                    except Exception:
+                        self._count("crashed")
+                        s.quit()
+                        continue
+                    s.size = size
+                self._count("reused")
+                break
+            self._count("crashed")
+            s.quit()
+        with self._lock:
+            s.uses += 1
+            self._leased.add(s)
+        return s
+
+    def release(self, s: _Session, discard: bool = False) -> str:
+        with self._lock:
+            if s not in self._leased:
+                return "desconhecido"
+            self._leased.discard(s)
+        if discard or not s.alive():
+            self._count("crashed" if not discard else "recycled")
+            s.quit()
+            return "descartado"
+        if s.uses >= MAX_USES:
+            self._count("recycled")
+            s.quit()
+            return "reciclado"
+        try:
+            s.reset()
+        except Exception as e:
+            logger.warn(f"Falha ao limpar a sessão do pool, descartando: {e}")
+            self._count("crashed")
+            s.quit()
+            return "descartado"
+        with self._lock:
+            if len(self._idle) < MAX_IDLE:
+                self._idle.append(s)
+                return "devolvido"
+        s.quit()
+        return "excedente"
+
+    def shutdown(self) -> None:
+        with self._lock:
+            sessions = self._idle + list(self._leased)
+            self._idle = []
+            self._leased = set()
+        for s in sessions:
+            s.quit()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self.stats, idle=len(self._idle), leased=len(self._leased),
+                        max_idle=MAX_IDLE, max_uses=MAX_USES)
+
+
+_POOL = _Pool()
+atexit.register(_POOL.shutdown)
+
+
+def _selenium():
+    return BuiltIn().get_library_instance("SeleniumLibrary")
+
+
+def _window_size(width, height):
+    # argumentos da keyword > ${WINDOW_WIDTH}/${WINDOW_HEIGHT} da suíte > WINDOW_SIZE
+    bi = BuiltIn()
+    width = width if width is not None else bi.get_variable_value("${WINDOW_WIDTH}", WINDOW_SIZE[0])
+    height = height if height is not None else bi.get_variable_value("${WINDOW_HEIGHT}", WINDOW_SIZE[1])
+    return int(width), int(height)
+
+
+def open_pooled_browser(url, browser: str = "headlesschrome", alias=None, width=None, height=None):
+    """Empresta um navegador do pool, registra no SeleniumLibrary (vira o browser atual) e abre `url`.
+
+    A janela usa `width`x`height` ou, sem eles, ${WINDOW_WIDTH}x${WINDOW_HEIGHT} da suíte; a devolução
+    ao pool restaura esse tamanho (não o padrão do módulo).
+    """
+    sl = _selenium()
+    s = _POOL.lease(browser, _window_size(width, height))
+    driver = _PooledDriver(s)
+    index = sl.register_driver(driver, alias)
+    logger.info(f"Navegador do pool ({browser}, uso {s.uses}/{MAX_USES}): {_POOL.snapshot()}")
+    driver.get(url)
+    return index
+
+
+def release_pooled_browser(discard: bool = False):
+    """Devolve o navegador atual ao pool (limpo) em vez de fechá-lo; `discard` força o descarte.
+
+    Usa o Close Browser do SeleniumLibrary: no navegador do pool o quit() devolve em vez de encerrar;
+    um navegador aberto fora do pool é fechado normalmente.
+    """
+    try:
+        driver = _selenium().driver
+    except Exception:
+        return "sem navegador"
+    if isinstance(driver, _PooledDriver) and str(discard).lower() in ("1", "true", "yes"):
+        object.__setattr__(driver, "_discard", True)
+    pooled = isinstance(driver, _PooledDriver)
+    BuiltIn().run_keyword("SeleniumLibrary.Close Browser")
+    return "devolvido ao pool" if pooled else "fechado"
+
+
+def browser_pool_stats():
+    """Keyword: contadores do pool (criados, reutilizados, reciclados, com falha, ociosos, emprestados)."""
+    return _POOL.snapshot()
+
+
+def close_browser_pool():
+    """Keyword: encerra todos os navegadores do pool (o atexit já faz isso no fim do processo)."""
+    _POOL.shutdown()
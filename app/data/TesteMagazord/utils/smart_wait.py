@@ -0,0 +1,202 @@
+import os
+import json
+import time
+from robot.api import logger
+from robot.libraries.BuiltIn import BuiltIn
+from robot.utils import timestr_to_secs
+from selenium.common.exceptions import (
+    ElementClickInterceptedException,
+    ElementNotInteractableException,
+    StaleElementReferenceException,
+)
+from selenium.webdriver.common.action_chains import ActionChains
+from selenium.webdriver.common.keys import Keys
+
+# Clique/preenchimento confiáveis: em vez de "espera fixa + scroll + Sleep + clique + clique via JS",
+# um único probe em JS é consultado em intervalos curtos até o elemento estar acionável
+# (conectado, visível, habilitado, parado na mesma posição e, para clique, sem nada por cima do centro).
+# Cada espera é registrada (tempo real, nº de consultas, motivo da última recusa) para ajustar timeouts.
+
+_POLL = 0.05
+
+# Retorna [alvo, motivo]: alvo = elemento a clicar (o próprio ou o <label> de checkbox/radio escondido)
+# quando acionável, senão null e o motivo da recusa.
+_PROBE = """
+const el = arguments[0], forFill = arguments[1];
+if (!el.isConnected) return [null, 'desconectado'];
+let target = el;
+const st = getComputedStyle(el);
+const hidden = el.offsetWidth === 0 || el.offsetHeight === 0 || st.visibility === 'hidden' || st.opacity === '0';
+if (hidden && !forFill && el.labels && el.labels.length && /^(checkbox|radio)$/.test(el.type)) target = el.labels[0];
+const ts = target === el ? st : getComputedStyle(target);
+if (target.offsetWidth === 0 || target.offsetHeight === 0 || ts.visibility === 'hidden' || ts.display === 'none')
+    return [null, 'invisível'];
+if (el.disabled || el.closest('fieldset[disabled]')) return [null, 'desabilitado'];
+if (forFill && el.readOnly) return [null, 'somente leitura'];
+let r = target.getBoundingClientRect();
+if (r.top < 0 || r.left < 0 || r.bottom > innerHeight || r.right > innerWidth) {
+    target.scrollIntoView({block: 'center', inline: 'center'});
+    return [null, 'fora da tela'];
+}
+const key = '__smartWaitRect';
+const prev = target[key];
+target[key] = [r.x, r.y, r.width, r.height].join();
+if (prev !== target[key]) return [null, 'em movimento'];
+if (target.getAnimations && target.getAnimations({subtree: false}).some(a => a.playState === 'running'))
+    return [null, 'animando'];
+// preenchimento não depende do centro estar livre: inputs de comboboxes (react-select) ficam sob o
+// placeholder/valor, e o texto vai por foco + teclas
+if (forFill) return [target, 'ok'];
+const hit = document.elementFromPoint(r.x + r.width / 2, r.y + r.height / 2);
+if (!hit || !(hit === target || target.contains(hit) || (hit.control && hit.control === el) || hit.contains(target)))
+    return [null, 'coberto por ' + (hit ? hit.tagName.toLowerCase() + (hit.id ? '#' + hit.id : hit.className ? '.' + String(hit.className).split(' ')[0] : '') : 'nada')];
+return [target, 'ok'];
+"""
+
+_RECORDS = []
+_SAVED = 0  # quantos registros já foram gravados por save_smart_wait_stats
+
+
+def _selenium():
+    return BuiltIn().get_library_instance("SeleniumLibrary")
+
+
+def _record(action, locator, t0, polls, reason, fallback=False):
+    waited = round((time.perf_counter() - t0) * 1000, 1)
+    _RECORDS.append({"action": action, "locator": str(locator), "waited_ms": waited, "polls": polls,
+                     "last_reason": reason, "js_fallback": fallback})
+    logger.info(f"{action} {locator}: acionável após {waited} ms ({polls} consulta(s)"
+                f"{', clique via JS' if fallback else ''}; último estado: {reason})")
+
+
+def _wait(locator, timeout, for_fill):
+    """Consulta o probe até o elemento ficar acionável. Retorna (elemento, alvo, consultas, motivo)."""
+    sl = _selenium()
+    deadline = time.perf_counter() + _timeout_secs(timeout)
+    polls = 0
+    reason = "não encontrado"
+    el = None
+    while True:
+        polls += 1
+        try:
+            if el is None:
+                found = sl.find_elements(locator)
+                el = found[0] if found else None
+            if el is not None:
+                target, reason = sl.driver.execute_script(_PROBE, el, bool(for_fill))
+                if target is not None:
+                    return el, target, polls, reason
+        except StaleElementReferenceException:
+            el, reason = None, "recriado no DOM"
+        if time.perf_counter() >= deadline:
+            return el, None, polls, reason
+        time.sleep(_POLL)
+
+
+def _timeout_secs(timeout) -> float:
+    return timestr_to_secs(timeout) if timeout is not None else _selenium().timeout
+
+
+def wait_until_actionable(locator, timeout="10s"):
+    """Keyword: espera `locator` ficar acionável (sem sleep fixo) e retorna o WebElement."""
+    t0 = time.perf_counter()
+    el, target, polls, reason = _wait(locator, timeout, for_fill=False)
+    _record("wait", locator, t0, polls, reason)
+    if target is None:
+        raise AssertionError(f"{locator} não ficou acionável em {timeout}: {reason}")
+    return el
+
+
+def reliable_click(locator, timeout="10s", js_fallback: bool = True):
+    """Keyword: clica em `locator` assim que estiver acionável.
+
+    Checkbox/radio escondidos por CSS recebem o clique no <label>. Se o clique nativo for
+    interceptado, o probe roda de novo até o prazo; só então, com `js_fallback`, usa element.click() via JS.
+    """
+    t0 = time.perf_counter()
+    deadline = t0 + _timeout_secs(timeout)
+    total = 0
+    while True:
+        remaining = max(0.0, deadline - time.perf_counter())
+        el, target, polls, reason = _wait(locator, remaining, for_fill=False)
+        total += polls
+        if target is not None:
+            try:
+                target.click()
+                _record("click", locator, t0, total, reason)
+                return
+            except (ElementClickInterceptedException, ElementNotInteractableException) as e:
+                reason = f"clique interceptado: {e.msg.splitlines()[0] if e.msg else type(e).__name__}"
+            except StaleElementReferenceException:
+                reason = "recriado no DOM"
+        if time.perf_counter() >= deadline:
+            break
+        time.sleep(_POLL)
+    if el is not None and str(js_fallback).lower() not in ("0", "false", "no"):
+        _selenium().driver.execute_script("arguments[0].click();", el)
+        _record("click", locator, t0, total, reason, fallback=True)
+        return
+    raise AssertionError(f"não foi possível clicar em {locator} em {timeout}: {reason}")
+
+
+def reliable_fill(locator, text, timeout="10s", clear: bool = True):
+    """Keyword: espera o campo ficar acionável, foca, limpa (opcional) e digita `text`.
+
+    Não exige o centro livre (inputs de combobox ficam sob o placeholder). Se o clique ou o send_keys
+    no elemento forem recusados, foca via JS e digita no elemento ativo.
+    """
+    t0 = time.perf_counter()
+    el, target, polls, reason = _wait(locator, timeout, for_fill=True)
+    if target is None:
+        _record("fill", locator, t0, polls, reason)
+        raise AssertionError(f"{locator} não ficou editável em {timeout}: {reason}")
+    driver = _selenium().driver
+    do_clear = str(clear).lower() not in ("0", "false", "no")
+    try:
+        el.click()
+    except (ElementClickInterceptedException, ElementNotInteractableException):
+        driver.execute_script("arguments[0].focus();", el)
+    try:
+        if do_clear:
+            el.clear()
+        el.send_keys(str(text))
+    except (ElementClickInterceptedException, ElementNotInteractableException):
+        driver.execute_script("arguments[0].focus();", el)
+        keys = ActionChains(driver)
+        if do_clear:
+            keys.key_down(Keys.CONTROL).send_keys("a").key_up(Keys.CONTROL).send_keys(Keys.DELETE)
+        keys.send_keys(str(text)).perform()
+        reason = "digitado no elemento focado"
+    _record("fill", locator, t0, polls, reason)
+
+
+def smart_wait_stats():
+    """Keyword: resumo por (ação, locator): execuções, espera média/máxima em ms e cliques via JS."""
+    summary = {}
+    for r in _RECORDS:
+        s = summary.setdefault(f"{r['action']} {r['locator']}", {"count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                                                                  "js_fallbacks": 0, "last_reason": ""})
+        s["count"] += 1
+        s["total_ms"] += r["waited_ms"]
+        s["max_ms"] = max(s["max_ms"], r["waited_ms"])
+        s["js_fallbacks"] += r["js_fallback"]
+        s["last_reason"] = r["last_reason"]
+    for s in summary.values():
+        s["avg_ms"] = round(s.pop("total_ms") / s["count"], 1)
+    return summary
+
+
+def save_smart_wait_stats(path=None):
+    """Keyword: acrescenta as esperas registradas em um JSON Lines (padrão: ${OUTPUT DIR}/smart_wait.jsonl)."""
+    global _SAVED
+    pending = _RECORDS[_SAVED:]
+    if not pending:
+        return None
+    if not path:
+        path = os.path.join(BuiltIn().get_variable_value("${OUTPUT DIR}", "."), "smart_wait.jsonl")
+    test = BuiltIn().get_variable_value("${TEST NAME}", "")
+    with open(path, "a", encoding="utf-8") as f:
+        for r in pending:
+            f.write(json.dumps(dict(r, test=test), ensure_ascii=False) + "\n")
+    _SAVED = len(_RECORDS)
+    return path
@@ -4,11 +4,12 @@ import os
 import re
 import sys
 import json
+import hashlib
 import platform
-import importlib
-import importlib.metadata
+import threading
+import subprocess
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from shutil import which
 
 def _which(cmd: str) -> Optional[str]:
@@ -28,47 +29,248 @@ def _parse_requirements(req_text: str) -> List[str]:
             pkgs.append(name)
     return sorted(set(pkgs), key=str.lower)
 
-def _import_ok(pkg: str) -> bool:
-    # mapeamento de melhor esforço entre nome pip e nome de importação
-    mapping = {
-        "robotframework": "robot",
-        # nome pip -> nome de importação
-        "Faker": "faker",
-        "Pillow": "PIL",
-        "pywin32": "win32api",
-        "python-dotenv": "dotenv",
-        "google-auth-oauthlib": "google_auth_oauthlib",
-        "google-auth": "google.auth",
-        "robotframework-databaselibrary": "DatabaseLibrary",
-        "robotframework-faker": "FakerLibrary",
-        "robotframework-retryfailed": "RetryFailed",
-        "robotframework-sikulilibrary": "SikuliLibrary",
-        "robotframework-requests": "RequestsLibrary",
-        "robotframework-seleniumlibrary": "SeleniumLibrary",
-    }
-    mod = mapping.get(pkg, pkg)
+# mapeamento de melhor esforço entre nome pip e nome de importação
+IMPORT_NAMES = {
+    "robotframework": "robot",
+    # nome pip -> nome de importação
+    "Faker": "faker",
+    "Pillow": "PIL",
+    "pywin32": "win32api",
+    "python-dotenv": "dotenv",
+    "google-auth-oauthlib": "google_auth_oauthlib",
+    "google-auth": "google.auth",
+    "robotframework-databaselibrary": "DatabaseLibrary",
+    "robotframework-faker": "FakerLibrary",
+    "robotframework-retryfailed": "RetryFailed",
+    "robotframework-sikulilibrary": "SikuliLibrary",
+    "robotframework-requests": "RequestsLibrary",
+    "robotframework-seleniumlibrary": "SeleniumLibrary",
+}
+
+
+def _import_name(pkg: str) -> str:
+    return IMPORT_NAMES.get(pkg, pkg)
+
+
+# Executado no interpretador alvo (python -c). Uma única chamada reporta tudo em JSON,
+# assim o servidor não importa bibliotecas pesadas nem consulta o interpretador errado (EXE).
+_PROBE_MARKER = "__PROBE__="
+_PROBE_SCRIPT = r"""
+import sys, json, platform, importlib
+try:
+    import importlib.metadata as md
+except Exception:
+    md = None
+real_stdout = sys.stdout
+sys.stdout = sys.stderr
+req = json.loads(sys.argv[1])
+out = {"python": sys.version.split()[0], "executable": sys.executable, "platform": platform.platform(), "packages": {}}
+for pkg, mod in req["packages"]:
+    info = {"version": None, "import_ok": False}
+    if md is not None:
+        try:
+            info["version"] = md.version(pkg)
+        except Exception:
+            pass
+    if req.get("imports", True):
+        try:
+            importlib.import_module(mod)
+            info["import_ok"] = True
+        except Exception as e:
+            info["import_error"] = str(e)[:200]
+    out["packages"][pkg] = info
+if req.get("requirements"):
+    try:
+        from packaging.requirements import Requirement
+    except Exception:
+        try:
+            from pip._vendor.packaging.requirements import Requirement
+        except Exception:
+            Requirement = None
+    items = []
+    for line in req["requirements"]:
+        item = {"line": line, "name": None, "installed": None, "satisfied": None}
+        if Requirement is not None:
+            try:
+                r = Requirement(line)
+                item["name"] = r.name
+                if r.marker is not None and not r.marker.evaluate():
+                    item["satisfied"] = True
+                else:
+                    try:
+                        item["installed"] = md.version(r.name) if md is not None else None
+                    except Exception:
+                        item["installed"] = None
+                    v = item["installed"]
+                    item["satisfied"] = v is not None and (not r.specifier or r.specifier.contains(v, prereleases=True))
+            except Exception as e:
+                item["error"] = str(e)[:200]
+        items.append(item)
+    out["requirements"] = items
+if req.get("imports", True):
     try:
-        importlib.import_module(mod)
-        return True
+        import robot
+        out["robot_module"] = getattr(robot, "__version__", "ok")
     except Exception:
-        return False
+        out["robot_module"] = None
+real_stdout.write("\n" + MARKER + json.dumps(out) + "\n")
+""".replace("MARKER", repr(_PROBE_MARKER))
+
+
+def probe_environment(
+    python_cmd: List[str],
+    pkgs: List[str],
+    timeout: float = 120.0,
+    requirements: Optional[List[str]] = None,
+    imports: bool = True,
+) -> Dict[str, Any]:
+    """Roda o script de sondagem no interpretador alvo e devolve o JSON reportado.
+
+    `requirements` (linhas PEP 508) são avaliadas contra as distribuições instaladas;
+    `imports=False` pula a importação dos pacotes (consulta rápida, só metadados).
+    """
+    payload = json.dumps({
+        "packages": [[p, _import_name(p)] for p in pkgs],
+        "imports": imports,
+        "requirements": requirements or [],
+    })
+    flags = 0
+    if getattr(sys, "frozen", False) and os.name == "nt":
+        flags = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+    p = subprocess.run(
+        list(python_cmd) + ["-c", _PROBE_SCRIPT, payload],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        timeout=timeout,
+        shell=False,
+        creationflags=flags,
+    )
+    stdout = (p.stdout or b"").decode("utf-8", errors="replace")
+    for line in reversed(stdout.splitlines()):
+        if line.startswith(_PROBE_MARKER):
+            return json.loads(line[len(_PROBE_MARKER):])
+    stderr = (p.stderr or b"").decode("utf-8", errors="replace")
+    raise RuntimeError(f"sondagem do interpretador falhou (rc={p.returncode}): {stderr[-500:]}")
+
+
+# ----------------------------
+# Cache da sondagem
+# ----------------------------
 
+_CACHE_LOCK = threading.Lock()
+_CACHE: Dict[str, Dict[str, Any]] = {}
+_CACHE_MAX = 16
 
-def _dist_ok(pkg: str) -> bool:
-    """Retorna True se a distribuição pip parece instalada (mesmo se a importação falhar)."""
-    # A consulta de metadados não diferencia maiúsculas/minúsculas e normaliza '-'/'_' internamente.
+
+def interpreter_key(python_cmd: List[str]) -> Tuple[str, float, str]:
+    """(caminho resolvido, mtime, argumentos extras) do interpretador; muda se ele for trocado/atualizado."""
+    exe = python_cmd[0] if python_cmd else sys.executable
+    path = exe if os.path.isfile(exe) else (which(exe) or exe)
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        mtime = 0.0
+    return os.path.abspath(path), mtime, " ".join(python_cmd[1:])
+
+
+def _cache_key(python_cmd: List[str], req_text: str) -> str:
+    # sem mtime aqui: com lançador (py -3) ele seria o do lançador; a validade vem do interpretador real
+    path, _mtime, extra = interpreter_key(python_cmd)
+    req_hash = hashlib.sha256(req_text.encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{path}|{extra}|{req_hash}".encode("utf-8")).hexdigest()
+
+
+def _exe_mtime(executable: Optional[str]) -> Optional[float]:
     try:
-        importlib.metadata.version(pkg)
-        return True
+        return os.stat(executable).st_mtime if executable else None
+    except OSError:
+        return None
+
+
+def _load_disk_cache(cache_path: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    if not cache_path or not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
     except Exception:
-        return False
+        return {}
+
+
+def cached_probe(python_cmd: List[str], req_text: str, cache_path: Optional[str] = None) -> Dict[str, Any]:
+    """Sondagem com cache em memória (e opcionalmente em disco) por interpretador + requirements.
 
-def run_checks(project_dir: str, requirements_path: str, python_cmd: list[str] | None = None) -> Dict[str, Any]:
+    Uma entrada vale enquanto o mtime do `executable` informado pela própria sondagem não mudar
+    (o interpretador de fato, mesmo quando o comando é um lançador como `py -3`).
+    """
+    key = _cache_key(python_cmd, req_text)
+    with _CACHE_LOCK:
+        if not _CACHE and cache_path:
+            _CACHE.update(_load_disk_cache(cache_path))
+        entry = _CACHE.get(key)
+    if entry is not None and isinstance(entry.get("probe"), dict):
+        mtime = _exe_mtime(entry["probe"].get("executable"))
+        if mtime is not None and mtime == entry.get("exe_mtime"):
+            return entry["probe"]
+
+    probe = probe_environment(python_cmd, _parse_requirements(req_text))
+    with _CACHE_LOCK:
+        # só a chave vencida é trocada; sondagens de outros interpretadores/requirements continuam valendo
+        _CACHE.pop(key, None)
+        _CACHE[key] = {"probe": probe, "exe_mtime": _exe_mtime(probe.get("executable"))}
+        while len(_CACHE) > _CACHE_MAX:
+            _CACHE.pop(next(iter(_CACHE)))
+        if cache_path:
+            try:
+                with open(cache_path, "w", encoding="utf-8") as f:
+                    json.dump(_CACHE, f)
+            except Exception:
+                pass
+    return probe
+
+
+def invalidate_cache(cache_path: Optional[str] = None) -> None:
+    """Descarta a sondagem em cache (chamar após instalar/alterar dependências)."""
+    with _CACHE_LOCK:
+        _CACHE.clear()
+    if cache_path:
+        try:
+            os.remove(cache_path)
+        except OSError:
+            pass
+
+
+def _robot_cmd(executable: Optional[str], robot_module: Any) -> Optional[str]:
+    """Comando do robot no interpretador sondado (não no PATH do servidor).
+
+    Script `robot` ao lado do executável (bin/ no venv POSIX; Scripts/ no Windows); senão `python -m robot`,
+    que é como o servidor executa, se o módulo importa; None se o robot não está instalado nele.
+    """
+    if not executable:
+        return None
+    exe_dir = os.path.dirname(executable)
+    names = ("robot.exe", "robot") if os.name == "nt" else ("robot",)
+    for d in (exe_dir, os.path.join(exe_dir, "Scripts")):
+        for n in names:
+            cand = os.path.join(d, n)
+            if os.path.isfile(cand):
+                return cand
+    return f"{executable} -m robot" if robot_module else None
+
+
+def run_checks(
+    project_dir: str,
+    requirements_path: str,
+    python_cmd: list[str] | None = None,
+    cache_path: Optional[str] = None,
+) -> Dict[str, Any]:
+    python_cmd = list(python_cmd or [sys.executable])
     info: Dict[str, Any] = {
         "platform": platform.platform(),
-        "python": sys.version.split()[0],
-        "python_exe": (python_cmd[0] if python_cmd else sys.executable),
-        "robot_cmd": _which("robot"),
+        "python": None,
+        "python_exe": python_cmd[0],
+        "robot_cmd": None,
         "pip_cmd": _which("pip"),
         "node_cmd": _which("node"),
         "npm_cmd": _which("npm"),
@@ -80,47 +282,56 @@ def run_checks(project_dir: str, requirements_path: str, python_cmd: list[str] |
         "packages_installed_but_import_failed": [],
     }
 
-    # verificação do módulo Python robot
     try:
-        import robot  # type: ignore
-        info["robot_module"] = getattr(robot, "__version__", "ok")
-    except Exception:
+        with open(requirements_path, "r", encoding="utf-8", errors="ignore") as f:
+            req_text = f.read()
+    except Exception as e:
+        req_text = ""
+        info["ok"] = False
+        info["problems"].append(f"Falha ao ler requirements.txt: {e}")
+
+    try:
+        probe = cached_probe(python_cmd, req_text, cache_path=cache_path)
+    except Exception as e:
+        info["ok"] = False
         info["robot_module"] = None
+        info["problems"].append(f"Não foi possível consultar o interpretador Python ({' '.join(python_cmd)}): {e}")
+        return info
+
+    info["python"] = probe.get("python")
+    info["python_exe"] = probe.get("executable") or python_cmd[0]
+    info["platform"] = probe.get("platform") or info["platform"]
+    info["package_versions"] = {k: v.get("version") for k, v in (probe.get("packages") or {}).items()}
+
+    # verificação do módulo Python robot (o servidor executa "python -m robot" no interpretador sondado)
+    info["robot_module"] = probe.get("robot_module")
+    info["robot_cmd"] = _robot_cmd(probe.get("executable"), info["robot_module"])
+    if not info["robot_module"]:
         info["ok"] = False
         info["problems"].append("Robot Framework (módulo Python) não encontrado. Instale robotframework.")
 
-    if not info["robot_cmd"]:
+    # validação dos requirements (importação + metadados, no interpretador alvo)
+    for pkg in _parse_requirements(req_text):
+        p = (probe.get("packages") or {}).get(pkg) or {}
+        imp_ok = bool(p.get("import_ok"))
+        dist_ok = bool(p.get("version"))
+        if imp_ok or dist_ok:
+            info["packages_ok"].append(pkg)
+            if (not imp_ok) and dist_ok:
+                info["packages_installed_but_import_failed"].append(pkg)
+        else:
+            info["packages_missing"].append(pkg)
+    if info["packages_missing"]:
         info["ok"] = False
-        info["problems"].append("Comando 'robot' não encontrado no PATH. Verifique instalação/venv.")
+        info["problems"].append(
+            "Algumas bibliotecas do requirements.txt parecem ausentes (melhor esforço via importação)."
+        )
 
-    # validação de melhor esforço dos requirements via importação
-    try:
-        with open(requirements_path, "r", encoding="utf-8", errors="ignore") as f:
-            req_text = f.read()
-        pkgs = _parse_requirements(req_text)
-        for pkg in pkgs:
-            imp_ok = _import_ok(pkg)
-            dist_ok = _dist_ok(pkg)
-            if imp_ok or dist_ok:
-                info["packages_ok"].append(pkg)
-                if (not imp_ok) and dist_ok:
-                    info["packages_installed_but_import_failed"].append(pkg)
-            else:
-                info["packages_missing"].append(pkg)
-        if info["packages_missing"]:
-            info["ok"] = False
-            info["problems"].append(
-                "Algumas bibliotecas do requirements.txt parecem ausentes (melhor esforço via importação)."
-            )
-
-        if info["packages_installed_but_import_failed"]:
-            info["ok"] = False
-            info["problems"].append(
-                "Algumas bibliotecas estão instaladas, mas falharam ao importar (pode indicar incompatibilidade com sua versão do Python)."
-            )
-    except Exception as e:
+    if info["packages_installed_but_import_failed"]:
         info["ok"] = False
-        info["problems"].append(f"Falha ao ler/validar requirements.txt: {e}")
+        info["problems"].append(
+            "Algumas bibliotecas estão instaladas, mas falharam ao importar (pode indicar incompatibilidade com sua versão do Python)."
+        )
 
     # Node é opcional (algumas suítes podem não precisar), mas avisa
     if not info["node_cmd"]:
@@ -128,4 +339,4 @@ def run_checks(project_dir: str, requirements_path: str, python_cmd: list[str] |
     if not info["npm_cmd"]:
         info["problems"].append("NPM não encontrado no PATH (opcional).")
 
-    return info
\ No newline at end of file
+    return info
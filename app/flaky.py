@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import re
+import html
+import shutil
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from run_history import RunHistory, summarize_output
+
+# Detector de testes instáveis a partir do histórico de execuções (static/runs).
+#
+# Por teste (suíte::nome), em ordem cronológica: taxa de alternância PASS<->FAIL, agrupamento das falhas
+# por mensagem normalizada (números, ids e coordenadas viram <n>) e as keywords que falharam.
+# Um teste que alterna é "flaky"; um que falha sempre (ou voltou a falhar de forma consistente) é "broken".
+# A política de retry reexecuta, na mesma execução, só os testes que falharam E são sabidamente flaky.
+
+WINDOW = 30            # últimas N execuções de cada teste
+MIN_RUNS = 3           # abaixo disso: "insufficient"
+BROKEN_STREAK = 3      # N falhas seguidas no fim do histórico = quebrado, não instável
+CONFIDENT_RUNS = 8     # a partir daqui o score não é mais descontado por pouco histórico
+MIN_RETRY_SCORE = 0.15
+MAX_RETRIES = 3
+
+_NUM_RE = re.compile(r"(?<![A-Za-z])-?\d+(?:\.\d+)*")
+_HEX_RE = re.compile(r"\b[0-9a-fA-F]{8,}\b")
+_QUERY_RE = re.compile(r"(https?://[^\s?#]+)[?#]\S*")
+_SPACE_RE = re.compile(r"\s+")
+# Mensagem gerada pelo rebot --merge: "New status" (última tentativa) seguido dos "Old status" anteriores
+_MERGE_RE = re.compile(
+    r'(?:New|Old) status:</span> <span class="\w+">(\w+)</span><br>'
+    r'(?:<span class="(?:new|old)-message">(?:New|Old) message:</span> (.*?)<br>)?'
+)
+
+
+def message_signature(message: str) -> str:
+    """Mensagem de falha sem as partes que mudam a cada execução (para agrupar falhas da mesma causa)."""
+    first = (message or "").strip().splitlines()[0] if (message or "").strip() else ""
+    s = _QUERY_RE.sub(r"\1", first)
+    s = _HEX_RE.sub("<id>", s)
+    s = _NUM_RE.sub("<n>", s)
+    s = _SPACE_RE.sub(" ", s).strip()
+    return s[:200]
+
+
+def merged_attempts(message: str) -> Optional[List[Tuple[str, str]]]:
+    """Tentativas (status, mensagem) em ordem cronológica de um teste mesclado pelo retry; None se não foi."""
+    if not (message or "").startswith("*HTML*") or 'class="merge"' not in message:
+        return None
+    found = [(st, html.unescape(msg or "")) for st, msg in _MERGE_RE.findall(message)]
+    return list(reversed(found)) or None
+
+
+@dataclass
+class TestFlakiness:
+    key: str
+    suite: str
+    name: str
+    history: List[Tuple[str, str]] = field(default_factory=list)  # (run_id, PASS/FAIL)
+    messages: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    keywords: Counter = field(default_factory=Counter)
+
+    def add(self, run_id: str, test: Dict[str, Any]) -> None:
+        # execução com retry: cada tentativa conta (uma falha recuperada no retry é o sinal mais claro)
+        attempts = merged_attempts(test.get("message", "")) or [(test.get("status"), test.get("message", ""))]
+        for i, (status, message) in enumerate(attempts):
+            last = i == len(attempts) - 1
+            self._add_attempt(run_id, status, message, test.get("failed_keyword") if last else "")
+
+    def _add_attempt(self, run_id: str, status: Optional[str], message: str, failed_keyword: str) -> None:
+        if status not in ("PASS", "FAIL"):
+            return  # SKIP/NOT RUN não dizem nada sobre estabilidade
+        self.history.append((run_id, status))
+        if len(self.history) > WINDOW:
+            self.history.pop(0)
+        if status == "FAIL":
+            sig = message_signature(message)
+            m = self.messages.setdefault(sig, {"count": 0, "example": "", "last_run": ""})
+            m["count"] += 1
+            m["example"] = (message or "")[:300]
+            m["last_run"] = run_id
+            if failed_keyword:
+                self.keywords[failed_keyword] += 1
+
+    @property
+    def runs(self) -> int:
+        return len(self.history)
+
+    @property
+    def failures(self) -> int:
+        return sum(1 for _r, s in self.history if s == "FAIL")
+
+    @property
+    def flips(self) -> int:
+        return sum(1 for a, b in zip(self.history, self.history[1:]) if a[1] != b[1])
+
+    @property
+    def flip_rate(self) -> float:
+        return self.flips / (self.runs - 1) if self.runs > 1 else 0.0
+
+    @property
+    def fail_streak(self) -> int:
+        n = 0
+        for _r, s in reversed(self.history):
+            if s != "FAIL":
+                break
+            n += 1
+        return n
+
+    @property
+    def classification(self) -> str:
+        if self.failures == 0:
+            return "stable"
+        if self.failures == self.runs or self.fail_streak >= BROKEN_STREAK:
+            return "broken"
+        if self.runs < MIN_RUNS:
+            return "insufficient"
+        return "flaky"
+
+    @property
+    def score(self) -> float:
+        """Alternância descontada por pouco histórico (0..1); só faz sentido para 'flaky'."""
+        if self.classification != "flaky":
+            return 0.0
+        return round(self.flip_rate * min(1.0, self.runs / CONFIDENT_RUNS), 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        clusters = sorted(
+            ({"signature": sig, **m} for sig, m in self.messages.items()),
+            key=lambda c: c["count"], reverse=True,
+        )
+        return {
+            "key": self.key,
+            "suite": self.suite,
+            "name": self.name,
+            "classification": self.classification,
+            "score": self.score,
+            "runs": self.runs,
+            "failures": self.failures,
+            "fail_rate": round(self.failures / self.runs, 3) if self.runs else 0.0,
+            "flips": self.flips,
+            "flip_rate": round(self.flip_rate, 3),
+            "fail_streak": self.fail_streak,
+            "last_status": self.history[-1][1] if self.history else None,
+            "timeline": "".join("P" if s == "PASS" else "F" for _r, s in self.history),
+            "message_clusters": clusters[:5],
+            "failing_keywords": [{"keyword": k, "count": c} for k, c in self.keywords.most_common(5)],
+        }
+
+
+def analyze(summaries: Iterable[Tuple[str, Dict[str, Any]]]) -> Dict[str, TestFlakiness]:
+    """Monta o histórico por teste a partir de (run_id, resumo) em ordem cronológica."""
+    tests: Dict[str, TestFlakiness] = {}
+    for run_id, data in summaries:
+        for t in data.get("tests") or []:
+            key = f"{t.get('suite')}::{t.get('name')}"
+            st = tests.get(key)
+            if st is None:
+                st = tests[key] = TestFlakiness(key, t.get("suite", ""), t.get("name", ""))
+            st.add(run_id, t)
+    return tests
+
+
+def _rank_key(t: TestFlakiness) -> Tuple[int, float, float]:
+    order = {"flaky": 0, "broken": 1, "insufficient": 2, "stable": 3}[t.classification]
+    return (order, -t.score, -(t.failures / t.runs if t.runs else 0.0))
+
+
+def flaky_report(history: RunHistory, include_stable: bool = False, exclude_run: Optional[str] = None,
+                 limit: Optional[int] = None) -> Dict[str, Any]:
+    """Lista ranqueada (instáveis primeiro, por score) e contagem por classificação."""
+    tests = analyze((r, d) for r, d in history.iter_summaries() if r != exclude_run)
+    ranked = sorted(tests.values(), key=_rank_key)
+    counts = Counter(t.classification for t in ranked)
+    if not include_stable:
+        ranked = [t for t in ranked if t.classification != "stable"]
+    if limit:
+        ranked = ranked[:limit]
+    return {
+        "counts": {c: counts.get(c, 0) for c in ("flaky", "broken", "insufficient", "stable")},
+        "tests": [t.to_dict() for t in ranked],
+    }
+
+
+def known_flaky(history: RunHistory, exclude_run: Optional[str] = None,
+                min_score: float = MIN_RETRY_SCORE) -> Set[str]:
+    """Chaves suíte::nome dos testes que a política de retry pode reexecutar."""
+    tests = analyze((r, d) for r, d in history.iter_summaries() if r != exclude_run)
+    return {k for k, t in tests.items() if t.classification == "flaky" and t.score >= min_score}
+
+
+def _test_pattern(longname: str) -> str:
+    # --test aceita padrões (*, ?, [..]); escapa para casar só o nome completo literal
+    return re.sub(r"([*?\[])", r"[\1]", longname)
+
+
+def retry_flaky_failures(
+    out_dir: Path,
+    project_name: str,
+    flaky: Set[str],
+    run_robot: Callable[[List[str], Path], int],
+    merge: Callable[[List[Path], Path], int],
+    retries: int = 1,
+) -> Dict[str, Any]:
+    """Reexecuta só os testes que falharam em out_dir/output.xml e estão em `flaky`; junta com rebot --merge.
+
+    `run_robot(padroes_de_teste, dir_saida)` executa o robot com a mesma seleção original restrita a
+    esses testes e devolve o rc; `merge(outputs, dir_saida)` chama o rebot --merge. O output.xml original
+    fica em output_first.xml e cada tentativa em retry_<n>/.
+    """
+    xml = out_dir / "output.xml"
+    report: Dict[str, Any] = {"attempts": [], "retried": [], "recovered": [], "still_failing": []}
+    if not xml.exists() or not flaky:
+        return report
+    summary = summarize_output(xml, project_name)
+    failed = [t for t in summary["tests"] if t["status"] == "FAIL" and f"{t['suite']}::{t['name']}" in flaky]
+    if not failed:
+        return report
+
+    first = out_dir / "output_first.xml"
+    shutil.copyfile(xml, first)
+    outputs = [first]
+    pending = {t["longname"]: f"{t['suite']}::{t['name']}" for t in failed}
+    report["retried"] = sorted(pending.values())
+    for attempt in range(1, max(1, min(MAX_RETRIES, int(retries))) + 1):
+        retry_dir = out_dir / f"retry_{attempt}"
+        retry_dir.mkdir(parents=True, exist_ok=True)
+        rc = run_robot([_test_pattern(n) for n in pending], retry_dir)
+        report["attempts"].append({"attempt": attempt, "tests": sorted(pending.values()), "returncode": rc})
+        retry_xml = retry_dir / "output.xml"
+        if not retry_xml.exists():
+            break
+        outputs.append(retry_xml)
+        for t in summarize_output(retry_xml, project_name)["tests"]:
+            if t["status"] == "PASS" and t["longname"] in pending:
+                report["recovered"].append(pending.pop(t["longname"]))
+        if not pending:
+            break
+
+    report["still_failing"] = sorted(pending.values())
+    report["merge_returncode"] = merge(outputs, out_dir)
+    return report
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import os
+import json
+import hashlib
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from env_check import interpreter_key, probe_environment
+
+
+def requirement_lines(req_text: str) -> Tuple[List[str], bool]:
+    """Linhas de requisito instaláveis individualmente + flag se há algo que exige 'pip install -r'.
+
+    Opções (-r, --index-url...), editáveis e URLs não são avaliadas pelo planejador; nesses casos
+    o plano cai para a instalação completa do arquivo.
+    """
+    lines: List[str] = []
+    unsupported = False
+    for raw in req_text.splitlines():
+        line = raw.split(" #", 1)[0].strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith(("-", "git+", "http:", "https:", "./", "../", "file:")) or " @ " in line:
+            unsupported = True
+            continue
+        lines.append(line)
+    return lines, unsupported
+
+
+def requirements_hash(req_text: str) -> str:
+    return hashlib.sha256(req_text.encode("utf-8")).hexdigest()
+
+
+def find_wheelhouse(default_dir: Path) -> Optional[str]:
+    """Diretório local de wheels (MAGAZORD_WHEELHOUSE ou data/_wheelhouse) se existir e tiver wheels."""
+    env = (os.environ.get("MAGAZORD_WHEELHOUSE") or "").strip().strip('"')
+    for cand in ([Path(env)] if env else []) + [default_dir]:
+        try:
+            if cand.is_dir() and any(cand.glob("*.whl")):
+                return str(cand.resolve())
+        except OSError:
+            continue
+    return None
+
+
+@dataclass
+class InstallPlan:
+    req_hash: str
+    interpreter: str
+    to_install: List[str] = field(default_factory=list)
+    satisfied: List[str] = field(default_factory=list)
+    full: bool = False
+    wheelhouse: Optional[str] = None
+    reason: str = ""
+    from_lock: bool = False  # lock confere com o ambiente sondado: não precisa regravá-lo
+
+    @property
+    def nothing_to_do(self) -> bool:
+        return not self.full and not self.to_install
+
+    def pip_args(self, requirements_path: str) -> List[str]:
+        args = ["-m", "pip", "install", "--disable-pip-version-check"]
+        if self.wheelhouse:
+            # offline: resolve apenas a partir das wheels locais
+            args += ["--no-index", "--find-links", self.wheelhouse]
+        if self.full:
+            args += ["-r", requirements_path]
+        else:
+            args += self.to_install
+        return args
+
+    def describe(self) -> List[str]:
+        out = [f"Plano de instalação: {self.reason}"]
+        if self.satisfied:
+            out.append(f"  já satisfeitos ({len(self.satisfied)}): {', '.join(self.satisfied)}")
+        if self.full:
+            out.append("  instalação completa do requirements.txt")
+        elif self.to_install:
+            out.append(f"  a instalar ({len(self.to_install)}): {', '.join(self.to_install)}")
+        if self.wheelhouse:
+            out.append(f"  wheelhouse local: {self.wheelhouse}")
+        return out
+
+
+def _read_lock(lock_path: Path) -> Dict[str, Any]:
+    try:
+        return json.loads(lock_path.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+
+def _probe_requirements(python_cmd: List[str], lines: List[str]) -> List[Dict[str, Any]]:
+    probe = probe_environment(python_cmd, [], requirements=lines, imports=False, timeout=60.0)
+    return probe.get("requirements") or []
+
+
+def plan_install(
+    python_cmd: List[str],
+    requirements_path: Path,
+    lock_path: Path,
+    wheelhouse: Optional[str] = None,
+    force: bool = False,
+) -> InstallPlan:
+    """Compara requirements + lock + distribuições instaladas e decide o mínimo a instalar.
+
+    A sondagem (só metadados, sem importar pacotes) roda sempre, mesmo com lock válido: um `pip uninstall`
+    manual desde a última instalação aparece como pacote a instalar.
+    """
+    req_text = requirements_path.read_text(encoding="utf-8", errors="ignore")
+    interp = "|".join(str(x) for x in interpreter_key(python_cmd))
+    plan = InstallPlan(req_hash=requirements_hash(req_text), interpreter=interp, wheelhouse=wheelhouse)
+
+    lines, unsupported = requirement_lines(req_text)
+    if force or unsupported:
+        plan.full = True
+        plan.reason = "instalação forçada" if force else "requirements com opções/URLs (pip install -r)"
+        return plan
+
+    # lock gravado por uma instalação bem-sucedida com este mesmo requirements e interpretador
+    lock = _read_lock(lock_path)
+    lock_match = lock.get("requirements_sha256") == plan.req_hash and lock.get("interpreter") == interp
+
+    try:
+        items = _probe_requirements(python_cmd, lines)
+    except Exception as e:
+        plan.full = True
+        plan.reason = f"não foi possível avaliar o ambiente ({e})"
+        return plan
+
+    for item in items:
+        if item.get("satisfied") is True:
+            plan.satisfied.append(item.get("name") or item["line"])
+        elif item.get("satisfied") is None:
+            # packaging indisponível no interpretador: sem como comparar versões
+            plan.full = True
+            plan.reason = "interpretador sem 'packaging' para comparar versões"
+            return plan
+        else:
+            plan.to_install.append(item["line"])
+
+    if plan.to_install:
+        plan.reason = f"{len(plan.to_install)} pacote(s) ausente(s) ou com versão divergente"
+    elif lock_match and _installed_versions(items) == (lock.get("installed") or {}):
+        plan.from_lock = True
+        plan.reason = "lock confere com o ambiente (requirements, interpretador e versões instaladas)"
+    else:
+        plan.reason = "todas as dependências já estão satisfeitas"
+    return plan
+
+
+def _installed_versions(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {(i.get("name") or i["line"]): i.get("installed") for i in items}
+
+
+def record_lock(python_cmd: List[str], requirements_path: Path, lock_path: Path) -> Dict[str, Any]:
+    """Grava o estado instalado (hash do requirements + versões resolvidas) após instalar."""
+    req_text = requirements_path.read_text(encoding="utf-8", errors="ignore")
+    lines, _unsupported = requirement_lines(req_text)
+    try:
+        items = _probe_requirements(python_cmd, lines)
+    except Exception:
+        items = []
+    lock = {
+        "requirements_sha256": requirements_hash(req_text),
+        "interpreter": "|".join(str(x) for x in interpreter_key(python_cmd)),
+        "installed": _installed_versions(items),
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    try:
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        lock_path.write_text(json.dumps(lock, ensure_ascii=False, indent=2), encoding="utf-8")
+    except Exception:
+        pass
+    return lock
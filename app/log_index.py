@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import json
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from run_history import STEP_TAGS, _status_elapsed, suite_key_from_source
+
+# Explorador de log no servidor: o output.xml é pré-processado uma vez num índice plano de nós
+# (suíte/teste/keyword -> filhos) gravado ao lado dele; a interface pede só o nó que está expandindo,
+# em vez de o navegador carregar e interpretar o log.html inteiro antes de mostrar qualquer coisa.
+#
+# Ids seguem o padrão do log do Robot: s1, s1-s2, s1-s2-t1, s1-s2-t1-k3...
+
+INDEX_NAME = "_log_index.json"
+INDEX_VERSION = 1
+
+TEXT_MAX = 2000      # mensagens/argumentos maiores são cortados (o log.html continua tendo o texto completo)
+MSGS_MAX = 50        # mensagens de log guardadas por keyword
+MEM_RUNS = 4         # índices mantidos em memória
+
+
+def _cut(text: Optional[str], limit: int = TEXT_MAX) -> str:
+    text = (text or "").strip()
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+def _step_name(elem: ET.Element) -> str:
+    tag = elem.tag
+    if tag == "kw":
+        return elem.get("name", "")
+    if tag == "branch":
+        return f"{elem.get('type', 'BRANCH')} {elem.get('condition') or elem.get('pattern') or ''}".strip()
+    if tag == "for":
+        return f"FOR {elem.get('flavor', 'IN')}"
+    if tag == "while":
+        return f"WHILE {elem.get('condition') or ''}".strip()
+    if tag == "variable":
+        return f"VAR {elem.get('name', '')}"
+    if tag == "group":
+        return f"GROUP {elem.get('name', '')}".strip()
+    return tag.upper()
+
+
+def build_index(xml_path: Path, project_name: str) -> Dict[str, Any]:
+    """Lê o output.xml em streaming e devolve {nodes: {id: nó}, root, failed_tests}."""
+    nodes: Dict[str, Dict[str, Any]] = {}
+    failed_tests: List[Dict[str, Any]] = []
+    stack: List[str] = []
+    open_nodes: List[Dict[str, Any]] = []   # nós abertos (suíte/teste/passo), do externo ao interno
+    counters: List[Dict[str, int]] = []     # próximos índices s/t/k de cada nó aberto
+    root: Optional[str] = None
+    names: List[str] = []
+
+    for event, elem in ET.iterparse(str(xml_path), events=("start", "end")):
+        tag = elem.tag
+        if tag in ("statistics", "errors") or "statistics" in stack or "errors" in stack:
+            if event == "start":
+                stack.append(tag)
+            else:
+                stack.pop()
+                elem.clear()
+            continue
+
+        if event == "start":
+            stack.append(tag)
+            if tag not in ("suite", "test") and tag not in STEP_TAGS:
+                continue
+            if tag in ("suite", "test") and elem.get("id"):
+                node_id = elem.get("id")
+            else:
+                prefix = {"suite": "s", "test": "t"}.get(tag, "k")
+                if counters:
+                    n = counters[-1][prefix] = counters[-1].get(prefix, 0) + 1
+                    node_id = f"{open_nodes[-1]['id']}-{prefix}{n}"
+                else:
+                    node_id = "s1"
+            node: Dict[str, Any] = {"id": node_id, "type": tag, "name": _step_name(elem) if tag in STEP_TAGS
+                                    else elem.get("name", ""), "status": None, "elapsed": 0.0, "children": []}
+            if tag == "suite":
+                node["source"] = suite_key_from_source(elem.get("source", ""), project_name)
+                names.append(elem.get("name", ""))
+            elif tag == "test":
+                node["longname"] = ".".join(names + [elem.get("name", "")])
+            elif tag == "kw":
+                if elem.get("owner"):
+                    node["owner"] = elem.get("owner")
+                if elem.get("type"):
+                    node["kwtype"] = elem.get("type")
+            if open_nodes:
+                open_nodes[-1]["children"].append(node_id)
+            else:
+                root = node_id
+            nodes[node_id] = node
+            open_nodes.append(node)
+            counters.append({})
+            continue
+
+        # event == "end"
+        stack.pop()
+        parent = stack[-1] if stack else None
+        cur = open_nodes[-1] if open_nodes else None
+        if tag == "status" and cur is not None and parent == cur["type"]:
+            cur["status"] = elem.get("status")
+            cur["elapsed"] = round(_status_elapsed(elem.attrib), 6)
+            start = elem.get("start") or elem.get("starttime")
+            if start:
+                cur["start"] = start
+            if elem.text and elem.text.strip():
+                cur["message"] = _cut(elem.text)
+        elif tag == "msg" and cur is not None and parent == cur["type"]:
+            msgs = cur.setdefault("msgs", [])
+            if len(msgs) < MSGS_MAX:
+                msgs.append([elem.get("time") or elem.get("timestamp") or "", elem.get("level", "INFO"),
+                             _cut(elem.text)])
+            else:
+                cur["msgs_omitted"] = cur.get("msgs_omitted", 0) + 1
+            elem.clear()
+        elif tag in ("arg", "tag", "var") and cur is not None and parent == cur["type"]:
+            key = {"arg": "args", "tag": "tags", "var": "vars"}[tag]
+            value = _cut(elem.text, 500)
+            if tag == "var" and elem.get("name"):
+                value = f"{elem.get('name')} = {value}"
+            cur.setdefault(key, []).append(value)
+        elif tag == "doc" and cur is not None and parent == cur["type"]:
+            cur["doc"] = _cut(elem.text, 500)
+        elif cur is not None and tag == cur["type"] and (tag in ("suite", "test") or tag in STEP_TAGS):
+            open_nodes.pop()
+            counters.pop()
+            if tag == "suite":
+                names.pop()
+            elif tag == "test" and cur["status"] == "FAIL":
+                failed_tests.append({"id": cur["id"], "name": cur["name"], "longname": cur["longname"],
+                                     "message": _cut(cur.get("message"), 300)})
+            elem.clear()
+
+    return {"version": INDEX_VERSION, "root": root, "nodes": nodes, "failed_tests": failed_tests}
+
+
+def _brief(node: Dict[str, Any]) -> Dict[str, Any]:
+    """Nó sem filhos carregados: o suficiente para desenhar a linha e saber se é expansível."""
+    out = {k: node[k] for k in ("id", "type", "name", "status", "elapsed") if k in node}
+    for k in ("owner", "kwtype", "message"):
+        if k in node:
+            out[k] = node[k] if k != "message" else _cut(node[k], 300)
+    out["children_count"] = len(node["children"])
+    return out
+
+
+def subtree(index: Dict[str, Any], node_id: str, depth: int = 1, expand_fail: bool = False) -> Optional[Dict[str, Any]]:
+    """Nó `node_id` completo com filhos até `depth` níveis; com `expand_fail`, o caminho de falha
+    (filhos FAIL) é aberto até a keyword mais interna, independentemente de `depth`."""
+    nodes = index["nodes"]
+    node = nodes.get(node_id)
+    if node is None:
+        return None
+
+    def build(n: Dict[str, Any], level: int) -> Dict[str, Any]:
+        out = {k: v for k, v in n.items() if k != "children"}
+        out["children_count"] = len(n["children"])
+        children = []
+        for cid in n["children"]:
+            child = nodes[cid]
+            if level < depth or (expand_fail and child["status"] == "FAIL"):
+                children.append(build(child, level + 1))
+            else:
+                children.append(_brief(child))
+        out["children"] = children
+        return out
+
+    return build(node, 0)
+
+
+class LogIndex:
+    """Índices por execução (arquivo ao lado do output.xml + poucos em memória), invalidados pelo mtime."""
+
+    def __init__(self, project_name: str) -> None:
+        self.project_name = project_name
+        self._lock = threading.Lock()
+        self._mem: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def load(self, run_dir: Path) -> Optional[Dict[str, Any]]:
+        xml = run_dir / "output.xml"
+        try:
+            mtime = xml.stat().st_mtime
+        except OSError:
+            return None
+        key = str(run_dir)
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit and hit[0] == mtime:
+                self._mem.move_to_end(key)
+                return hit[1]
+
+        cache = run_dir / INDEX_NAME
+        data: Optional[Dict[str, Any]] = None
+        try:
+            if cache.exists():
+                cached = json.loads(cache.read_text(encoding="utf-8"))
+                if cached.get("version") == INDEX_VERSION and cached.get("source_mtime") == mtime:
+                    data = cached
+        except Exception:
+            data = None
+
+        if data is None:
+            try:
+                data = build_index(xml, self.project_name)
+            except ET.ParseError:
+                # execução interrompida (ou ainda rodando): output.xml incompleto
+                return None
+            data["source_mtime"] = mtime
+            try:
+                cache.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+            except Exception:
+                pass
+
+        with self._lock:
+            self._mem[key] = (mtime, data)
+            self._mem.move_to_end(key)
+            while len(self._mem) > MEM_RUNS:
+                self._mem.popitem(last=False)
+        return data
+
+    def warm(self, run_dir: Path) -> None:
+        """Pré-processa em segundo plano logo após a execução (a primeira expansão já encontra o índice)."""
+        threading.Thread(target=self.load, args=(run_dir,), name="log-index", daemon=True).start()
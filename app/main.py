@@ -12,23 +12,66 @@ import textwrap
 import threading
 import subprocess
 import socket
+import xml.etree.ElementTree as ET
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 from flask import Flask, jsonify, request, send_file, send_from_directory, abort, Response
 
-from env_check import run_checks
+from env_check import invalidate_cache as invalidate_env_cache, run_checks
+from run_history import DurationModel, RunHistory, lpt_pack
+from log_index import LogIndex, subtree
+from flaky import flaky_report, known_flaky, retry_flaky_failures
+from run_diff import DEFAULT_MAX_KEYWORDS, DEFAULT_THRESHOLD_PCT, DEFAULT_THRESHOLD_SEC, diff_runs
+from robot_pool import PoolUnavailable, RobotPool, group_popen_kwargs, kill_tree
+from matrix_run import DEFAULT_MATRIX, max_parallel, non_browser_suites, parse_matrix, run_matrix
+from install_planner import find_wheelhouse, plan_install, record_lock
+from venv_manager import LOCK_NAME, VenvManager
 
 def _is_frozen() -> bool:
     return bool(getattr(sys, "frozen", False))
 
+_PY_PREFIX_LOCK = threading.Lock()
+_PY_PREFIX_CACHE: Dict[str, List[str]] = {}
+
+
 def _python_cmd_prefix() -> List[str]:
-    """Return a command prefix to run Python modules in a subprocess.
+    """Return a command prefix to run Python modules (robot, pip) in a subprocess.
+
+    Uses the managed venv of the current project when it is ready (see venv_manager.py),
+    otherwise the base interpreter from _base_python_cmd_prefix().
+    """
+    venv = _project_venv()
+    if venv is not None and _VENVS.ready(venv):
+        return [str(_VENVS.python_in(venv))]
+    return _base_python_cmd_prefix()
+
+
+def _base_python_cmd_prefix() -> List[str]:
+    """Return the base interpreter prefix (used to run tools and to create venvs).
 
     In a PyInstaller .exe, sys.executable points to the EXE, so we must use a real
     Python interpreter (env var MAGAZORD_PYTHON_EXE, or py launcher, or python in PATH).
+    The lookup is cached per MAGAZORD_PYTHON_EXE value; see _invalidate_python_cmd_cache().
     """
+    env_exe = os.environ.get("MAGAZORD_PYTHON_EXE") or ""
+    with _PY_PREFIX_LOCK:
+        hit = _PY_PREFIX_CACHE.get(env_exe)
+    if hit is not None:
+        return list(hit)
+    prefix = _resolve_python_cmd_prefix()
+    with _PY_PREFIX_LOCK:
+        _PY_PREFIX_CACHE[env_exe] = prefix
+    return list(prefix)
+
+
+def _invalidate_python_cmd_cache() -> None:
+    with _PY_PREFIX_LOCK:
+        _PY_PREFIX_CACHE.clear()
+
+
+def _resolve_python_cmd_prefix() -> List[str]:
     exe = os.environ.get("MAGAZORD_PYTHON_EXE")
     if exe and Path(exe).exists():
         return [exe]
@@ -62,6 +105,28 @@ PROJECT_DIR = DATA_DIR / "TesteMagazord"   # conteúdo do zip extraído fica aqu
 RUNS_DIR = STATIC_DIR / "runs"
 PDF_CACHE_DIR = DATA_DIR / "_pdf_cache"
 FONTS_DIR = ASSETS_DIR / "fonts"
+ENV_CACHE_PATH = DATA_DIR / "_env_check_cache.json"
+INSTALL_LOCK_PATH = DATA_DIR / "_install_lock.json"
+WHEELHOUSE_DIR = DATA_DIR / "_wheelhouse"
+VENVS_DIR = DATA_DIR / "_venvs"
+PIP_CACHE_DIR = DATA_DIR / "_pip_cache"
+
+_VENVS = VenvManager(VENVS_DIR, PIP_CACHE_DIR)
+
+
+def _venvs_enabled() -> bool:
+    return os.environ.get("MAGAZORD_VENVS", "1") != "0"
+
+
+def _project_venv() -> Optional[Path]:
+    """Diretório do venv gerenciado para o requirements.txt atual (pode ainda não existir)."""
+    if not _venvs_enabled():
+        return None
+    req = PROJECT_DIR / "requirements.txt"
+    try:
+        return _VENVS.path_for(req, _base_python_cmd_prefix())
+    except OSError:
+        return None
 
 def _norm_tag(t: str) -> str:
     return re.sub(r"\s+", "", (t or "")).strip().lower()
@@ -307,35 +372,60 @@ def _decode_bytes(b: bytes) -> str:
         return repr(b)
 
 def _run_cmd(cmd, cwd=None, timeout=None):
-    p = subprocess.run(
+    # grupo de processos próprio: no timeout, chromedriver/navegadores abertos pelo robot morrem junto
+    p = subprocess.Popen(
         cmd,
         cwd=cwd,
-        timeout=timeout,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
         shell=False,
-        creationflags=_subprocess_creationflags(),
+        **group_popen_kwargs(_subprocess_creationflags()),
     )
+    try:
+        out, err = p.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        kill_tree(p)
+        p.communicate()
+        raise
 
     # Decodifica sem causar erro no Windows
-    stdout = (p.stdout or b"").decode("utf-8", errors="replace")
-    stderr = (p.stderr or b"").decode("utf-8", errors="replace")
+    stdout = (out or b"").decode("utf-8", errors="replace")
+    stderr = (err or b"").decode("utf-8", errors="replace")
 
     return p.returncode, stdout, stderr
 
 
 
-def _iter_process_lines(cmd: List[str], cwd: str):
-    """Produz linhas de saída de um processo em execução (mesclando stdout+stderr), decodificadas com segurança."""
+def _iter_process_lines(cmd: List[str], cwd: str, env: Optional[Dict[str, str]] = None,
+                        timeout: Optional[float] = None):
+    """Produz linhas de saída de um processo em execução (mesclando stdout+stderr), decodificadas com segurança.
+
+    Com `timeout` (segundos), o processo é encerrado no prazo e subprocess.TimeoutExpired é levantado.
+    """
     p = subprocess.Popen(
         cmd,
         cwd=cwd,
+        env=env,
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
         text=False,
         shell=False,
         creationflags=_subprocess_creationflags(),
     )
+    expired = threading.Event()
+
+    def _kill() -> None:
+        expired.set()
+        try:
+            p.kill()
+        except Exception:
+            pass
+
+    # readline bloqueia sem prazo: um timer mata o processo e a leitura termina com EOF
+    timer = threading.Timer(timeout, _kill) if timeout else None
+    if timer is not None:
+        timer.daemon = True
+        timer.start()
     try:
         assert p.stdout is not None
         for raw in iter(p.stdout.readline, b""):
@@ -343,13 +433,18 @@ def _iter_process_lines(cmd: List[str], cwd: str):
                 break
             yield _decode_bytes(raw).rstrip("\r\n")
     finally:
+        if timer is not None:
+            timer.cancel()
         try:
             if p.stdout:
                 p.stdout.close()
         except Exception:
             pass
     rc = p.wait()
+    if expired.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout)
     return rc
+
 def _slug(s: str) -> str:
     s = s.replace("\\", "/")
     s = re.sub(r"[^a-zA-Z0-9/_-]+", "_", s).strip("_")
@@ -689,38 +784,90 @@ def api_has_robot():
 
     return jsonify({"has_robot": False})
 
+def _after_install() -> None:
+    """Invalida tudo que depende do ambiente Python depois de um pip install."""
+    invalidate_env_cache(str(ENV_CACHE_PATH))
+    _invalidate_python_cmd_cache()
+    _ROBOT_POOL.reset()
+
+
+def _install_force() -> bool:
+    body = request.get_json(force=True, silent=True) or {}
+    return (request.args.get("force") or "").strip() == "1" or bool(body.get("force"))
+
+
+_INSTALL_TIMEOUT = 60 * 20
+
+
+def _install_iter(req: Path, force: bool, state: Dict[str, Any]):
+    """Cria o venv do projeto (se preciso), planeja e roda o pip; produz as linhas de saída.
+
+    O código de retorno final fica em state["rc"]. Cada processo (criação do venv, pip) tem até
+    _INSTALL_TIMEOUT segundos; estourado, é encerrado e subprocess.TimeoutExpired é levantado.
+    """
+    state["rc"] = 1
+    env = _VENVS.pip_env()
+    venv = _project_venv()
+    if venv is not None:
+        yield f"Venv do projeto: {venv}"
+        if not _VENVS.exists(venv):
+            cmd = _VENVS.create_cmd(_base_python_cmd_prefix(), venv)
+            yield f"Criando venv: {' '.join(cmd)}"
+            rc = yield from _iter_process_lines(cmd, str(PROJECT_DIR), env=env, timeout=_INSTALL_TIMEOUT)
+            if rc != 0:
+                yield f"❌ Falha ao criar o venv (rc={rc})."
+                state["rc"] = rc
+                return
+        target = [str(_VENVS.python_in(venv))]
+        lock_path = venv / LOCK_NAME
+    else:
+        target = _base_python_cmd_prefix()
+        lock_path = INSTALL_LOCK_PATH
+
+    plan = plan_install(target, req, lock_path, wheelhouse=find_wheelhouse(WHEELHOUSE_DIR), force=force)
+    yield from plan.describe()
+    if plan.nothing_to_do:
+        rc = 0
+        yield "✅ Nada a instalar (pip não foi executado)."
+    else:
+        cmd = target + plan.pip_args(str(req))
+        yield f"Comando: {' '.join(cmd)}"
+        yield ""
+        rc = yield from _iter_process_lines(cmd, str(PROJECT_DIR), env=env, timeout=_INSTALL_TIMEOUT)
+
+    if rc == 0:
+        if not plan.from_lock:
+            record_lock(target, req, lock_path)  # sonda de novo: só quando o ambiente diverge do lock
+        if venv is not None:
+            _VENVS.mark_ready(venv, req)
+    _after_install()
+    state["rc"] = rc
+
+
 @app.post("/api/install_requirements")
 def api_install_requirements():
-    """Instala PROJECT_DIR/requirements.txt no ambiente Python atual."""
+    """Instala PROJECT_DIR/requirements.txt no venv do projeto (ou no ambiente Python atual)."""
     _ensure_extracted()
     req = PROJECT_DIR / "requirements.txt"
     if not req.exists():
         return jsonify({"ok": False, "error": "requirements.txt não encontrado no projeto."}), 404
 
-    cmd = _python_cmd_prefix() + ["-m", "pip", "install", "-r", str(req)]
+    state: Dict[str, Any] = {}
     try:
-        rc, stdout, stderr = _run_cmd(cmd, cwd=str(PROJECT_DIR), timeout=60 * 20)
-
-        # Junta saída com segurança
-        out_parts = []
-        if stdout:
-            out_parts.append(stdout)
-        if stderr:
-            out_parts.append(stderr)
-        out = "\n".join(out_parts)
-
-        tail = _tail_text(out, 12000)
-        if rc == 0:
-            tail = (tail + "\n\n✅ Instalação concluída. Agora clique em 'Verificar ambiente' para revalidar.").strip()
-        else:
-            tail = (tail + "\n\n⚠️ Instalação terminou com erro. Veja acima os detalhes.").strip()
-
-        return jsonify({"ok": rc == 0, "returncode": rc, "output": tail})
-
+        out = "\n".join(_install_iter(req, _install_force(), state))
     except subprocess.TimeoutExpired:
         return jsonify({"ok": False, "error": "Tempo limite excedido ao instalar requirements (20 min)."}), 500
     except Exception as e:
         return jsonify({"ok": False, "error": str(e)}), 500
+    rc = state.get("rc", 1)
+
+    tail = _tail_text(out, 12000)
+    if rc == 0:
+        tail = (tail + "\n\n✅ Instalação concluída. Agora clique em 'Verificar ambiente' para revalidar.").strip()
+    else:
+        tail = (tail + "\n\n⚠️ Instalação terminou com erro. Veja acima os detalhes.").strip()
+
+    return jsonify({"ok": rc == 0, "returncode": rc, "output": tail})
 
 
 def _which(cmd: str) -> Optional[str]:
@@ -756,41 +903,27 @@ def api_install_requirements_stream():
     if not req.exists():
         return jsonify({"ok": False, "error": "requirements.txt não encontrado em TesteMagazord."}), 404
 
-    cmd = _python_cmd_prefix() + ["-m", "pip", "install", "-r", str(req)]
+    force = _install_force()
 
     def generate():
         yield "Iniciando instalação...\n"
-        yield f"Comando: {' '.join(cmd)}\n\n"
 
-        rc = 1
+        state: Dict[str, Any] = {}
         lines: List[str] = []
         try:
-            p = subprocess.Popen(
-                cmd,
-                cwd=str(PROJECT_DIR),
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=False,
-                shell=False,
-            creationflags=_subprocess_creationflags(),
-    )
-            assert p.stdout is not None
-            for raw in iter(p.stdout.readline, b""):
-                if not raw:
-                    break
-                line = _decode_bytes(raw).rstrip("\r\n")
+            for line in _install_iter(req, force, state):
                 lines.append(line)
                 if len(lines) > 3000:
                     lines = lines[-1800:]
                 yield line + "\n"
-            try:
-                p.stdout.close()
-            except Exception:
-                pass
-            rc = p.wait()
+        except subprocess.TimeoutExpired:
+            lines.append("Tempo limite excedido ao instalar requirements (20 min).")
+            yield "\n❌ Tempo limite excedido ao instalar requirements (20 min); processo encerrado.\n"
+            state["rc"] = 1
         except Exception as e:
             yield f"\n❌ Erro: {e}\n"
-            rc = 1
+            state["rc"] = 1
+        rc = state.get("rc", 1)
 
         # Opcional: persiste a última saída para depuração
         try:
@@ -804,6 +937,35 @@ def api_install_requirements_stream():
     return Response(generate(), mimetype="text/plain; charset=utf-8")
 
 
+@app.get("/api/venvs")
+def api_venvs():
+    """Lista os venvs gerenciados e indica qual corresponde ao projeto atual."""
+    _ensure_extracted()
+    current = _project_venv()
+    return jsonify({
+        "enabled": _venvs_enabled(),
+        "current": current.name if current is not None else None,
+        "python_cmd": _python_cmd_prefix(),
+        "venvs": _VENVS.list(),
+    })
+
+
+@app.post("/api/venvs/remove")
+def api_venvs_remove():
+    """Apaga um venv gerenciado (corpo {"key"}); sendo o do projeto atual, o próximo install o recria."""
+    body = request.get_json(force=True, silent=True) or {}
+    key = (body.get("key") or "").strip()
+    if not re.fullmatch(r"[0-9a-f]{16}", key):
+        return jsonify({"ok": False, "error": "chave de venv inválida"}), 400
+    current = _project_venv()
+    if not _VENVS.remove(key):
+        return jsonify({"ok": False, "error": "venv não encontrado"}), 404
+    if current is not None and current.name == key:
+        # workers do pool e sondagens em cache usavam o interpretador apagado
+        _after_install()
+    return jsonify({"ok": True, "removed": key, "venvs": _VENVS.list()})
+
+
 @app.get("/api/check")
 def api_check():
     """
@@ -812,14 +974,14 @@ def api_check():
     """
     _ensure_extracted()
     req = PROJECT_DIR / "requirements.txt"
-    data = run_checks(str(PROJECT_DIR), str(req), python_cmd=_python_cmd_prefix())
+    data = run_checks(str(PROJECT_DIR), str(req), python_cmd=_python_cmd_prefix(), cache_path=str(ENV_CACHE_PATH))
     return jsonify(data)
 
 
-def _count_regression_suites() -> int:
-    """Melhor esforço para contar suítes provavelmente executadas pela execução regression-all."""
+def _regression_suite_files() -> List[str]:
+    """Melhor esforço para listar suítes provavelmente executadas pela execução regression-all."""
     _ensure_extracted()
-    count = 0
+    out: List[str] = []
     skip_dirs = {".git", "__pycache__", "logs", "None", "_pdf_cache"}
     for p in PROJECT_DIR.rglob("*.robot"):
         rel = str(p.relative_to(PROJECT_DIR)).replace("\\", "/")
@@ -827,20 +989,126 @@ def _count_regression_suites() -> int:
             continue
         # conta apenas suítes nas pastas tests/testes
         if "/tests/" in rel or "/testes/" in rel:
-            count += 1
-    return count
+            out.append(rel)
+    return sorted(out)
+
+
+def _count_regression_suites() -> int:
+    return len(_regression_suite_files())
+
+
+# ----------------------------
+# Histórico de execuções / previsão de duração
+# ----------------------------
+
+_RUN_HISTORY = RunHistory(RUNS_DIR, PROJECT_DIR.name)
+_LOG_INDEX = LogIndex(PROJECT_DIR.name)
+
+# Execuções com várias suítes geram log dividido (--splitlog): o log.html traz só a árvore de suítes/testes
+# e as keywords de cada teste ficam em log-N.js, carregados ao expandir.
+SPLIT_LOGS = os.environ.get("MAGAZORD_SPLITLOG", "1") != "0"
+
+
+def _splitlog_args(multi_suite: bool) -> List[str]:
+    return ["--splitlog"] if SPLIT_LOGS and multi_suite else []
+
+
+_DURATION_LOCK = threading.Lock()
+_DURATION_CACHE: Dict[str, Any] = {"mtime": None, "model": None}
+
+
+def _duration_model() -> DurationModel:
+    """Modelo de duração a partir de static/runs, refeito só quando o mtime do diretório muda.
+
+    Execução nova/removida muda o mtime; o output.xml de uma execução em andamento não, por isso
+    _run_finished descarta o modelo ao fim de cada execução.
+    """
+    try:
+        mtime = RUNS_DIR.stat().st_mtime_ns
+    except OSError:
+        mtime = None
+    with _DURATION_LOCK:
+        if _DURATION_CACHE["model"] is not None and _DURATION_CACHE["mtime"] == mtime:
+            return _DURATION_CACHE["model"]
+    model = DurationModel.from_history(_RUN_HISTORY)
+    with _DURATION_LOCK:
+        _DURATION_CACHE.update(mtime=mtime, model=model)
+    return model
+
+
+def _run_finished(out_dir: Path) -> None:
+    """Pós-execução: pré-processa o índice do log e descarta o modelo de duração (há histórico novo)."""
+    _LOG_INDEX.warm(out_dir)
+    with _DURATION_LOCK:
+        _DURATION_CACHE["model"] = None
+
+
+def _suite_order_arg(out_dir: Path) -> str:
+    """Argumento do --prerunmodifier suite_order.py: suítes da mais longa para a mais curta (LPT).
+
+    As durações previstas vão para out_dir/suite_durations.json; o Robot só reordena, sem mudar nomes.
+    """
+    model = _duration_model()
+    data = {
+        "default_sec": model.default_suite_sec(),
+        "suites": {str(PROJECT_DIR / key): st.ewma for key, st in model.suites.items()},
+    }
+    path = out_dir / "suite_durations.json"
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    # ';' separa o argumento (':' colidiria com a letra de unidade no Windows)
+    return f"{APP_DIR / 'suite_order.py'};{path}"
+
+
+def _eta_text(eta: Dict[str, Any]) -> str:
+    txt = f"ETA estimado: ~{eta['eta_sec']:.0f}s (p90 {eta['p90_sec']:.0f}s)"
+    if eta.get("unknown_suites"):
+        txt += f" — {eta['unknown_suites']} suíte(s) sem histórico"
+    return txt
 
 
 @app.get("/api/regression_count")
 def api_regression_count():
-    """Retorna quantas suítes serão alvo da ação 'regression all'."""
+    """Retorna quantas suítes serão alvo da ação 'regression all' (e o ETA previsto)."""
     try:
-        n = _count_regression_suites()
-        return jsonify({"count": n})
+        files = _regression_suite_files()
+        eta = _duration_model().estimate_many(files)
+        return jsonify({"count": len(files), **eta})
     except Exception as e:
         return jsonify({"count": 0, "error": str(e)}), 200
 
 
+@app.get("/api/run_eta")
+def api_run_eta():
+    """Previsão de duração (EWMA + p90) de uma suíte permitida, com estimativas por teste."""
+    rel = _norm_rel((request.args.get("path") or "").strip())
+    if rel not in ALLOWED_RUN_FILES:
+        return jsonify({"error": "seleção não é executável (apenas suítes permitidas)"}), 400
+    model = _duration_model()
+    tests = {
+        k.split("::", 1)[1]: st.to_dict()
+        for k, st in model.tests.items()
+        if k.split("::", 1)[0] == rel
+    }
+    return jsonify({"path": rel, **model.estimate_suite(rel), "tests": tests})
+
+
+@app.get("/api/run_plan")
+def api_run_plan():
+    """Ordena e empacota as suítes permitidas em N workers (longest-processing-time-first)."""
+    try:
+        workers = max(1, min(32, int(request.args.get("workers") or os.cpu_count() or 1)))
+    except ValueError:
+        return jsonify({"error": "workers inválido"}), 400
+    model = _duration_model()
+    jobs = {rel: model.estimate_suite(rel)["ewma_sec"] for rel in ALLOWED_RUN_FILES}
+    bins = lpt_pack(jobs, workers)
+    return jsonify({
+        "workers": bins,
+        "makespan_sec": max((b["total_sec"] for b in bins), default=0.0),
+        "serial_sec": round(sum(jobs.values()), 3),
+    })
+
+
 
 @app.post("/api/clear_runs")
 def api_clear_runs():
@@ -882,32 +1150,124 @@ def api_robot_tags():
     tags = _extract_robot_tags_from_file(target)
     return jsonify({"ok": True, "tags": tags})
 
-@app.post("/api/run")
-def api_run():
-    _ensure_extracted()
-    body = request.get_json(force=True, silent=True) or {}
-    rel = (body.get("path") or "").strip()
-    tag = _norm_tag(body.get("tag") or "")
+# ----------------------------
+# Pool de workers Robot (interpretador + bibliotecas já carregados)
+# ----------------------------
 
+_ROBOT_POOL = RobotPool(
+    _python_cmd_prefix,
+    APP_DIR / "robot_worker.py",
+    DATA_DIR / "_robot_pool",
+    size=int(os.environ.get("MAGAZORD_ROBOT_POOL", "1") or 0),
+    max_runs=int(os.environ.get("MAGAZORD_ROBOT_POOL_MAX_RUNS", "20") or 20),
+    creationflags=_subprocess_creationflags(),
+)
+# limite de uma execução do robot (worker do pool ou subprocess); acima disso o processo é encerrado
+_ROBOT_RUN_TIMEOUT = float(os.environ.get("MAGAZORD_ROBOT_RUN_TIMEOUT", "21600") or 21600)
 
+
+def _run_robot_pooled(suites: List[Path], options: Dict[str, Any], out_dir: Path) -> Optional[Tuple[int, str, str]]:
+    """Executa via pool; retorna None só se nenhum worker pôde ser reservado (o chamador usa subprocess).
+
+    Erros depois do envio (timeout, worker caiu no meio) são propagados: reexecutar a suíte inteira
+    em subprocess duplicaria efeitos e a saída.
+    """
+    if not _ROBOT_POOL.enabled:
+        return None
+    out_path = out_dir / "console_stdout.txt"
+    err_path = out_dir / "console_stderr.txt"
+    try:
+        rc = _ROBOT_POOL.run(str(PROJECT_DIR), [str(s) for s in suites], options, out_path, err_path,
+                             timeout=_ROBOT_RUN_TIMEOUT)
+    except PoolUnavailable:
+        return None
+    stdout = out_path.read_text(encoding="utf-8", errors="replace") if out_path.exists() else ""
+    stderr = err_path.read_text(encoding="utf-8", errors="replace") if err_path.exists() else ""
+    return rc, stdout, stderr
+
+
+def _flaky_retries(body: Dict[str, Any]) -> int:
+    """Nº de tentativas extras para testes sabidamente instáveis (corpo 'retry_flaky' ou MAGAZORD_RETRY_FLAKY)."""
+    raw = body.get("retry_flaky")
+    if raw is None or raw == "":
+        raw = os.environ.get("MAGAZORD_RETRY_FLAKY", "0")
+    if raw is True:
+        return 1
+    try:
+        return max(0, min(3, int(raw)))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _retry_known_flaky(run_id: str, out_dir: Path, sources: List[str], tag: str, retries: int,
+                       multi_suite: bool = False) -> Optional[Dict[str, Any]]:
+    """Reexecuta na mesma execução só as falhas de testes marcados como flaky pelo histórico e
+    junta o resultado (rebot --merge) no output.xml/log/report da execução. None se nada foi reexecutado."""
+    if retries <= 0 or not (out_dir / "output.xml").exists():
+        return None
+    flaky = known_flaky(_RUN_HISTORY, exclude_run=run_id)
+    if not flaky:
+        return None
+
+    def run_robot(patterns: List[str], retry_dir: Path) -> int:
+        opts = {"include": [tag], "test": patterns, "outputdir": str(retry_dir), "output": "output.xml",
+                "log": "NONE", "report": "NONE"}
+        try:
+            pooled = _run_robot_pooled([Path(s) for s in sources], opts, retry_dir)
+        except Exception as e:
+            # falhou depois do envio: a tentativa conta como falha (sem rodar de novo em subprocess)
+            with open(retry_dir / "console_stderr.txt", "a", encoding="utf-8") as f:
+                f.write(f"\nworker do robot falhou: {e}")
+            return 255
+        if pooled is not None:
+            return pooled[0]
+        cmd = _python_cmd_prefix() + ["-m", "robot", "-i", tag, "-d", str(retry_dir), "--output", "output.xml",
+                                      "--log", "NONE", "--report", "NONE"]
+        for p in patterns:
+            cmd += ["-t", p]
+        try:
+            rc, stdout, stderr = _run_cmd(cmd + sources, cwd=str(PROJECT_DIR), timeout=_ROBOT_RUN_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            return 255
+        (retry_dir / "console_stdout.txt").write_text(stdout, encoding="utf-8", errors="ignore")
+        (retry_dir / "console_stderr.txt").write_text(stderr, encoding="utf-8", errors="ignore")
+        return rc
+
+    def merge(outputs: List[Path], dest: Path) -> int:
+        cmd = _python_cmd_prefix() + ["-m", "robot.rebot", "--merge", "-d", str(dest), "--output", "output.xml",
+                                      "--log", "log.html", "--report", "report.html"] + _splitlog_args(multi_suite)
+        cmd += [str(o) for o in outputs]
+        return _run_cmd(cmd, cwd=str(PROJECT_DIR))[0]
+
+    report = retry_flaky_failures(out_dir, PROJECT_DIR.name, flaky, run_robot, merge, retries)
+    if not report["retried"]:
+        return None
+    # rc do rebot = nº de testes com falha no resultado mesclado (> 250 = erro do próprio rebot)
+    merge_rc = report.get("merge_returncode")
+    report["returncode"] = merge_rc if merge_rc is not None and merge_rc <= 250 else None
+    return report
+
+
+def _resolve_run_selection(rel: str, tag: str) -> Tuple[str, List[Path], Optional[Tuple[Response, int]]]:
+    """Valida caminho + tag de uma execução; retorna (caminho normalizado, suítes, resposta de erro ou None)."""
     reln = _norm_rel(rel)
     # Apenas suítes na lista de permitidos são executáveis
     if reln not in ALLOWED_RUN_FILES:
-        return jsonify({"error": "seleção não é executável (apenas suítes permitidas)"}), 400
+        return rel, [], (jsonify({"error": "seleção não é executável (apenas suítes permitidas)"}), 400)
     rel = reln
 
     if not rel:
-        return jsonify({"error": "caminho necessário"}), 400
+        return rel, [], (jsonify({"error": "caminho necessário"}), 400)
     if tag not in TAGS:
-        return jsonify({"error": "tag inválida"}), 400
+        return rel, [], (jsonify({"error": "tag inválida"}), 400)
 
     # Alvo pode ser uma pasta OU um único arquivo .robot
     try:
         target = _safe_rel(rel)
         if not target.exists():
-            return jsonify({"error": "alvo não encontrado"}), 404
+            return rel, [], (jsonify({"error": "alvo não encontrado"}), 404)
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return rel, [], (jsonify({"error": str(e)}), 400)
 
     suites: List[Path] = []
     if target.is_file() and target.suffix.lower() == ".robot":
@@ -916,7 +1276,7 @@ def api_run():
         suites = _find_suites(target)
 
     if not suites:
-        return jsonify({"error": "nenhuma suíte .robot encontrada nesta seleção"}), 400
+        return rel, [], (jsonify({"error": "nenhuma suíte .robot encontrada nesta seleção"}), 400)
 
     # Valida se a tag está presente na suíte selecionada (executamos seleções de arquivo único neste app)
     # Isso evita erros confusos de "nenhum teste correspondente à tag".
@@ -924,34 +1284,79 @@ def api_run():
     # Regra do desafio: só executa se a tag estiver no arquivo selecionado.
     # Se não conseguirmos detectar tags, também bloqueia (evita falsa execução).
     if (not suite_tags) or (tag not in suite_tags):
-        return jsonify({
+        return rel, [], (jsonify({
             "error": "tag_not_found_in_suite",
             "message": "A tag selecionada não está presente neste arquivo de teste.",
             "available_tags": suite_tags,
-        }), 400
+        }), 400)
+
+    return rel, suites, None
+
+
+@app.post("/api/run")
+def api_run():
+    _ensure_extracted()
+    body = request.get_json(force=True, silent=True) or {}
+    rel = (body.get("path") or "").strip()
+    tag = _norm_tag(body.get("tag") or "")
+
+
+    rel, suites, error = _resolve_run_selection(rel, tag)
+    if error is not None:
+        return error
 
     run_id = datetime.now().strftime("%Y%m%d_%H%M%S") + "_" + _slug(rel)
     out_dir = RUNS_DIR / run_id
     out_dir.mkdir(parents=True, exist_ok=True)
+    eta = _duration_model().estimate_many([rel])
 
     # Comando robot
     # -d: diretório de saída
     # --log / --report: nomes (evita colisões)
     # Usa "python -m robot" para evitar problemas de PATH no Windows.
+    multi_suite = len(suites) > 1
+    # pasta = várias suítes: executadas da mais longa para a mais curta (histórico de duração)
+    order = _suite_order_arg(out_dir) if multi_suite or any(s.is_dir() for s in suites) else None
     cmd = _python_cmd_prefix() + ["-m", "robot", "-i", tag, "-d", str(out_dir), "--log", "log.html", "--report", "report.html"]
+    cmd += _splitlog_args(multi_suite)
+    if order:
+        cmd += ["--prerunmodifier", order]
     for s in suites:
         cmd.append(str(s))
 
-    # Executa
+    # Executa (preferencialmente em um worker aquecido; senão, processo novo)
+    t0 = time.time()
+    options = {"include": [tag], "outputdir": str(out_dir), "log": "log.html", "report": "report.html",
+               "splitlog": bool(_splitlog_args(multi_suite))}
+    if order:
+        options["prerunmodifier"] = [order]
     try:
-        rc, stdout, stderr = _run_cmd(cmd, cwd=str(PROJECT_DIR))
+        pooled = _run_robot_pooled(suites, options, out_dir)
     except Exception as e:
-        return jsonify({"error": "execução_falhou", "message": str(e), "cmd": cmd}), 500
+        return jsonify({"error": "execução_falhou", "message": f"worker do robot: {e}", "cmd": cmd,
+                        "worker": "pool"}), 500
+    if pooled is not None:
+        rc, stdout, stderr = pooled
+    else:
+        try:
+            rc, stdout, stderr = _run_cmd(cmd, cwd=str(PROJECT_DIR), timeout=_ROBOT_RUN_TIMEOUT)
+        except Exception as e:
+            return jsonify({"error": "execução_falhou", "message": str(e), "cmd": cmd}), 500
+    retry = (_retry_known_flaky(run_id, out_dir, [str(s) for s in suites], tag, _flaky_retries(body), multi_suite)
+             if rc else None)
+    if retry is not None and retry["returncode"] is not None:
+        rc = retry["returncode"]
+    duration = round(time.time() - t0, 3)
+    _run_finished(out_dir)
 
     result = {
         "run_id": run_id,
         "returncode": rc,
         "cmd": cmd,
+        "worker": "pool" if pooled is not None else "subprocess",
+        "flaky_retry": retry,
+        "eta_sec": eta["eta_sec"],
+        "duration_sec": duration,
         "stdout_tail": _tail_text(stdout),
         "stderr_tail": _tail_text(stderr),
         "log_url": f"/static/runs/{run_id}/log.html" if (out_dir / "log.html").exists() else None,
@@ -971,6 +1376,98 @@ def api_run():
             "cmd": cmd,
             "target": rel,
             "tag": tag,
+            "eta_sec": eta["eta_sec"],
+            "duration_sec": duration,
+            "flaky_retry": retry,
+        }
+        (out_dir / "result.json").write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+    except Exception:
+        pass
+
+    return jsonify(result)
+
+
+@app.get("/api/run_matrix")
+def api_run_matrix_defaults():
+    """Configurações padrão da matriz e quantas rodariam em paralelo nesta máquina."""
+    return jsonify({"matrix": DEFAULT_MATRIX, "parallel": max_parallel(len(DEFAULT_MATRIX))})
+
+
+@app.post("/api/run_matrix")
+def api_run_matrix():
+    """Executa a seleção uma vez por configuração (navegador + viewport) em paralelo e consolida os resultados.
+
+    Corpo: {"path", "tag", "matrix": [{"name", "browser", "width", "height"}, ...], "max_parallel"}.
+    """
+    _ensure_extracted()
+    body = request.get_json(force=True, silent=True) or {}
+    rel, suites, error = _resolve_run_selection((body.get("path") or "").strip(), _norm_tag(body.get("tag") or ""))
+    if error is not None:
+        return error
+    tag = _norm_tag(body.get("tag") or "")
+    # só suítes Selenium (${BROWSER} nas variáveis): nas demais a matriz repetiria a mesma execução
+    skipped = non_browser_suites(suites, PROJECT_DIR)
+    if skipped:
+        return jsonify({
+            "error": "matriz_sem_navegador",
+            "message": "Execução em matriz só vale para suítes com navegador (variável ${BROWSER}).",
+            "suites": [str(s.relative_to(PROJECT_DIR)).replace("\\", "/") for s in skipped],
+        }), 400
+    try:
+        configs = parse_matrix(body.get("matrix"))
+        requested = int(body["max_parallel"]) if body.get("max_parallel") else None
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": "matriz_inválida", "message": str(e)}), 400
+
+    run_id = datetime.now().strftime("%Y%m%d_%H%M%S") + "_MATRIX_" + _slug(rel)
+    out_dir = RUNS_DIR / run_id
+    parallel = max_parallel(len(configs), requested)
+    eta = _duration_model().estimate_many([rel])
+    out_dir.mkdir(parents=True, exist_ok=True)
+    order = ["--prerunmodifier", _suite_order_arg(out_dir)] if any(s.is_dir() for s in suites) else []
+
+    t0 = time.time()
+    try:
+        res = run_matrix(
+            _python_cmd_prefix(), configs, [str(s) for s in suites], tag, out_dir, str(PROJECT_DIR),
+            PROJECT_DIR.name, run_id, parallel["workers"], creationflags=_subprocess_creationflags(),
+            splitlog=SPLIT_LOGS, extra_args=order,
+        )
+    except Exception as e:
+        return jsonify({"error": "execução_falhou", "message": str(e)}), 500
+    duration = round(time.time() - t0, 3)
+    _run_finished(out_dir)
+
+    base = f"/static/runs/{run_id}"
+    result = {
+        "run_id": run_id,
+        "returncode": res["returncode"],
+        "parallel": parallel,
+        # ETA sequencial de uma configuração x ondas de execução
+        "eta_sec": round(eta["eta_sec"] * -(-len(configs) // parallel["workers"]), 1),
+        "duration_sec": duration,
+        "configs": [
+            dict(c, log_url=f"{base}/{c['name']}/log.html" if (out_dir / c["name"] / "log.html").exists() else None)
+            for c in res["configs"]
+        ],
+        "table": res["table"],
+        "matrix_url": f"{base}/matrix.html",
+        "log_url": f"{base}/log.html" if (out_dir / "log.html").exists() else None,
+        "report_url": f"{base}/report.html" if (out_dir / "report.html").exists() else None,
+        "output_xml_url": f"{base}/output.xml" if (out_dir / "output.xml").exists() else None,
+    }
+
+    try:
+        meta = {
+            "run_id": run_id,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "returncode": res["returncode"],
+            "target": rel,
+            "tag": tag,
+            "mode": "matrix",
+            "configs": [c["name"] for c in res["configs"]],
+            "eta_sec": result["eta_sec"],
+            "duration_sec": duration,
         }
         (out_dir / "result.json").write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
     except Exception:
@@ -983,6 +1480,7 @@ def api_run():
 def api_run_regression_all():
     """Executa todas as suítes em PROJECT_DIR filtrando pela tag 'regression'."""
     _ensure_extracted()
+    body = request.get_json(force=True, silent=True) or {}
 
     tag = "regression"
     run_id = datetime.now().strftime("%Y%m%d_%H%M%S") + "_" + "REGRESSION_ALL"
@@ -991,17 +1489,28 @@ def api_run_regression_all():
 
     # Executa a partir da raiz do projeto, para que o Robot descubra sub-suítes.
     # Usa "python -m robot" para evitar problemas de PATH no Windows.
-    cmd = _python_cmd_prefix() + ["-m", "robot", "-i", tag, "-d", str(out_dir), "--log", "log.html", "--report", "report.html", str(PROJECT_DIR)]
+    cmd = _python_cmd_prefix() + ["-m", "robot", "-i", tag, "-d", str(out_dir), "--log", "log.html", "--report", "report.html"]
+    cmd += _splitlog_args(True) + ["--prerunmodifier", _suite_order_arg(out_dir), str(PROJECT_DIR)]
+    eta = _duration_model().estimate_many(_regression_suite_files())
 
+    t0 = time.time()
     try:
         rc, stdout, stderr = _run_cmd(cmd, cwd=str(PROJECT_DIR))
     except Exception as e:
         return jsonify({"error": "execução_falhou", "message": str(e), "cmd": cmd}), 500
+    retry = _retry_known_flaky(run_id, out_dir, [str(PROJECT_DIR)], tag, _flaky_retries(body), True) if rc else None
+    if retry is not None and retry["returncode"] is not None:
+        rc = retry["returncode"]
+    duration = round(time.time() - t0, 3)
+    _run_finished(out_dir)
 
     result = {
         "run_id": run_id,
         "returncode": rc,
         "cmd": cmd,
+        "flaky_retry": retry,
+        "eta_sec": eta["eta_sec"],
+        "duration_sec": duration,
         "stdout_tail": _tail_text(stdout),
         "stderr_tail": _tail_text(stderr),
         "log_url": f"/static/runs/{run_id}/log.html" if (out_dir / "log.html").exists() else None,
@@ -1021,6 +1530,9 @@ def api_run_regression_all():
             "target": ".",
             "tag": tag,
             "mode": "regression_all",
+            "eta_sec": eta["eta_sec"],
+            "duration_sec": duration,
+            "flaky_retry": retry,
         }
         (out_dir / "result.json").write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
     except Exception:
@@ -1029,6 +1541,30 @@ def api_run_regression_all():
     return jsonify(result)
 
 
+def _console_status_name(line: str) -> Optional[str]:
+    """Nome de suíte/teste em uma linha de status do console ('<Nome> :: <doc> | PASS |')."""
+    m = re.match(r"^(.+?)\s+\|\s+(PASS|FAIL|SKIP)\s+\|", line)
+    if not m:
+        return None
+    return m.group(1).split(" :: ", 1)[0].strip()
+
+
+def _finished_suite_key(name: str, pending: Dict[str, float]) -> Optional[str]:
+    """Associa o nome impresso pelo console ao arquivo .robot pendente.
+
+    O Robot usa o nome do arquivo sem extensão, com a primeira letra maiúscula (ex.: '1.1Test'),
+    então comparamos normalizado.
+    """
+    name = name.lower().replace(" ", "").replace("_", "")
+    for key in pending:
+        stem = Path(key).name
+        if stem.lower().endswith(".robot"):
+            stem = stem[:-len(".robot")]
+        if stem.lower().replace(" ", "").replace("_", "") == name:
+            return key
+    return None
+
+
 @app.post("/api/run_regression_all_stream")
 def api_run_regression_all_stream():
     """
@@ -1036,17 +1572,27 @@ def api_run_regression_all_stream():
     Envia linhas para o cliente em tempo real e emite uma linha JSON __META__ no final.
     """
     _ensure_extracted()
+    body = request.get_json(force=True, silent=True) or {}
+    retries = _flaky_retries(body)
 
     tag = "regression"
     run_id = datetime.now().strftime("%Y%m%d_%H%M%S") + "_" + "REGRESSION_ALL"
     out_dir = RUNS_DIR / run_id
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    cmd = _python_cmd_prefix() + ["-m", "robot", "-i", tag, "-d", str(out_dir), "--log", "log.html", "--report", "report.html", str(PROJECT_DIR)]
+    cmd = _python_cmd_prefix() + ["-m", "robot", "-i", tag, "-d", str(out_dir), "--log", "log.html", "--report", "report.html"]
+    cmd += _splitlog_args(True) + ["--prerunmodifier", _suite_order_arg(out_dir), str(PROJECT_DIR)]
+    suite_files = _regression_suite_files()
+    model = _duration_model()
+    eta = model.estimate_many(suite_files)
 
     def generate():
         yield f"RUN_ID: {run_id}\n"
-        yield f"Comando: {' '.join(cmd)}\n\n"
+        yield f"Comando: {' '.join(cmd)}\n"
+        yield _eta_text(eta) + "\n\n"
+        t0 = time.time()
+        remaining = dict((k, model.estimate_suite(k)["ewma_sec"]) for k in suite_files)
+        last_status_name: Optional[str] = None
         rc = 1
         stdout_lines: List[str] = []
         try:
@@ -1069,6 +1615,19 @@ def api_run_regression_all_stream():
                 if len(stdout_lines) > 2000:
                     stdout_lines = stdout_lines[-1200:]
                 yield line + "\n"
+                # Fim de suíte: linha "<nome> | PASS |" seguida de "N tests, ..." -> atualiza o ETA restante
+                status_name = _console_status_name(line)
+                if status_name:
+                    last_status_name = status_name
+                    continue
+                done_key = None
+                if last_status_name and re.match(r"^\d+ tests?, ", line):
+                    done_key = _finished_suite_key(last_status_name, remaining)
+                last_status_name = None
+                if done_key:
+                    remaining.pop(done_key, None)
+                    elapsed = time.time() - t0
+                    yield f"[ETA] restante ~{sum(remaining.values()):.0f}s (decorrido {elapsed:.0f}s)\n"
             try:
                 p.stdout.close()
             except Exception:
@@ -1084,10 +1643,29 @@ def api_run_regression_all_stream():
         except Exception:
             pass
 
+        retry = None
+        if rc and retries:
+            yield "\n[RETRY] reexecutando falhas de testes instáveis conhecidos...\n"
+            try:
+                retry = _retry_known_flaky(run_id, out_dir, [str(PROJECT_DIR)], tag, retries, True)
+            except Exception as e:
+                yield f"[RETRY] falhou: {e}\n"
+            if retry is None:
+                yield "[RETRY] nenhuma falha é de teste marcado como instável\n"
+            else:
+                yield (f"[RETRY] reexecutados: {len(retry['retried'])}, recuperados: {len(retry['recovered'])}, "
+                       f"ainda falhando: {len(retry['still_failing'])}\n")
+                if retry["returncode"] is not None:
+                    rc = retry["returncode"]
+        _run_finished(out_dir)
+
         meta = {
             "run_id": run_id,
             "returncode": rc,
             "cmd": cmd,
+            "flaky_retry": retry,
+            "eta_sec": eta["eta_sec"],
+            "duration_sec": round(time.time() - t0, 3),
             "log_url": f"/static/runs/{run_id}/log.html" if (out_dir / "log.html").exists() else None,
             "report_url": f"/static/runs/{run_id}/report.html" if (out_dir / "report.html").exists() else None,
             "output_xml_url": f"/static/runs/{run_id}/output.xml" if (out_dir / "output.xml").exists() else None,
@@ -1125,10 +1703,87 @@ def api_runs():
                 runs[-1]["returncode"] = meta.get("returncode")
                 runs[-1]["tag"] = meta.get("tag")
                 runs[-1]["target"] = meta.get("target")
+                runs[-1]["eta_sec"] = meta.get("eta_sec")
+                runs[-1]["duration_sec"] = meta.get("duration_sec")
             except Exception:
                 pass
     return jsonify({"runs": runs})
 
+@app.get("/api/log_node")
+def api_log_node():
+    """Explorador de log sob demanda (?run=<run_id>&id=<nó>&depth=1&expand=fail).
+
+    Sem `id`: suíte raiz + lista de testes com falha. Com `id`: o nó e seus filhos até `depth` níveis
+    (os demais vêm resumidos, com children_count); expand=fail abre o caminho de falha até o fim.
+    """
+    run_id = (request.args.get("run") or "").strip()
+    xml = _run_output(run_id)
+    if xml is None:
+        return jsonify({"error": f"execução sem output.xml: {run_id or '(vazio)'}"}), 404
+    try:
+        depth = max(0, min(10, int(request.args.get("depth") or 1)))
+    except ValueError:
+        return jsonify({"error": "depth inválido"}), 400
+    expand_fail = (request.args.get("expand") or "").lower() == "fail"
+
+    index = _LOG_INDEX.load(xml.parent)
+    if index is None or not index.get("root"):
+        return jsonify({"error": "output.xml incompleto"}), 409
+    node_id = (request.args.get("id") or "").strip()
+    node = subtree(index, node_id or index["root"], depth, expand_fail)
+    if node is None:
+        return jsonify({"error": f"nó não encontrado: {node_id}"}), 404
+    result: Dict[str, Any] = {"run_id": run_id, "node": node}
+    if not node_id:
+        result["failed_tests"] = index["failed_tests"]
+    return jsonify(result)
+
+
+@app.get("/api/flaky")
+def api_flaky():
+    """Testes instáveis pelo histórico: alternância PASS/FAIL, falhas agrupadas por mensagem e keywords
+    que falharam. ?all=1 inclui os estáveis; ?limit=N corta a lista ranqueada."""
+    try:
+        limit = max(0, int(request.args.get("limit") or 0))
+    except ValueError:
+        return jsonify({"error": "limit inválido"}), 400
+    include_stable = (request.args.get("all") or "").lower() in ("1", "true", "yes")
+    return jsonify(flaky_report(_RUN_HISTORY, include_stable=include_stable, limit=limit or None))
+
+
+def _run_output(run_id: str) -> Optional[Path]:
+    """output.xml de uma execução em static/runs (run_id só com nome de pasta, sem caminhos)."""
+    if not run_id or not re.fullmatch(r"[\w.-]+", run_id) or run_id in (".", ".."):
+        return None
+    xml = RUNS_DIR / run_id / "output.xml"
+    return xml if xml.is_file() else None
+
+
+@app.get("/api/run_diff")
+def api_run_diff():
+    """Diff entre duas execuções (?base=<run_id>&head=<run_id>): status, testes novos/removidos,
+    mensagens de falha e durações acima do limiar (?threshold=<s>&pct=<%>), teste a teste e por keyword."""
+    base_id = (request.args.get("base") or "").strip()
+    head_id = (request.args.get("head") or "").strip()
+    base_xml = _run_output(base_id)
+    head_xml = _run_output(head_id)
+    if base_xml is None or head_xml is None:
+        missing = base_id if base_xml is None else head_id
+        return jsonify({"error": f"execução sem output.xml: {missing or '(vazio)'}"}), 404
+    try:
+        threshold = float(request.args.get("threshold") or DEFAULT_THRESHOLD_SEC)
+        pct = float(request.args.get("pct") or DEFAULT_THRESHOLD_PCT)
+        max_kw = max(1, min(200, int(request.args.get("max_keywords") or DEFAULT_MAX_KEYWORDS)))
+    except ValueError:
+        return jsonify({"error": "threshold/pct/max_keywords inválidos"}), 400
+    try:
+        diff = diff_runs(base_xml, head_xml, PROJECT_DIR.name, threshold_sec=max(0.0, threshold),
+                         threshold_pct=max(0.0, pct), max_keywords=max_kw)
+    except ET.ParseError:
+        # execução interrompida (ou ainda rodando): output.xml incompleto
+        return jsonify({"error": "output.xml incompleto em uma das execuções"}), 409
+    return jsonify({"base_id": base_id, "head_id": head_id, **diff})
+
 @app.get("/api/open_zip")
 def api_open_zip():
     """
@@ -1148,7 +1803,15 @@ def api_open_zip():
     PROJECT_DIR.mkdir(parents=True, exist_ok=True)
     with zipfile.ZipFile(zp, "r") as zf:
         zf.extractall(PROJECT_DIR)
-    return jsonify({"ok": True})
+
+    # O venv é identificado pelo hash do requirements.txt: se este pacote já foi instalado antes,
+    # o venv existente volta a ser usado sem reinstalar.
+    venv = _project_venv()
+    return jsonify({
+        "ok": True,
+        "venv": venv.name if venv is not None else None,
+        "venv_ready": bool(venv is not None and _VENVS.ready(venv)),
+    })
 
 def open_browser(url: str) -> None:
     """Open the UI.
@@ -1270,6 +1933,9 @@ def main():
     # The frontend calls /api/shutdown on pagehide; /api/alive cancels it while the UI is open.
     threading.Thread(target=_shutdown_watcher, daemon=True).start()
 
+    # Pré-inicia os workers Robot enquanto a interface carrega.
+    _ROBOT_POOL.warm()
+
     url = f"http://{host}:{port}/"
     if os.environ.get("MAGAZORD_NO_BROWSER") != "1":
         t = threading.Timer(0.8, open_browser, args=(url,))
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import os
+import re
+import sys
+import html
+import json
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from run_history import summarize_output
+
+# Execução em matriz: a mesma seleção de suítes roda uma vez por configuração (navegador + viewport),
+# cada uma num processo robot próprio com -d isolado; no fim o rebot junta tudo num relatório único
+# e matrix.html mostra uma coluna de resultado por configuração.
+
+DEFAULT_MATRIX: List[Dict[str, Any]] = [
+    {"name": "chrome-desktop", "browser": "headlesschrome", "width": 1920, "height": 1080},
+    {"name": "chrome-tablet", "browser": "headlesschrome", "width": 1024, "height": 768},
+    {"name": "chrome-mobile", "browser": "headlesschrome", "width": 390, "height": 844},
+    {"name": "firefox-desktop", "browser": "headlessfirefox", "width": 1920, "height": 1080},
+]
+
+BROWSERS = ("headlesschrome", "chrome", "headlessfirefox", "firefox", "edge", "headlessedge")
+
+# Memória estimada por configuração em paralelo (robot + navegador headless)
+MEM_PER_RUN_MB = int(os.environ.get("MAGAZORD_MATRIX_MEM_MB", "700"))
+MAX_CONFIGS = 12
+
+
+@dataclass
+class MatrixConfig:
+    name: str
+    browser: str
+    width: int
+    height: int
+
+    def variables(self) -> List[str]:
+        return [f"BROWSER:{self.browser}", f"WINDOW_WIDTH:{self.width}", f"WINDOW_HEIGHT:{self.height}"]
+
+
+_BROWSER_VAR_RE = re.compile(r"^\$\{BROWSER\}\s", re.M)
+
+
+def _declares_browser(part_dir: Path) -> bool:
+    for f in part_dir.rglob("*.robot"):
+        try:
+            if _BROWSER_VAR_RE.search(f.read_text(encoding="utf-8", errors="ignore")):
+                return True
+        except OSError:
+            continue
+    return False
+
+
+def non_browser_suites(suites: List[Path], project_dir: Path) -> List[Path]:
+    """Suítes cuja parte (parteN-.../) não declara ${BROWSER}: -v BROWSER não teria efeito nelas
+    (API, mobile, mocks), então a matriz só rodaria a mesma coisa N vezes."""
+    cache: Dict[Path, bool] = {}
+    out: List[Path] = []
+    for s in suites:
+        try:
+            part = project_dir / Path(s).resolve().relative_to(project_dir.resolve()).parts[0]
+        except (ValueError, IndexError):
+            out.append(s)
+            continue
+        if part not in cache:
+            cache[part] = part.is_dir() and _declares_browser(part)
+        if not cache[part]:
+            out.append(s)
+    return out
+
+
+def parse_matrix(items: Optional[List[Dict[str, Any]]]) -> List[MatrixConfig]:
+    """Valida a lista de configurações (vazia = DEFAULT_MATRIX). Lança ValueError com a mensagem para o cliente."""
+    if not items:
+        items = DEFAULT_MATRIX
+    if not isinstance(items, list) or len(items) > MAX_CONFIGS:
+        raise ValueError(f"matrix deve ser uma lista com até {MAX_CONFIGS} configurações")
+    configs: List[MatrixConfig] = []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise ValueError(f"configuração {i}: esperado um objeto")
+        browser = str(item.get("browser") or "headlesschrome").lower().replace(" ", "")
+        if browser not in BROWSERS:
+            raise ValueError(f"configuração {i}: navegador inválido '{browser}' (use {', '.join(BROWSERS)})")
+        try:
+            width = int(item.get("width") or 1920)
+            height = int(item.get("height") or 1080)
+        except (TypeError, ValueError):
+            raise ValueError(f"configuração {i}: width/height devem ser inteiros")
+        if not (200 <= width <= 7680 and 200 <= height <= 4320):
+            raise ValueError(f"configuração {i}: viewport fora do intervalo ({width}x{height})")
+        name = str(item.get("name") or f"{browser}-{width}x{height}")
+        name = re.sub(r"[^a-zA-Z0-9_.-]+", "-", name).strip("-") or f"cfg{i}"
+        if any(c.name == name for c in configs):
+            raise ValueError(f"configuração {i}: nome repetido '{name}'")
+        configs.append(MatrixConfig(name, browser, width, height))
+    return configs
+
+
+def available_memory_mb() -> Optional[int]:
+    """Memória física disponível (MB), sem dependências; None se não for possível descobrir."""
+    if sys.platform == "win32":
+        try:
+            import ctypes
+
+            class _MemStatus(ctypes.Structure):
+                _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                            ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                            ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                            ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                            ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+
+            st = _MemStatus()
+            st.dwLength = ctypes.sizeof(_MemStatus)
+            if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(st)):
+                return int(st.ullAvailPhys // (1024 * 1024))
+        except Exception:
+            return None
+        return None
+    try:
+        with open("/proc/meminfo", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError):
+        pass
+    try:
+        return int(os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024))
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def max_parallel(n_configs: int, requested: Optional[int] = None) -> Dict[str, Any]:
+    """Quantas configurações rodam ao mesmo tempo: limitado por núcleos, memória livre e pelo pedido."""
+    cpus = os.cpu_count() or 1
+    mem = available_memory_mb()
+    by_mem = max(1, mem // MEM_PER_RUN_MB) if mem is not None else cpus
+    limit = max(1, min(n_configs, cpus, by_mem))
+    if requested:
+        limit = max(1, min(limit, int(requested)))
+    return {"workers": limit, "cpus": cpus, "available_mem_mb": mem, "mem_per_run_mb": MEM_PER_RUN_MB}
+
+
+def _run_config(prefix: List[str], cfg: MatrixConfig, sources: List[str], tag: str, out_dir: Path,
+                cwd: str, creationflags: int, timeout: Optional[float], splitlog: bool,
+                extra_args: List[str]) -> Dict[str, Any]:
+    cfg_dir = out_dir / cfg.name
+    cfg_dir.mkdir(parents=True, exist_ok=True)
+    cmd = prefix + ["-m", "robot", "-i", tag, "-d", str(cfg_dir), "--log", "log.html", "--report", "report.html",
+                    "--name", cfg.name]
+    if splitlog and len(sources) > 1:
+        cmd.append("--splitlog")
+    for v in cfg.variables():
+        cmd += ["-v", v]
+    cmd += extra_args + sources
+    with open(cfg_dir / "console_stdout.txt", "wb") as out, open(cfg_dir / "console_stderr.txt", "wb") as err:
+        try:
+            rc = subprocess.run(cmd, cwd=cwd, stdout=out, stderr=err, timeout=timeout, shell=False,
+                                creationflags=creationflags).returncode
+        except subprocess.TimeoutExpired:
+            rc = 252
+            err.write(f"\ntempo limite de {timeout}s excedido\n".encode("utf-8"))
+    return {"config": asdict(cfg), "returncode": rc, "cmd": cmd, "dir": cfg_dir}
+
+
+def matrix_table(results: List[Dict[str, Any]], project_name: str) -> Dict[str, Any]:
+    """Linhas = testes (suíte + nome), colunas = configurações, célula = {status, elapsed, message}."""
+    columns = [r["config"]["name"] for r in results]
+    rows: Dict[str, Dict[str, Any]] = {}
+    for r in results:
+        xml = r["dir"] / "output.xml"
+        if not xml.exists():
+            continue
+        try:
+            summary = summarize_output(xml, project_name)
+        except Exception:
+            continue
+        for t in summary["tests"]:
+            key = f"{t['suite']}::{t['name']}"
+            row = rows.setdefault(key, {"suite": t["suite"], "test": t["name"], "results": {}})
+            row["results"][r["config"]["name"]] = {
+                "status": t["status"], "elapsed": t["elapsed"], "message": t["message"][:500],
+            }
+    ordered = [rows[k] for k in sorted(rows)]
+    for row in ordered:
+        statuses = {c["status"] for c in row["results"].values()}
+        # resultado diferente entre configurações = problema específico de navegador/viewport
+        row["consistent"] = len(statuses) == 1 and len(row["results"]) == len(columns)
+    return {"columns": columns, "rows": ordered}
+
+
+def render_matrix_html(run_id: str, table: Dict[str, Any], configs: List[MatrixConfig]) -> str:
+    esc = html.escape
+    by_name = {c.name: c for c in configs}
+    head = "".join(
+        f'<th><a href="{esc(c)}/log.html">{esc(c)}</a><br><small>{esc(by_name[c].browser)} '
+        f'{by_name[c].width}x{by_name[c].height}</small></th>' for c in table["columns"]
+    )
+    body = []
+    for row in table["rows"]:
+        cells = []
+        for c in table["columns"]:
+            cell = row["results"].get(c)
+            if cell is None:
+                cells.append('<td class="NA">—</td>')
+            else:
+                cells.append(f'<td class="{esc(cell["status"] or "NA")}" title="{esc(cell["message"])}">'
+                             f'{esc(cell["status"] or "?")}<br><small>{cell["elapsed"]:.1f}s</small></td>')
+        flag = "" if row["consistent"] else ' class="diff"'
+        body.append(f"<tr{flag}><td>{esc(row['suite'])}</td><td>{esc(row['test'])}</td>{''.join(cells)}</tr>")
+    return f"""<!doctype html>
+<html lang="pt-br"><head><meta charset="utf-8"><title>Matriz {esc(run_id)}</title>
+<style>
+body{{font-family:sans-serif;margin:1.5em}} table{{border-collapse:collapse}}
+td,th{{border:1px solid #ccc;padding:.35em .6em;text-align:center}} td:nth-child(-n+2){{text-align:left}}
+.PASS{{background:#d4f7d4}} .FAIL{{background:#f7d4d4}} .SKIP{{background:#f3f3c8}} .NA{{color:#999}}
+tr.diff td:first-child{{border-left:4px solid #e07b00}}
+</style></head><body>
+<h2>Execução em matriz {esc(run_id)}</h2>
+<p><a href="report.html">Relatório consolidado</a> · <a href="log.html">Log consolidado</a>
+· linhas marcadas em laranja têm resultados diferentes entre configurações</p>
+<table><tr><th>Suíte</th><th>Teste</th>{head}</tr>
+{chr(10).join(body)}
+</table></body></html>
+"""
+
+
+def run_matrix(
+    prefix: List[str],
+    configs: List[MatrixConfig],
+    sources: List[str],
+    tag: str,
+    out_dir: Path,
+    cwd: str,
+    project_name: str,
+    run_id: str,
+    workers: int,
+    creationflags: int = 0,
+    timeout: Optional[float] = None,
+    splitlog: bool = True,
+    extra_args: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """`extra_args` vai para o robot de cada configuração (ex.: --prerunmodifier que ordena as suítes)."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(_run_config, prefix, c, sources, tag, out_dir, cwd, creationflags, timeout, splitlog,
+                               list(extra_args or []))
+                   for c in configs]
+        results = [f.result() for f in futures]
+
+    # rebot: um output.xml/log/report com uma suíte filha por configuração (log dividido por padrão)
+    outputs = [str(r["dir"] / "output.xml") for r in results if (r["dir"] / "output.xml").exists()]
+    rebot_rc = None
+    if outputs:
+        rebot = prefix + ["-m", "robot.rebot", "--name", "Matriz", "-d", str(out_dir), "--output", "output.xml",
+                          "--log", "log.html", "--report", "report.html"] + (["--splitlog"] if splitlog else []) + outputs
+        try:
+            rebot_rc = subprocess.run(rebot, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                      shell=False, creationflags=creationflags).returncode
+        except Exception:
+            rebot_rc = None
+
+    table = matrix_table(results, project_name)
+    (out_dir / "matrix.json").write_text(json.dumps(table, ensure_ascii=False, indent=2), encoding="utf-8")
+    (out_dir / "matrix.html").write_text(render_matrix_html(run_id, table, configs), encoding="utf-8")
+
+    # mesmo significado do rc do robot: nº de testes com falha (máx. 250); >250 = erro de execução
+    failed = [r["returncode"] for r in results]
+    rc = max(failed) if any(x > 250 for x in failed) else min(250, sum(failed))
+    return {
+        "returncode": rc,
+        "rebot_returncode": rebot_rc,
+        "configs": [
+            {**r["config"], "returncode": r["returncode"], "cmd": r["cmd"]} for r in results
+        ],
+        "table": table,
+    }
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import os
+import json
+import time
+import queue
+import signal
+import itertools
+import threading
+import subprocess
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+
+class WorkerError(RuntimeError):
+    pass
+
+
+class PoolUnavailable(WorkerError):
+    """Nenhum worker pôde ser reservado (nada foi enviado): o chamador pode usar subprocess."""
+
+
+# Falha ao subir um worker (ex.: interpretador sem robot) não desliga o pool de vez: ele fica fora
+# (chamadores usam subprocess) e tenta de novo após 5s, 10s, 20s... até 5 min entre tentativas.
+SPAWN_BACKOFF = 5.0
+SPAWN_BACKOFF_MAX = 300.0
+
+
+def group_popen_kwargs(creationflags: int = 0) -> Dict[str, Any]:
+    """Popen numa sessão/grupo próprio (POSIX), para kill_tree alcançar chromedriver e navegadores filhos."""
+    if os.name == "nt":
+        return {"creationflags": creationflags}
+    return {"creationflags": creationflags, "start_new_session": True}
+
+
+def kill_tree(proc: subprocess.Popen) -> None:
+    """Mata o processo e os descendentes (grupo de processos no POSIX; taskkill /T no Windows)."""
+    if os.name == "nt":
+        try:
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(proc.pid)], stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL, creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+        except OSError:
+            pass
+    else:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    try:
+        proc.kill()
+    except OSError:
+        pass
+
+
+class RobotWorker:
+    """Processo robot_worker.py com as bibliotecas já importadas, falando JSON por pipe."""
+
+    def __init__(self, prefix: List[str], script: Path, log_path: Path, creationflags: int = 0) -> None:
+        self.prefix = list(prefix)
+        self.runs = 0
+        self._lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        self._log = open(log_path, "ab")
+        self.proc = subprocess.Popen(
+            self.prefix + [str(script)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=self._log,
+            text=False,
+            shell=False,
+            **group_popen_kwargs(creationflags),
+        )
+        threading.Thread(target=self._reader, daemon=True).start()
+
+    def _reader(self) -> None:
+        assert self.proc.stdout is not None
+        try:
+            for raw in iter(self.proc.stdout.readline, b""):
+                self._lines.put(raw.decode("utf-8", errors="replace"))
+        except Exception:
+            pass
+        self._lines.put(None)
+
+    def _read(self, timeout: Optional[float]) -> Dict[str, Any]:
+        try:
+            line = self._lines.get(timeout=timeout)
+        except queue.Empty:
+            raise WorkerError("worker não respondeu a tempo")
+        if line is None:
+            raise WorkerError(f"worker encerrou (rc={self.proc.poll()})")
+        return json.loads(line)
+
+    def wait_ready(self, timeout: float) -> Dict[str, Any]:
+        hello = self._read(timeout)
+        if not hello.get("ready"):
+            raise WorkerError("robot não pôde ser importado no interpretador do worker")
+        return hello
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def run(self, req: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        assert self.proc.stdin is not None
+        self.proc.stdin.write((json.dumps(req) + "\n").encode("utf-8"))
+        self.proc.stdin.flush()
+        resp = self._read(timeout)
+        self.runs += 1
+        return resp
+
+    def close(self, force: bool = False) -> None:
+        """Encerra o worker; `force` (timeout/erro no meio de uma execução) mata sem pedir saída."""
+        try:
+            if not force and self.alive() and self.proc.stdin:
+                self.proc.stdin.write(b'{"cmd": "exit"}\n')
+                self.proc.stdin.flush()
+                self.proc.wait(timeout=3)
+        except Exception:
+            pass
+        # também depois de uma saída limpa: chromedriver/navegador que tenham sobrado no grupo
+        kill_tree(self.proc)
+        try:
+            self._log.close()
+        except Exception:
+            pass
+
+
+class RobotPool:
+    """Pool de workers Robot pré-iniciados.
+
+    - Cada worker é reciclado após `max_runs` execuções; entre execuções o robot_worker.py restaura
+      cwd/sys.path e descarta os módulos de bibliotecas do projeto (ver KEEP_MODULES lá).
+    - Worker que não sobe deixa o pool fora por um intervalo crescente (SPAWN_BACKOFF), não para sempre.
+    - Timeout/erro no meio de uma execução mata o worker com todo o grupo de processos (navegadores inclusos).
+    - Se o prefixo do interpretador mudar (ex.: outro venv), os workers antigos são descartados.
+    - Saídas do robot ficam isoladas no diretório de cada execução (outputdir + arquivos de console).
+    """
+
+    def __init__(
+        self,
+        prefix_factory: Callable[[], List[str]],
+        script: Path,
+        log_dir: Path,
+        size: int = 1,
+        max_runs: int = 20,
+        ready_timeout: float = 120.0,
+        creationflags: int = 0,
+    ) -> None:
+        self.prefix_factory = prefix_factory
+        self.script = script
+        self.log_dir = log_dir
+        self.size = max(0, int(size))
+        self.max_runs = max(1, int(max_runs))
+        self.ready_timeout = ready_timeout
+        self.creationflags = creationflags
+        self._idle: "queue.Queue[RobotWorker]" = queue.Queue()
+        self._count = 0
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._failures = 0
+        self._retry_at = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0 and self.script.exists() and time.monotonic() >= self._retry_at
+
+    def _spawn(self) -> RobotWorker:
+        n = next(self._ids)
+        w = RobotWorker(self.prefix_factory(), self.script, self.log_dir / f"worker_{n}.log", self.creationflags)
+        try:
+            w.wait_ready(self.ready_timeout)
+        except Exception:
+            w.close()
+            raise
+        return w
+
+    def _replenish(self) -> None:
+        try:
+            w = self._spawn()
+        except Exception:
+            with self._lock:
+                self._count -= 1
+                # ex.: interpretador sem robot: fica fora (subprocess) e tenta de novo mais tarde
+                self._failures += 1
+                delay = min(SPAWN_BACKOFF_MAX, SPAWN_BACKOFF * 2 ** (self._failures - 1))
+                self._retry_at = time.monotonic() + delay
+            return
+        with self._lock:
+            self._failures = 0
+        self._idle.put(w)
+
+    def warm(self) -> None:
+        """Inicia (em background) os workers que faltam para completar o pool."""
+        if not self.enabled:
+            return
+        with self._lock:
+            missing = self.size - self._count
+            self._count += max(0, missing)
+        for _ in range(max(0, missing)):
+            threading.Thread(target=self._replenish, daemon=True).start()
+
+    def _lease(self, timeout: float) -> RobotWorker:
+        """Worker ocioso com o prefixo atual; timeout <= 0 não espera (todos ocupados ou ainda subindo)."""
+        self.warm()
+        prefix = self.prefix_factory()
+        deadline = time.monotonic() + timeout
+        while True:
+            if not self.enabled:
+                raise PoolUnavailable("pool desabilitado")
+            try:
+                w = self._idle.get_nowait() if timeout <= 0 else self._idle.get(timeout=0.25)
+            except queue.Empty:
+                if time.monotonic() >= deadline:
+                    raise PoolUnavailable("nenhum worker disponível")
+                continue
+            if w.alive() and w.prefix == prefix:
+                return w
+            self._retire(w)
+
+    def _retire(self, w: RobotWorker, force: bool = False) -> None:
+        w.close(force)
+        with self._lock:
+            self._count -= 1
+        self.warm()
+
+    def run(
+        self,
+        cwd: str,
+        sources: List[str],
+        options: Dict[str, Any],
+        stdout_path: Path,
+        stderr_path: Path,
+        timeout: Optional[float] = None,
+        lease_timeout: float = 0,
+    ) -> int:
+        """Executa num worker ocioso. PoolUnavailable = nada foi enviado; outros erros (WorkerError por
+        timeout/queda do worker) acontecem depois do envio e o worker é descartado."""
+        if not self.enabled:
+            raise PoolUnavailable("pool desabilitado")
+        # por padrão não espera: com o worker ocupado (outra execução), o chamador cai para subprocess na hora
+        w = self._lease(lease_timeout)
+        req = {
+            "id": next(self._ids),
+            "cwd": cwd,
+            "sources": sources,
+            "options": options,
+            "stdout": str(stdout_path),
+            "stderr": str(stderr_path),
+        }
+        try:
+            resp = w.run(req, timeout=timeout)
+        except Exception:
+            self._retire(w, force=True)
+            raise
+        if w.runs >= self.max_runs or not w.alive():
+            self._retire(w)
+        else:
+            self._idle.put(w)
+        if resp.get("error"):
+            try:
+                with open(stderr_path, "a", encoding="utf-8") as f:
+                    f.write("\n" + resp["error"])
+            except Exception:
+                pass
+        return int(resp.get("rc", 255))
+
+    def reset(self) -> None:
+        """Descarta os workers ociosos e reabilita o pool já (ex.: após instalar dependências)."""
+        self.shutdown()
+        with self._lock:
+            self._failures = 0
+            self._retry_at = 0.0
+
+    def shutdown(self) -> None:
+        while True:
+            try:
+                w = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            w.close()
+            with self._lock:
+                self._count -= 1
@@ -0,0 +1,94 @@
+"""Worker de execução do Robot mantido "aquecido" pelo servidor (ver robot_pool.py).
+
+Roda no interpretador alvo (não no EXE): importa as bibliotecas pesadas uma única vez e
+executa robot.run para cada pedido recebido no stdin (uma linha JSON por pedido). As respostas
+saem pelo stdout original; qualquer print das bibliotecas é desviado para o stderr.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import json
+import importlib
+import traceback
+
+# Bibliotecas usadas pelas suítes; importá-las aqui é o que economiza tempo em cada execução.
+PRELOAD = ("robot", "SeleniumLibrary", "RequestsLibrary", "FakerLibrary")
+
+# Bibliotecas do projeto (módulos sob o cwd da execução) são descartadas após cada execução, então
+# estado de módulo (smart_wait._RECORDS, api_client, mock_fixture...) não passa para a próxima.
+# Exceção intencional: o pool de navegadores, limitado a MAGAZORD_BROWSER_POOL ociosos, cada um
+# reciclado após MAGAZORD_BROWSER_MAX_USES usos (e o worker inteiro após MAGAZORD_ROBOT_POOL_MAX_RUNS).
+KEEP_MODULES = ("browser_pool",)
+
+
+def _preload() -> list:
+    loaded = []
+    for mod in PRELOAD:
+        try:
+            importlib.import_module(mod)
+            loaded.append(mod)
+        except Exception:
+            pass
+    return loaded
+
+
+def _drop_project_modules(root: str) -> None:
+    root = os.path.normcase(os.path.abspath(root)) + os.sep
+    for name, mod in list(sys.modules.items()):
+        path = getattr(mod, "__file__", None)
+        if not path or name.split(".")[0] in KEEP_MODULES:
+            continue
+        if os.path.normcase(os.path.abspath(path)).startswith(root):
+            del sys.modules[name]
+
+
+def _handle(req: dict) -> dict:
+    import robot
+
+    cwd = req.get("cwd") or os.getcwd()
+    options = dict(req.get("options") or {})
+    start_cwd, start_path = os.getcwd(), list(sys.path)
+    os.chdir(cwd)
+    try:
+        with open(req["stdout"], "w", encoding="utf-8", errors="replace") as out, \
+                open(req["stderr"], "w", encoding="utf-8", errors="replace") as err:
+            rc = robot.run(*req["sources"], stdout=out, stderr=err, **options)
+    finally:
+        os.chdir(start_cwd)
+        sys.path[:] = start_path
+        _drop_project_modules(cwd)
+    return {"id": req.get("id"), "rc": rc}
+
+
+def main() -> int:
+    # Canal do protocolo = stdout original; o fd 1 passa a apontar para o stderr.
+    proto = os.fdopen(os.dup(1), "w", encoding="utf-8", buffering=1)
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+
+    loaded = _preload()
+    proto.write(json.dumps({"ready": "robot" in loaded, "preloaded": loaded, "python": sys.executable}) + "\n")
+    if "robot" not in loaded:
+        return 1
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            req = json.loads(line)
+        except ValueError:
+            continue
+        if req.get("cmd") == "exit":
+            break
+        try:
+            resp = _handle(req)
+        except Exception as e:
+            resp = {"id": req.get("id"), "rc": 255, "error": f"{e}\n{traceback.format_exc()}"}
+        proto.write(json.dumps(resp) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from run_history import STEP_TAGS, _status_elapsed, suite_key_from_source
+
+# Diff entre duas execuções (output.xml), teste a teste e keyword a keyword.
+#
+# Os dois arquivos são lidos em streaming (iterparse + clear): do primeiro fica só um registro compacto
+# por teste (status, duração, mensagem e um mapa caminho-da-keyword -> (status, duração, mensagem));
+# o segundo é comparado à medida que cada teste termina, e o que sobrar do primeiro foi removido.
+
+MSG_MAX = 300
+DEFAULT_THRESHOLD_SEC = 1.0
+DEFAULT_THRESHOLD_PCT = 20.0
+DEFAULT_MAX_KEYWORDS = 25
+
+# (status, duração, mensagem de falha)
+KwResult = Tuple[Optional[str], float, str]
+
+
+def _step_label(elem: ET.Element) -> str:
+    tag = elem.tag
+    if tag == "kw":
+        name = elem.get("name", "")
+        kind = elem.get("type", "")
+        # setup/teardown aparecem como <kw type="SETUP">; keywords comuns não têm type
+        return f"{kind} {name}" if kind and kind not in ("KEYWORD",) else name
+    if tag == "branch":
+        cond = elem.get("condition") or elem.get("pattern") or ""
+        return f"{elem.get('type', 'BRANCH')} {cond}".strip()
+    if tag == "for":
+        return f"FOR {elem.get('flavor', 'IN')}"
+    if tag == "iter":
+        return "ITERATION"
+    if tag == "variable":
+        return f"VAR {elem.get('name', '')}"
+    return tag.upper()
+
+
+def _short(msg: str) -> str:
+    msg = (msg or "").strip()
+    return msg if len(msg) <= MSG_MAX else msg[:MSG_MAX] + "…"
+
+
+def iter_test_records(xml_path: Path, project_name: str) -> Iterator[Dict[str, Any]]:
+    """Percorre um output.xml em streaming e gera um registro compacto por teste, na ordem do arquivo."""
+    stack: List[str] = []
+    suite_stack: List[str] = []
+    seen: Dict[str, int] = {}
+    test: Optional[Dict[str, Any]] = None
+    # por passo aberto: [caminho, contador de rótulos dos filhos, status, duração, mensagem de falha]
+    steps: List[List[Any]] = []
+    root_counts: Dict[str, int] = {}
+
+    for event, elem in ET.iterparse(str(xml_path), events=("start", "end")):
+        tag = elem.tag
+        if tag == "statistics" or "statistics" in stack:
+            if event == "start":
+                stack.append(tag)
+            else:
+                stack.pop()
+            continue
+        if event == "start":
+            stack.append(tag)
+            if tag == "suite":
+                suite_stack.append(suite_key_from_source(elem.get("source", ""), project_name))
+            elif tag == "test" and suite_stack:
+                suite = suite_stack[-1]
+                base_key = f"{suite}::{elem.get('name', '')}"
+                n = seen[base_key] = seen.get(base_key, 0) + 1
+                # mesmo teste mais de uma vez (ex.: execução em matriz): #2, #3...
+                test = {"key": base_key if n == 1 else f"{base_key} #{n}", "suite": suite,
+                        "name": elem.get("name", ""), "status": None, "elapsed": 0.0, "message": "",
+                        "keywords": {}}
+                steps = []
+                root_counts = {}
+            elif tag in STEP_TAGS and test is not None:
+                counts = steps[-1][1] if steps else root_counts
+                label = _step_label(elem)
+                i = counts[label] = counts.get(label, 0) + 1
+                seg = label if i == 1 else f"{label} #{i}"
+                path = f"{steps[-1][0]} > {seg}" if steps else seg
+                steps.append([path, {}, None, 0.0, ""])
+            continue
+
+        # event == "end"
+        stack.pop()
+        parent = stack[-1] if stack else None
+        if test is None:
+            if tag == "suite":
+                suite_stack.pop()
+                elem.clear()
+            continue
+        if tag == "status":
+            if parent == "test":
+                test["status"] = elem.get("status")
+                test["elapsed"] = round(_status_elapsed(elem.attrib), 6)
+                test["message"] = _short(elem.text or "")
+            elif parent in STEP_TAGS and steps:
+                steps[-1][2] = elem.get("status")
+                steps[-1][3] = round(_status_elapsed(elem.attrib), 6)
+                if elem.text and elem.text.strip():
+                    steps[-1][4] = _short(elem.text)
+        elif tag == "msg" and parent in STEP_TAGS and steps and elem.get("level") == "FAIL" and not steps[-1][4]:
+            steps[-1][4] = _short(elem.text or "")
+            elem.clear()
+        elif tag in STEP_TAGS and steps:
+            path, _counts, status, elapsed, msg = steps.pop()
+            test["keywords"][path] = (status, elapsed, msg if status == "FAIL" else "")
+            elem.clear()
+        elif tag == "test":
+            yield test
+            test = None
+            elem.clear()
+        elif tag == "msg":
+            elem.clear()
+
+
+def _duration_change(a: float, b: float, threshold_sec: float, threshold_pct: float) -> Optional[str]:
+    delta = b - a
+    if abs(delta) < threshold_sec:
+        return None
+    if threshold_pct and a > 0 and abs(delta) / a * 100.0 < threshold_pct:
+        return None
+    return "slower" if delta > 0 else "faster"
+
+
+def _diff_keywords(base: Dict[str, KwResult], head: Dict[str, KwResult], threshold_sec: float,
+                   threshold_pct: float) -> List[Dict[str, Any]]:
+    changes: List[Dict[str, Any]] = []
+    for path, (hs, he, hm) in head.items():
+        old = base.pop(path, None)
+        if old is None:
+            changes.append({"path": path, "change": ["added"], "status": [None, hs], "elapsed": [None, he],
+                            **({"message": [None, hm]} if hm else {})})
+            continue
+        bs, be, bm = old
+        kinds = []
+        if bs != hs:
+            kinds.append("status")
+        if bm != hm and bs == hs == "FAIL":
+            kinds.append("message")
+        dur = _duration_change(be, he, threshold_sec, threshold_pct)
+        if dur:
+            kinds.append(dur)
+        if kinds:
+            entry: Dict[str, Any] = {"path": path, "change": kinds, "status": [bs, hs], "elapsed": [be, he]}
+            if bm or hm:
+                entry["message"] = [bm, hm]
+            changes.append(entry)
+    for path, (bs, be, bm) in base.items():
+        changes.append({"path": path, "change": ["removed"], "status": [bs, None], "elapsed": [be, None],
+                        **({"message": [bm, None]} if bm else {})})
+    return changes
+
+
+def _kw_rank(entry: Dict[str, Any]) -> int:
+    # status/mensagem primeiro; keywords novas/removidas depois; só duração por último
+    kinds = entry["change"]
+    if "status" in kinds or "message" in kinds:
+        return 0
+    if "added" in kinds or "removed" in kinds:
+        return 1
+    return 2
+
+
+def _test_rank(entry: Dict[str, Any]) -> Tuple[int, float]:
+    kinds = entry["change"]
+    if "status" in kinds:
+        # PASS -> FAIL (regressão) antes de FAIL -> PASS
+        return (0 if entry["status"][1] == "FAIL" else 1, 0.0)
+    if "added" in kinds or "removed" in kinds:
+        return (2, 0.0)
+    if "message" in kinds:
+        return (3, 0.0)
+    if "slower" in kinds or "faster" in kinds:
+        return (4, -abs(entry.get("delta_sec") or 0.0))
+    return (5, 0.0)
+
+
+def _totals() -> Dict[str, Any]:
+    return {"total": 0, "pass": 0, "fail": 0, "skip": 0, "elapsed_sec": 0.0}
+
+
+def _count(totals: Dict[str, Any], rec: Dict[str, Any]) -> None:
+    totals["total"] += 1
+    key = {"PASS": "pass", "FAIL": "fail", "SKIP": "skip"}.get(rec["status"] or "")
+    if key:
+        totals[key] += 1
+    totals["elapsed_sec"] = round(totals["elapsed_sec"] + rec["elapsed"], 3)
+
+
+def diff_runs(
+    base_xml: Path,
+    head_xml: Path,
+    project_name: str,
+    threshold_sec: float = DEFAULT_THRESHOLD_SEC,
+    threshold_pct: float = DEFAULT_THRESHOLD_PCT,
+    max_keywords: int = DEFAULT_MAX_KEYWORDS,
+) -> Dict[str, Any]:
+    """Compara dois output.xml (base -> head) e devolve só o que mudou, em JSON compacto.
+
+    Um teste entra em `tests` se mudou de status, apareceu/sumiu, mudou a mensagem de falha, ficou mais
+    lento/rápido que o limiar (`threshold_sec` e, se informado, `threshold_pct` % da duração anterior)
+    ou se alguma keyword mudou. As keywords de cada teste vêm limitadas a `max_keywords`.
+    """
+    base: Dict[str, Dict[str, Any]] = {}
+    base_totals = _totals()
+    for rec in iter_test_records(base_xml, project_name):
+        _count(base_totals, rec)
+        base[rec["key"]] = rec
+
+    head_totals = _totals()
+    counts = {"status_changed": 0, "added": 0, "removed": 0, "message_changed": 0, "slower": 0, "faster": 0,
+              "keyword_changes": 0, "unchanged": 0}
+    tests: List[Dict[str, Any]] = []
+
+    def add(entry: Dict[str, Any], kw_changes: List[Dict[str, Any]]) -> None:
+        if kw_changes:
+            kw_changes.sort(key=_kw_rank)
+            entry["keywords"] = kw_changes[:max_keywords]
+            if len(kw_changes) > max_keywords:
+                entry["keywords_omitted"] = len(kw_changes) - max_keywords
+        tests.append(entry)
+
+    for rec in iter_test_records(head_xml, project_name):
+        _count(head_totals, rec)
+        old = base.pop(rec["key"], None)
+        entry: Dict[str, Any] = {"key": rec["key"], "suite": rec["suite"], "name": rec["name"]}
+        if old is None:
+            counts["added"] += 1
+            entry.update(change=["added"], status=[None, rec["status"]], elapsed=[None, rec["elapsed"]])
+            if rec["message"]:
+                entry["message"] = [None, rec["message"]]
+            add(entry, [])
+            continue
+
+        kinds = []
+        if old["status"] != rec["status"]:
+            kinds.append("status")
+            counts["status_changed"] += 1
+        if old["status"] == rec["status"] == "FAIL" and old["message"] != rec["message"]:
+            kinds.append("message")
+            counts["message_changed"] += 1
+        dur = _duration_change(old["elapsed"], rec["elapsed"], threshold_sec, threshold_pct)
+        if dur:
+            kinds.append(dur)
+            counts[dur] += 1
+        kw_changes = _diff_keywords(old["keywords"], rec["keywords"], threshold_sec, threshold_pct)
+        if kw_changes:
+            counts["keyword_changes"] += 1
+            if not kinds:
+                kinds.append("keywords")
+        if not kinds:
+            counts["unchanged"] += 1
+            continue
+        entry.update(change=kinds, status=[old["status"], rec["status"]], elapsed=[old["elapsed"], rec["elapsed"]],
+                     delta_sec=round(rec["elapsed"] - old["elapsed"], 3))
+        if old["message"] or rec["message"]:
+            entry["message"] = [old["message"], rec["message"]]
+        add(entry, kw_changes)
+
+    for old in base.values():
+        counts["removed"] += 1
+        entry = {"key": old["key"], "suite": old["suite"], "name": old["name"], "change": ["removed"],
+                 "status": [old["status"], None], "elapsed": [old["elapsed"], None]}
+        if old["message"]:
+            entry["message"] = [old["message"], None]
+        tests.append(entry)
+
+    tests.sort(key=_test_rank)
+    return {
+        "threshold_sec": threshold_sec,
+        "threshold_pct": threshold_pct,
+        "base": base_totals,
+        "head": head_totals,
+        "counts": counts,
+        "tests": tests,
+    }
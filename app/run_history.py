@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import json
+import heapq
+import threading
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Resumo por execução gravado ao lado do output.xml (evita reprocessar o XML a cada consulta).
+SUMMARY_NAME = "_summary.json"
+SUMMARY_VERSION = 2
+
+# Elementos do corpo de um teste que contam como passo (keyword ou estrutura de controle)
+# (<variable> é a sintaxe VAR; <var> é só o valor atribuído/da iteração, não um passo)
+STEP_TAGS = {"kw", "for", "iter", "if", "branch", "try", "while", "group", "return", "variable", "break",
+             "continue", "error"}
+
+# Parâmetros do modelo de duração
+EWMA_ALPHA = 0.3
+P90_WINDOW = 20
+DEFAULT_SUITE_SEC = 60.0
+
+
+def _parse_robot_ts(s: str) -> Optional[datetime]:
+    """Converte timestamps do Robot (RF 7: ISO; RF < 7: '20260226 01:13:14.490')."""
+    if not s or s == "N/A":
+        return None
+    for fmt in ("%Y-%m-%dT%H:%M:%S.%f", "%Y-%m-%dT%H:%M:%S", "%Y%m%d %H:%M:%S.%f", "%Y%m%d %H:%M:%S"):
+        try:
+            return datetime.strptime(s, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def _status_elapsed(attrs: Dict[str, str]) -> float:
+    """Duração (segundos) de um elemento <status>, compatível com os dois schemas do output.xml."""
+    if "elapsed" in attrs:
+        try:
+            return float(attrs["elapsed"])
+        except ValueError:
+            return 0.0
+    start = _parse_robot_ts(attrs.get("starttime", ""))
+    end = _parse_robot_ts(attrs.get("endtime", ""))
+    if start and end:
+        return max(0.0, (end - start).total_seconds())
+    return 0.0
+
+
+def suite_key_from_source(source: str, project_name: str) -> str:
+    """Normaliza o 'source' de uma suíte para o caminho relativo ao projeto.
+
+    O output.xml guarda caminhos absolutos da máquina que executou (ex.: E:\\...\\TesteMagazord\\parte1-api\\...),
+    então cortamos tudo até o nome da pasta do projeto.
+    """
+    s = (source or "").replace("\\", "/")
+    marker = "/" + project_name + "/"
+    i = s.rfind(marker)
+    if i >= 0:
+        return s[i + len(marker):]
+    if s.endswith("/" + project_name):
+        return "."
+    return s
+
+
+def summarize_output(xml_path: Path, project_name: str) -> Dict[str, Any]:
+    """Lê um output.xml em streaming e devolve um resumo compacto de suítes e testes."""
+    suites: Dict[str, Dict[str, Any]] = {}
+    tests: List[Dict[str, Any]] = []
+
+    stack: List[str] = []
+    suite_stack: List[Dict[str, Any]] = []
+    cur_test: Optional[Dict[str, Any]] = None
+    # passos abertos do teste atual: [nome da keyword ou None, status, cadeia de keywords que falharam abaixo]
+    steps: List[List[Any]] = []
+    test_failed_chain: Optional[List[str]] = None
+
+    for event, elem in ET.iterparse(str(xml_path), events=("start", "end")):
+        tag = elem.tag
+        if tag == "statistics" or "statistics" in stack:
+            # <statistics> também tem elementos <suite>; não interessam aqui
+            if event == "start":
+                stack.append(tag)
+            else:
+                stack.pop()
+            continue
+        if event == "start":
+            stack.append(tag)
+            if tag == "suite":
+                suite_stack.append({
+                    "key": suite_key_from_source(elem.get("source", ""), project_name),
+                    "name": elem.get("name", ""),
+                    "id": elem.get("id", ""),
+                })
+            elif tag == "test" and suite_stack:
+                cur_test = {
+                    "id": elem.get("id", ""),
+                    "name": elem.get("name", ""),
+                    "longname": ".".join([s["name"] for s in suite_stack] + [elem.get("name", "")]),
+                    "suite": suite_stack[-1]["key"],
+                    "status": None,
+                    "elapsed": 0.0,
+                    "message": "",
+                    "failed_keyword": "",
+                }
+                steps = []
+                test_failed_chain = None
+            elif tag in STEP_TAGS and cur_test is not None:
+                steps.append([elem.get("name") if tag == "kw" else None, None, None])
+            continue
+
+        # event == "end"
+        stack.pop()
+        parent = stack[-1] if stack else None
+        if tag == "status" and parent == "test" and cur_test is not None:
+            cur_test["status"] = elem.get("status")
+            cur_test["elapsed"] = round(_status_elapsed(elem.attrib), 6)
+            cur_test["message"] = (elem.text or "").strip()
+        elif tag == "status" and parent in STEP_TAGS and steps:
+            steps[-1][1] = elem.get("status")
+        elif tag == "status" and parent == "suite" and suite_stack:
+            s = suite_stack[-1]
+            s["status"] = elem.get("status")
+            s["elapsed"] = round(_status_elapsed(elem.attrib), 6)
+        elif tag in STEP_TAGS and steps:
+            # keyword que falhou = cadeia de passos FAIL a partir do topo do teste; falhas dentro de
+            # passos que passaram (ex.: Run Keyword And Ignore Error) não entram
+            name, status, chain = steps.pop()
+            if status == "FAIL":
+                chain = ([name] if name else []) + (chain or [])
+                if steps:
+                    if steps[-1][2] is None:
+                        steps[-1][2] = chain
+                elif test_failed_chain is None:
+                    test_failed_chain = chain
+            elem.clear()
+        elif tag == "test":
+            if cur_test is not None:
+                if cur_test["status"] == "FAIL" and test_failed_chain:
+                    cur_test["failed_keyword"] = " > ".join(test_failed_chain)
+                tests.append(cur_test)
+            cur_test = None
+            steps = []
+            elem.clear()
+        elif tag == "suite":
+            s = suite_stack.pop()
+            suites[s["key"]] = {k: v for k, v in s.items() if k != "key"}
+            elem.clear()
+        elif tag == "kw":
+            elem.clear()
+
+    return {"version": SUMMARY_VERSION, "suites": suites, "tests": tests}
+
+
+class RunHistory:
+    """Índice das execuções em static/runs com cache de resumo por output.xml."""
+
+    def __init__(self, runs_dir: Path, project_name: str) -> None:
+        self.runs_dir = runs_dir
+        self.project_name = project_name
+        self._lock = threading.Lock()
+        self._mem: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+    def summary(self, run_dir: Path) -> Optional[Dict[str, Any]]:
+        xml = run_dir / "output.xml"
+        try:
+            mtime = xml.stat().st_mtime
+        except OSError:
+            return None
+
+        with self._lock:
+            hit = self._mem.get(run_dir.name)
+            if hit and hit[0] == mtime:
+                return hit[1]
+
+        cache = run_dir / SUMMARY_NAME
+        data: Optional[Dict[str, Any]] = None
+        try:
+            if cache.exists():
+                cached = json.loads(cache.read_text(encoding="utf-8"))
+                if cached.get("version") == SUMMARY_VERSION and cached.get("source_mtime") == mtime:
+                    data = cached
+        except Exception:
+            data = None
+
+        if data is None:
+            try:
+                data = summarize_output(xml, self.project_name)
+            except ET.ParseError:
+                # execução interrompida: output.xml incompleto
+                return None
+            data["source_mtime"] = mtime
+            try:
+                cache.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            except Exception:
+                pass
+
+        with self._lock:
+            self._mem[run_dir.name] = (mtime, data)
+        return data
+
+    def iter_summaries(self) -> Iterable[Tuple[str, Dict[str, Any]]]:
+        """Resumos em ordem cronológica (run_id começa com YYYYmmdd_HHMMSS)."""
+        if not self.runs_dir.exists():
+            return
+        for p in sorted(self.runs_dir.iterdir(), key=lambda x: x.name):
+            if not p.is_dir():
+                continue
+            data = self.summary(p)
+            if data is not None:
+                yield p.name, data
+
+
+@dataclass
+class DurationStats:
+    samples: List[float] = field(default_factory=list)
+    ewma: float = 0.0
+
+    def add(self, value: float, alpha: float = EWMA_ALPHA) -> None:
+        self.ewma = value if not self.samples else (alpha * value + (1 - alpha) * self.ewma)
+        self.samples.append(value)
+        if len(self.samples) > P90_WINDOW:
+            del self.samples[0]
+
+    @property
+    def p90(self) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        idx = max(0, min(len(ordered) - 1, int(round(0.9 * (len(ordered) - 1)))))
+        return ordered[idx]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"ewma_sec": round(self.ewma, 3), "p90_sec": round(self.p90, 3), "samples": len(self.samples)}
+
+
+class DurationModel:
+    """Modelo de duração por suíte e por teste (EWMA + p90) alimentado pelo histórico."""
+
+    def __init__(self) -> None:
+        self.suites: Dict[str, DurationStats] = {}
+        self.tests: Dict[str, DurationStats] = {}
+
+    @classmethod
+    def from_history(cls, history: RunHistory) -> "DurationModel":
+        model = cls()
+        for _run_id, data in history.iter_summaries():
+            model.feed(data)
+        return model
+
+    def feed(self, summary: Dict[str, Any]) -> None:
+        for key, s in (summary.get("suites") or {}).items():
+            # só arquivos .robot: diretórios agregam suítes diferentes a cada seleção de tag
+            if not key.lower().endswith(".robot"):
+                continue
+            if s.get("status") not in ("PASS", "FAIL") or not s.get("elapsed"):
+                continue
+            self.suites.setdefault(key, DurationStats()).add(float(s["elapsed"]))
+        for t in summary.get("tests") or []:
+            if t.get("status") not in ("PASS", "FAIL") or not t.get("elapsed"):
+                continue
+            tkey = f"{t.get('suite')}::{t.get('name')}"
+            self.tests.setdefault(tkey, DurationStats()).add(float(t["elapsed"]))
+
+    def default_suite_sec(self) -> float:
+        """Estimativa para suítes sem histórico: mediana das EWMA conhecidas."""
+        known = sorted(s.ewma for s in self.suites.values())
+        if not known:
+            return DEFAULT_SUITE_SEC
+        return known[len(known) // 2]
+
+    def estimate_suite(self, key: str) -> Dict[str, Any]:
+        st = self.suites.get(key)
+        if st is None:
+            d = self.default_suite_sec()
+            return {"ewma_sec": round(d, 3), "p90_sec": round(d, 3), "samples": 0}
+        return st.to_dict()
+
+    def estimate_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """ETA de suítes executadas em sequência (um único processo robot)."""
+        ewma = 0.0
+        p90 = 0.0
+        unknown = 0
+        for k in keys:
+            e = self.estimate_suite(k)
+            ewma += e["ewma_sec"]
+            p90 += e["p90_sec"]
+            if not e["samples"]:
+                unknown += 1
+        return {"eta_sec": round(ewma, 1), "p90_sec": round(p90, 1), "unknown_suites": unknown}
+
+
+def lpt_pack(jobs: Dict[str, float], workers: int) -> List[Dict[str, Any]]:
+    """Empacota jobs em N workers por 'longest processing time first'.
+
+    Ordena do mais longo para o mais curto e entrega cada job ao worker com menor carga,
+    o que faz todos terminarem próximos (makespan <= 4/3 do ótimo).
+    """
+    workers = max(1, int(workers))
+    bins: List[Dict[str, Any]] = [{"worker": i, "jobs": [], "total_sec": 0.0} for i in range(workers)]
+    heap: List[Tuple[float, int]] = [(0.0, i) for i in range(workers)]
+    heapq.heapify(heap)
+    for key, dur in sorted(jobs.items(), key=lambda kv: (-kv[1], kv[0])):
+        load, i = heapq.heappop(heap)
+        bins[i]["jobs"].append(key)
+        bins[i]["total_sec"] = round(load + dur, 3)
+        heapq.heappush(heap, (load + dur, i))
+    return bins
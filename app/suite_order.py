@@ -0,0 +1,49 @@
+"""Pré-modificador do Robot que ordena as suítes da mais longa para a mais curta (ver run_history.DurationModel).
+
+Roda no interpretador alvo (não no EXE), como o robot_worker.py: só depende do próprio Robot.
+O servidor grava as durações previstas num JSON e passa o caminho como argumento:
+
+    --prerunmodifier /caminho/suite_order.py;/caminho/suite_durations.json
+
+O JSON é {"default_sec": s, "suites": {caminho absoluto do .robot: s}}. Diretórios somam as filhas e
+arquivos sem histórico usam `default_sec`. Só a ordem muda: nomes (longnames) e hierarquia continuam os mesmos.
+"""
+from __future__ import annotations
+
+import os
+import json
+
+from robot.api import SuiteVisitor
+
+
+def _norm(path) -> str:
+    return os.path.normcase(os.path.abspath(str(path)))
+
+
+class LongestFirst(SuiteVisitor):
+    def __init__(self, durations_path: str) -> None:
+        try:
+            with open(durations_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        self.default = float(data.get("default_sec") or 0.0)
+        self.known = {_norm(k): float(v) for k, v in (data.get("suites") or {}).items()}
+
+    def _estimate(self, suite) -> float:
+        if not suite.suites:
+            return self.known.get(_norm(suite.source), self.default) if suite.source else self.default
+        return sum(self._estimate(s) for s in suite.suites)
+
+    def start_suite(self, suite) -> None:
+        if len(suite.suites) > 1:
+            # sort estável: empates mantêm a ordem de descoberta do Robot
+            ordered = sorted(suite.suites, key=self._estimate, reverse=True)
+            suite.suites = list(ordered)
+
+    def visit_test(self, test) -> None:
+        pass
+
+
+# importado por caminho, o Robot procura a classe com o nome do módulo
+suite_order = LongestFirst
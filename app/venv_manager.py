@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import os
+import json
+import shutil
+import hashlib
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Marcador gravado quando o venv terminou de instalar o requirements.txt com sucesso.
+READY_MARKER = "magazord_ready.json"
+LOCK_NAME = "magazord_lock.json"
+
+
+class VenvManager:
+    """Venvs isolados por projeto, identificados pelo hash do requirements.txt.
+
+    Cada pacote de testes (zip aberto via /api/open_zip) ganha o seu venv em data/_venvs/<hash>;
+    trocar de pacote e voltar reaproveita o venv existente em vez de reinstalar. Todos compartilham
+    o cache do pip (wheels já baixadas/compiladas) e, se houver, a wheelhouse local.
+    """
+
+    def __init__(self, root: Path, pip_cache_dir: Path) -> None:
+        self.root = root
+        self.pip_cache_dir = pip_cache_dir
+        # (arquivo, mtime, tamanho, interpretador base) -> chave; evita reler/re-hashear a cada execução
+        self._key_cache: Dict[Tuple[str, int, int, Tuple[str, ...]], str] = {}
+
+    @staticmethod
+    def key(req_text: str, base_prefix: List[str]) -> str:
+        # normaliza (ordem/espaços não importam) e inclui o interpretador base
+        lines = sorted(l.strip() for l in req_text.splitlines() if l.strip() and not l.strip().startswith("#"))
+        raw = "\n".join(lines) + "\n--base=" + " ".join(base_prefix)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+    def path_for(self, requirements_path: Path, base_prefix: List[str]) -> Path:
+        st = requirements_path.stat()
+        ck = (str(requirements_path), st.st_mtime_ns, st.st_size, tuple(base_prefix))
+        key = self._key_cache.get(ck)
+        if key is None:
+            req_text = requirements_path.read_text(encoding="utf-8", errors="ignore")
+            key = self.key(req_text, base_prefix)
+            self._key_cache = {ck: key}  # só o arquivo atual interessa
+        return self.root / key
+
+    @staticmethod
+    def python_in(venv_dir: Path) -> Path:
+        if os.name == "nt":
+            return venv_dir / "Scripts" / "python.exe"
+        return venv_dir / "bin" / "python"
+
+    def exists(self, venv_dir: Path) -> bool:
+        return self.python_in(venv_dir).exists()
+
+    def ready(self, venv_dir: Path) -> bool:
+        return self.exists(venv_dir) and (venv_dir / READY_MARKER).exists()
+
+    def create_cmd(self, base_prefix: List[str], venv_dir: Path) -> List[str]:
+        return list(base_prefix) + ["-m", "venv", str(venv_dir)]
+
+    def mark_ready(self, venv_dir: Path, requirements_path: Path) -> None:
+        info = {
+            "requirements": str(requirements_path),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        (venv_dir / READY_MARKER).write_text(json.dumps(info, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    def pip_env(self) -> Dict[str, str]:
+        """Ambiente para o pip: cache compartilhado entre todos os venvs."""
+        self.pip_cache_dir.mkdir(parents=True, exist_ok=True)
+        env = dict(os.environ)
+        env["PIP_CACHE_DIR"] = str(self.pip_cache_dir)
+        env.pop("PYTHONHOME", None)
+        return env
+
+    def list(self) -> List[Dict[str, Any]]:
+        out: List[Dict[str, Any]] = []
+        if not self.root.exists():
+            return out
+        for p in sorted(self.root.iterdir(), key=lambda x: x.name):
+            if p.is_dir():
+                out.append({"key": p.name, "ready": self.ready(p), "python": str(self.python_in(p))})
+        return out
+
+    def remove(self, key: str) -> bool:
+        """Apaga o venv `key` (diretório direto de root); False se não existir."""
+        p = (self.root / key).resolve()
+        if p.parent != self.root.resolve() or not p.exists():
+            return False
+        shutil.rmtree(p, ignore_errors=True)
+        return True